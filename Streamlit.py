@@ -3,8 +3,10 @@ import cv2
 import serial
 import time
 import requests
-import threading
 from ultralytics import YOLO
+from ai_core.adaptive_resolution import ResolutionScheduler, run_plan
+from ai_core.alert_outbox import AlertOutbox, PermanentError, check_response
+from ai_core.camera_watchdog import SupervisedCamera
 
 BLYNK_AUTH = "XVhF_-ZPxwBHl8wpmnAS39h2XzW6oEsr"
 BLYNK_URL = "blynk.cloud"
@@ -18,12 +20,30 @@ if 'ser' not in st.session_state:
         st.session_state.ser = None
 
 def trigger_cloud_alert(is_active):
+    """True once Blynk has the new state; False -> the outbox retries"""
     value = 1 if is_active else 0
     link = f"https://{BLYNK_URL}/external/api/update?token={BLYNK_AUTH}&V1={value}"
     try:
-        requests.get(link)
+        check_response(requests.get(link, timeout=10))
+        return True
+    except PermanentError:
+        raise
     except:
-        pass
+        return False
+
+# On/off updates are kept on disk and replayed in order when the uplink returns
+@st.cache_resource
+def get_outbox():
+    outbox = AlertOutbox("streamlit")
+    outbox.register("blynk", lambda p: trigger_cloud_alert(p['active']))
+    return outbox
+
+outbox = get_outbox()
+
+# One supervised camera per server process: reruns reuse it, failures reconnect in the background
+@st.cache_resource
+def get_camera():
+    return SupervisedCamera(lambda: cv2.VideoCapture(0), name="camera 0")
 
 def trigger_hardware(command):
     if st.session_state.ser:
@@ -46,7 +66,8 @@ with left_col:
     camera_feed = st.image([])
     
     model = YOLO('yolov8n.pt')
-    cap = cv2.VideoCapture(0)
+    cap = get_camera()
+    resolution = ResolutionScheduler()
     
     is_alerting = False
 
@@ -57,6 +78,7 @@ with left_col:
                 raw_data = st.session_state.ser.readline().decode().strip()
                 if raw_data.startswith("D:"):
                     current_distance = int(raw_data.split(":")[1])
+                    resolution.update_distance(current_distance)
                     distance_text.metric("Sensor", f"{current_distance} cm")
             except:
                 pass
@@ -65,11 +87,26 @@ with left_col:
         ret, frame = cap.read()
         
         if not ret:
-            break
+            health = cap.stats()
+            alert_status.warning(f"Camera reconnecting ({health['blind_seconds']:.0f}s blind)")
+            continue
         
         if current_distance < wake_threshold:
-            results = model(frame, verbose=False)
-            frame = results[0].plot()
+            # Close animals need far fewer pixels than distant ones
+            plan = resolution.plan(frame.shape)
+            results, (ox, oy), latency_ms = run_plan(model, frame, plan)
+            resolution.record_latency(plan.imgsz, latency_ms)
+            resolution.update_boxes([
+                (x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+                for x1, y1, x2, y2 in results[0].boxes.xyxy.tolist()
+            ])
+
+            plotted = results[0].plot()
+            if plan.roi is not None:
+                x1, y1, x2, y2 = plan.roi
+                frame[y1:y2, x1:x2] = plotted
+            else:
+                frame = plotted
             
             for box in results[0].boxes:
                 class_id = int(box.cls[0])
@@ -80,16 +117,19 @@ with left_col:
         if animal_detected:
             if not is_alerting:
                 trigger_hardware('1')
-                threading.Thread(target=trigger_cloud_alert, args=(True,)).start()
+                outbox.enqueue("blynk", {'active': True})
                 is_alerting = True
                 alert_status.error("Danger Detected")
         else:
             if is_alerting:
                 trigger_hardware('0')
-                threading.Thread(target=trigger_cloud_alert, args=(False,)).start()
+                outbox.enqueue("blynk", {'active': False})
                 is_alerting = False
                 alert_status.success("Area Safe")
 
         camera_feed.image(frame, channels='BGR')
 
-    cap.release()
\ No newline at end of file
+    if not system_on:
+        # Deactivated: free the camera; activating again opens a fresh one
+        cap.release()
+        get_camera.clear()
\ No newline at end of file
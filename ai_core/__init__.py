@@ -0,0 +1 @@
+"""DrishtiX detection core (`drishtix` console script: ai_core.drishtix_main:main)."""
@@ -0,0 +1,141 @@
+"""
+Distance-adaptive inference resolution.
+
+Picks the YOLO input size (and optionally a crop) for every frame from the
+latest ultrasonic distance and the sizes of recent detections. A close
+animal fills the frame and is found at 320px; a distant one needs 640px.
+Measured latency per input size keeps the choice inside a budget.
+"""
+
+import time
+from collections import deque, namedtuple
+
+# --- CONFIGURATION ---
+IMGSZ_LEVELS = (320, 480, 640)   # Must be multiples of 32
+NEAR_CM = 80                     # At or below this, the smallest size is enough
+FAR_CM = 200                     # At or beyond this, use full resolution
+DISTANCE_MAX_AGE = 2.0           # Seconds before a reading is considered stale
+LATENCY_BUDGET_MS = 120          # Per-frame inference budget
+MIN_BOX_PX = 48                  # Smallest box side (at model input) we trust
+BOX_HISTORY = 10                 # Frames of detections to remember
+ROI_MARGIN = 0.25                # Extra context around the crop, per side
+ROI_MAX_FRACTION = 0.5           # Don't crop if boxes already cover this much
+FULL_SCAN_EVERY = 15             # Force a full-frame, full-size pass this often
+
+InferencePlan = namedtuple('InferencePlan', ['imgsz', 'roi'])
+
+
+class ResolutionScheduler:
+    """Chooses imgsz / crop per frame from distance, box sizes and latency"""
+    def __init__(self, levels=IMGSZ_LEVELS, latency_budget_ms=LATENCY_BUDGET_MS,
+                 near_cm=NEAR_CM, far_cm=FAR_CM):
+        self.levels = sorted(levels)
+        self.latency_budget_ms = latency_budget_ms
+        self.near_cm = near_cm
+        self.far_cm = far_cm
+
+        self.distance = None
+        self.distance_time = 0
+        self.recent_boxes = deque(maxlen=BOX_HISTORY)   # list of boxes per frame
+        self.latency_ms = {}                            # {imgsz: EMA latency}
+        self.frames = 0
+
+    # --- INPUTS ---
+    def update_distance(self, cm):
+        self.distance = cm
+        self.distance_time = time.time()
+
+    def update_boxes(self, boxes):
+        """boxes: list of (x1, y1, x2, y2) in full-frame pixels"""
+        self.recent_boxes.append(list(boxes))
+
+    def record_latency(self, imgsz, ms, alpha=0.2):
+        prev = self.latency_ms.get(imgsz)
+        self.latency_ms[imgsz] = ms if prev is None else (1 - alpha) * prev + alpha * ms
+
+    # --- DECISION ---
+    def estimate_latency(self, imgsz):
+        """Measured EMA, or a quadratic extrapolation from the nearest measured size"""
+        if imgsz in self.latency_ms:
+            return self.latency_ms[imgsz]
+        if not self.latency_ms:
+            return 0.0
+        known = min(self.latency_ms, key=lambda s: abs(s - imgsz))
+        return self.latency_ms[known] * (imgsz / known) ** 2
+
+    def _level_for_distance(self):
+        fresh = self.distance is not None and time.time() - self.distance_time < DISTANCE_MAX_AGE
+        if not fresh or self.distance >= self.far_cm:
+            return self.levels[-1]
+        if self.distance <= self.near_cm:
+            return self.levels[0]
+        frac = (self.distance - self.near_cm) / (self.far_cm - self.near_cm)
+        return self.levels[round(frac * (len(self.levels) - 1))]
+
+    def _level_for_box(self, min_side, span):
+        """Smallest size at which a box of `min_side` px (out of `span`) stays >= MIN_BOX_PX"""
+        needed = MIN_BOX_PX * span / max(min_side, 1)
+        for level in self.levels:
+            if level >= needed:
+                return level
+        return self.levels[-1]
+
+    def _within_budget(self, imgsz):
+        for level in reversed(self.levels):
+            if level <= imgsz and self.estimate_latency(level) <= self.latency_budget_ms:
+                return level
+        return self.levels[0]
+
+    def plan(self, frame_shape):
+        """Returns the InferencePlan for the next frame"""
+        self.frames += 1
+        h, w = frame_shape[:2]
+
+        if self.frames % FULL_SCAN_EVERY == 0:
+            # Periodic far-field sweep: the sensor only sees the nearest object
+            return InferencePlan(self._within_budget(self.levels[-1]), None)
+
+        boxes = [b for frame_boxes in self.recent_boxes for b in frame_boxes]
+        if not boxes:
+            return InferencePlan(self._within_budget(self._level_for_distance()), None)
+
+        min_side = min(min(x2 - x1, y2 - y1) for x1, y1, x2, y2 in boxes)
+        roi = self._roi(boxes, w, h)
+        if roi is not None:
+            rx1, ry1, rx2, ry2 = roi
+            imgsz = self._level_for_box(min_side, max(rx2 - rx1, ry2 - ry1))
+        else:
+            imgsz = max(self._level_for_box(min_side, max(w, h)), self._level_for_distance())
+        return InferencePlan(self._within_budget(imgsz), roi)
+
+    def _roi(self, boxes, w, h):
+        x1 = min(b[0] for b in boxes)
+        y1 = min(b[1] for b in boxes)
+        x2 = max(b[2] for b in boxes)
+        y2 = max(b[3] for b in boxes)
+        mx, my = (x2 - x1) * ROI_MARGIN, (y2 - y1) * ROI_MARGIN
+        x1, y1 = max(0, int(x1 - mx)), max(0, int(y1 - my))
+        x2, y2 = min(w, int(x2 + mx)), min(h, int(y2 + my))
+        if (x2 - x1) * (y2 - y1) > ROI_MAX_FRACTION * w * h:
+            return None
+        return x1, y1, x2, y2
+
+
+def run_plan(model, frame, plan, **kwargs):
+    """
+    Runs the model according to `plan`.
+
+    Returns:
+        tuple: (results, (ox, oy), latency_ms) where (ox, oy) must be added
+        to box coordinates to get back to full-frame pixels.
+    """
+    offset = (0, 0)
+    image = frame
+    if plan.roi is not None:
+        x1, y1, x2, y2 = plan.roi
+        image = frame[y1:y2, x1:x2]
+        offset = (x1, y1)
+
+    t0 = time.perf_counter()
+    results = model(image, imgsz=plan.imgsz, verbose=False, **kwargs)
+    return results, offset, (time.perf_counter() - t0) * 1000
@@ -0,0 +1,354 @@
+"""
+LAN alert bus: UDP multicast alerts for local sirens, lights and receivers.
+
+Every other alert path leaves the farm (WhatsApp, Telegram, Blynk). This
+one stays on the LAN: one compact binary datagram per alert, sent to a
+multicast group, so any number of receivers fire within milliseconds.
+
+Frames (network byte order):
+    ALERT   magic, version, type, sender, seq, camera, track, ts, conf, species
+    ACK     magic, version, type, sender, seq, receiver
+    BEACON  magic, version, type, sender, seq (last alert seq)
+    HELLO   magic, version, type, sender, seq, receiver
+
+Reliability: receivers answer BEACONs with HELLO, so the publisher knows
+who is listening. An ALERT is retransmitted (with backoff) until every
+live receiver has ACKed it or MAX_RETRIES is reached. Receivers drop
+duplicates by (sender, seq), so a retransmission never fires twice.
+
+Publisher:
+    bus = AlertPublisher()
+    bus.publish("TIGER", camera=0, track=7, conf=0.81)
+
+Receiver (e.g. on a Pi driving a relay):
+    rx = AlertReceiver(on_alert=lambda a: print(a.species, a.latency_ms))
+    rx.serve_forever()
+
+Loopback self-test:
+    python alert_bus.py --selftest
+"""
+
+import os
+import time
+import queue
+import socket
+import struct
+import logging
+import argparse
+import threading
+import collections
+
+# --- CONFIGURATION ---
+MCAST_GROUP = "239.255.42.99"   # Site-local (administratively scoped) group
+MCAST_PORT = 5007
+MCAST_TTL = 1                   # Never leaves the local network
+RETRY_INTERVAL = 0.05           # First retransmission after 50 ms...
+MAX_RETRIES = 6                 # ...doubling, so ~3 s in total
+HEARTBEAT_INTERVAL = 2.0        # Publisher BEACON period
+RECEIVER_TIMEOUT = 10.0         # Receiver forgotten after this long without a HELLO
+DEDUP_WINDOW = 1024             # (sender, seq) pairs remembered per receiver
+
+MAGIC = b"DXAB"
+VERSION = 1
+ALERT, ACK, BEACON, HELLO = 1, 2, 3, 4
+
+HEADER = struct.Struct("!4sBBII")             # magic, version, type, sender, seq
+ALERT_BODY = struct.Struct("!HidfB")          # camera, track, ts, conf, species length
+PEER_BODY = struct.Struct("!I")               # receiver id (ACK / HELLO)
+MAX_SPECIES = 255
+
+
+class Alert(collections.namedtuple("Alert", "species camera track ts conf seq sender")):
+    @property
+    def latency_ms(self):
+        """Publish-to-receive time (needs roughly synced clocks across hosts)"""
+        return (time.time() - self.ts) * 1000
+
+
+def _new_id():
+    return struct.unpack("!I", os.urandom(4))[0]
+
+
+def pack_alert(sender, seq, species, camera, track, ts, conf):
+    name = species.encode("utf-8")[:MAX_SPECIES]
+    return (HEADER.pack(MAGIC, VERSION, ALERT, sender, seq) +
+            ALERT_BODY.pack(camera, track, ts, conf, len(name)) + name)
+
+
+def pack_peer(kind, sender, seq, receiver):
+    return HEADER.pack(MAGIC, VERSION, kind, sender, seq) + PEER_BODY.pack(receiver)
+
+
+def unpack(data):
+    """(type, sender, seq, payload) or None for anything that is not ours"""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, kind, sender, seq = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    body = data[HEADER.size:]
+    if kind == ALERT:
+        if len(body) < ALERT_BODY.size:
+            return None
+        camera, track, ts, conf, length = ALERT_BODY.unpack_from(body)
+        species = body[ALERT_BODY.size:ALERT_BODY.size + length].decode("utf-8", "replace")
+        return kind, sender, seq, Alert(species, camera, track, ts, conf, seq, sender)
+    if kind in (ACK, HELLO):
+        if len(body) < PEER_BODY.size:
+            return None
+        return kind, sender, seq, PEER_BODY.unpack_from(body)[0]
+    if kind == BEACON:
+        return kind, sender, seq, None
+    return None
+
+
+class AlertPublisher:
+    """Multicasts alerts and retransmits them until live receivers ACK"""
+    def __init__(self, group=MCAST_GROUP, port=MCAST_PORT, ttl=MCAST_TTL, interface=None):
+        self.group = (group, port)
+        self.sender = _new_id()
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.receivers = {}      # {receiver_id: last_seen}
+        self.pending = {}        # {seq: [frame, acked_by, retries, next_send]}
+        self.sent = self.retransmits = self.acked = self.expired = self.send_failures = 0
+        self.unreachable = False  # Last send failed (logged once per outage)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if interface:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        self.sock.bind(("", 0))  # ACKs / HELLOs come back here, unicast
+        self.sock.settimeout(RETRY_INTERVAL / 2)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="alert-bus", daemon=True)
+        self.thread.start()
+
+    def publish(self, species, camera=0, track=-1, ts=None, conf=0.0):
+        """Sends one alert right away; returns its sequence number"""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            frame = pack_alert(self.sender, seq, species, camera, track, ts, conf)
+            if self._live_receivers():
+                self.pending[seq] = [frame, set(), 0, time.monotonic() + RETRY_INTERVAL]
+        if self._send(frame):
+            self.sent += 1
+        return seq
+
+    def _send(self, frame):
+        """sendto that survives a missing route (no network, interface down); False if it failed"""
+        try:
+            self.sock.sendto(frame, self.group)
+        except OSError as e:
+            self.send_failures += 1
+            if not self.unreachable:
+                logging.warning(f"⚠️ LAN alert bus can't send: {e}")
+                self.unreachable = True
+            return False
+        if self.unreachable:
+            logging.info("📡 LAN alert bus sending again")
+            self.unreachable = False
+        return True
+
+    def _live_receivers(self):
+        now = time.monotonic()
+        return {r for r, seen in self.receivers.items() if now - seen < RECEIVER_TIMEOUT}
+
+    def _handle(self, data):
+        msg = unpack(data)
+        if msg is None:
+            return
+        kind, sender, seq, receiver = msg
+        if sender != self.sender or kind not in (ACK, HELLO):
+            return
+        with self.lock:
+            self.receivers[receiver] = time.monotonic()
+            if kind == ACK and seq in self.pending:
+                entry = self.pending[seq]
+                entry[1].add(receiver)
+                if entry[1] >= self._live_receivers():
+                    del self.pending[seq]
+                    self.acked += 1
+
+    def _retransmit(self):
+        now = time.monotonic()
+        resend = []
+        with self.lock:
+            live = self._live_receivers()
+            for seq, entry in list(self.pending.items()):
+                frame, acked_by, retries, next_send = entry
+                if acked_by >= live:
+                    del self.pending[seq]
+                    self.acked += 1
+                elif now >= next_send:
+                    if retries >= MAX_RETRIES:
+                        del self.pending[seq]
+                        self.expired += 1
+                        logging.warning(f"⚠️ LAN alert #{seq} not acknowledged by {len(live - acked_by)} receiver(s)")
+                        continue
+                    entry[2] = retries + 1
+                    entry[3] = now + RETRY_INTERVAL * (2 ** entry[2])
+                    resend.append(frame)
+        for frame in resend:
+            if self._send(frame):
+                self.retransmits += 1
+
+    def _loop(self):
+        next_beacon = 0.0
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(2048)
+                self._handle(data)
+            except socket.timeout:
+                pass
+            except OSError:
+                if not self.running:
+                    break
+                raise
+            self._retransmit()
+            if time.monotonic() >= next_beacon:
+                self._send(HEADER.pack(MAGIC, VERSION, BEACON, self.sender, self.seq))
+                next_beacon = time.monotonic() + HEARTBEAT_INTERVAL
+
+    def stats(self):
+        with self.lock:
+            return {'sent': self.sent, 'retransmits': self.retransmits, 'acked': self.acked,
+                    'expired': self.expired, 'send_failures': self.send_failures,
+                    'pending': len(self.pending),
+                    'receivers': len(self._live_receivers())}
+
+    def close(self, drain=1.0):
+        """Gives in-flight alerts up to `drain` seconds to be ACKed, then stops"""
+        deadline = time.monotonic() + drain
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(RETRY_INTERVAL)
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+
+class AlertReceiver:
+    """Joins the group, ACKs every alert and delivers each one exactly once"""
+    def __init__(self, group=MCAST_GROUP, port=MCAST_PORT, interface="0.0.0.0", on_alert=None, receiver_id=None):
+        self.receiver = receiver_id if receiver_id is not None else _new_id()
+        self.on_alert = on_alert
+        self.queue = queue.Queue()
+        self.seen = collections.OrderedDict()   # (sender, seq) -> None, bounded
+        self.running = False
+        self.thread = None
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # Several receivers per host
+        self.sock.bind(("", port))
+        membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        self.sock.settimeout(0.5)
+
+    def _reply(self, frame, addr):
+        try:
+            self.sock.sendto(frame, addr)
+        except OSError as e:
+            # No route back to the publisher: it retransmits, we answer the next copy
+            logging.warning(f"⚠️ Can't answer {addr[0]}: {e}")
+
+    def _handle(self, data, addr):
+        msg = unpack(data)
+        if msg is None:
+            return
+        kind, sender, seq, payload = msg
+        if kind == BEACON:
+            self._reply(pack_peer(HELLO, sender, seq, self.receiver), addr)
+        elif kind == ALERT:
+            # ACK first (also for duplicates: our earlier ACK may have been lost)
+            self._reply(pack_peer(ACK, sender, seq, self.receiver), addr)
+            key = (sender, seq)
+            if key in self.seen:
+                return
+            self.seen[key] = None
+            if len(self.seen) > DEDUP_WINDOW:
+                self.seen.popitem(last=False)
+            if self.on_alert:
+                try:
+                    self.on_alert(payload)
+                except Exception as e:
+                    logging.error(f"❌ Alert handler failed: {e}")
+            else:
+                self.queue.put(payload)
+
+    def serve_forever(self):
+        """Blocking receive loop (until stop())"""
+        self.running = True
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self.running:
+                    break
+                raise
+            self._handle(data, addr)
+
+    def start(self):
+        """Receive loop in a background thread"""
+        self.thread = threading.Thread(target=self.serve_forever, name="alert-receiver", daemon=True)
+        self.thread.start()
+        return self
+
+    def get(self, timeout=None):
+        """Next alert (when no on_alert callback is set); raises queue.Empty on timeout"""
+        return self.queue.get(timeout=timeout)
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        self.sock.close()
+
+
+def selftest(count=20, receivers=2):
+    """Publishes `count` alerts to `receivers` local receivers and reports latency"""
+    rxs = [AlertReceiver().start() for _ in range(receivers)]
+    bus = AlertPublisher()
+    time.sleep(0.2)
+    bus.sock.sendto(HEADER.pack(MAGIC, VERSION, BEACON, bus.sender, 0), bus.group)  # Introduce receivers now
+    time.sleep(0.2)
+
+    latencies = []
+    for i in range(count):
+        bus.publish("TIGER", camera=0, track=i, conf=0.9)
+        for rx in rxs:
+            latencies.append(rx.get(timeout=2.0).latency_ms)
+    bus.close()
+    for rx in rxs:
+        rx.stop()
+
+    latencies.sort()
+    print(f"{count} alerts x {receivers} receivers: median {latencies[len(latencies) // 2]:.2f} ms, "
+          f"max {latencies[-1]:.2f} ms, {bus.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DrishtiX LAN alert bus")
+    parser.add_argument("--selftest", action="store_true", help="publish + receive on this host")
+    parser.add_argument("--listen", action="store_true", help="print alerts as they arrive")
+    parser.add_argument("--group", default=MCAST_GROUP)
+    parser.add_argument("--port", type=int, default=MCAST_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    if args.selftest:
+        selftest()
+    elif args.listen:
+        rx = AlertReceiver(args.group, args.port, on_alert=lambda a: logging.info(
+            f"🚨 {a.species} cam {a.camera} track {a.track} ({a.latency_ms:.1f} ms)"))
+        try:
+            rx.serve_forever()
+        except KeyboardInterrupt:
+            rx.stop()
@@ -0,0 +1,173 @@
+"""
+Bandwidth-aware alert media.
+
+For every alert we prepare, once, three encodings of the evidence frame:
+    crop     - the confirmed box with some context, small byte budget
+    preview  - the whole frame downscaled, small byte budget
+    original - the full-resolution evidence JPEG as saved
+
+Variants are written next to the evidence (0001_TIGER_..._crop.jpg, ...)
+with a small JSON manifest, so each channel can pick the most complete
+variant that fits its link without re-encoding anything. The crop loses
+the scene around the animal, so it is only sent when nothing else fits.
+"""
+
+import os
+import json
+import logging
+import threading
+
+import cv2
+
+# --- CONFIGURATION ---
+CROP_BUDGET = 30 * 1024        # Bytes
+PREVIEW_BUDGET = 45 * 1024
+PREVIEW_WIDTH = 480
+CROP_CONTEXT = 0.5             # Extra margin around the box, per side
+CROP_MIN_SIDE = 160
+QUALITY_RANGE = (25, 90)
+
+# Largest upload each channel should attempt on a 2G/3G link
+CHANNEL_BUDGETS = {
+    "whatsapp": 120 * 1024,
+    "telegram": 60 * 1024,
+}
+VARIANT_ORDER = ("original", "preview", "crop")   # Highest fidelity first
+VARIANT_SUFFIXES = ("_crop.jpg", "_preview.jpg")   # Not evidence frames in their own right
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def encode_to_budget(img, budget):
+    """
+    Highest JPEG quality that fits `budget` bytes (binary search).
+
+    Downscales by 25% steps if even the lowest quality is too big.
+
+    Returns:
+        tuple: (jpeg_bytes, quality, (width, height))
+    """
+    while True:
+        lo, hi = QUALITY_RANGE
+        best = None
+        while lo <= hi:
+            q = (lo + hi) // 2
+            ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), q])
+            if ok and len(buf) <= budget:
+                best = (buf.tobytes(), q)
+                lo = q + 1
+            else:
+                hi = q - 1
+        h, w = img.shape[:2]
+        if best is not None or min(h, w) < 64:
+            if best is None:
+                ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), QUALITY_RANGE[0]])
+                best = (buf.tobytes(), QUALITY_RANGE[0])
+            return best[0], best[1], (w, h)
+        img = cv2.resize(img, (int(w * 0.75), int(h * 0.75)), interpolation=cv2.INTER_AREA)
+
+
+def crop_box(img, box):
+    """Box plus context, at least CROP_MIN_SIDE px, clipped to the frame"""
+    h, w = img.shape[:2]
+    x1, y1, x2, y2 = box
+    bw, bh = x2 - x1, y2 - y1
+    mx = max(bw * CROP_CONTEXT, (CROP_MIN_SIDE - bw) / 2, 0)
+    my = max(bh * CROP_CONTEXT, (CROP_MIN_SIDE - bh) / 2, 0)
+    x1, y1 = max(0, int(x1 - mx)), max(0, int(y1 - my))
+    x2, y2 = min(w, int(x2 + mx)), min(h, int(y2 + my))
+    return img[y1:y2, x1:x2]
+
+
+def _variant_path(evidence_path, variant):
+    stem, ext = os.path.splitext(evidence_path)
+    return evidence_path if variant == "original" else f"{stem}_{variant}{ext}"
+
+
+def _manifest_path(evidence_path):
+    return os.path.splitext(evidence_path)[0] + ".media.json"
+
+
+def load_media(evidence_path):
+    """The variant manifest for an evidence image, or None if not prepared yet"""
+    path = _manifest_path(evidence_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(evidence_path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def prepare_alert_media(evidence_path, box=None, frame=None):
+    """
+    Encodes the crop/preview variants once and caches them on disk.
+
+    Safe to call from several alert threads: the first one does the work,
+    the others wait and reuse the result.
+
+    Args:
+        evidence_path (str): The saved evidence JPEG
+        box (tuple): (x1, y1, x2, y2) of the confirmed threat, optional
+        frame (ndarray): The frame in memory, saves re-reading the JPEG
+
+    Returns:
+        dict: {variant: {"path", "bytes", "size", "quality"}}
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(evidence_path, threading.Lock())
+
+    with lock:
+        media = load_media(evidence_path)
+        if media is not None:
+            return media
+
+        img = frame if frame is not None else cv2.imread(evidence_path)
+        if img is None:
+            raise FileNotFoundError(evidence_path)
+
+        h, w = img.shape[:2]
+        media = {"original": {"path": evidence_path, "bytes": os.path.getsize(evidence_path),
+                              "size": [w, h], "quality": None}}
+
+        scale = min(1.0, PREVIEW_WIDTH / w)
+        preview = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        sources = {"preview": (preview, PREVIEW_BUDGET)}
+        if box is not None:
+            sources["crop"] = (crop_box(img, box), CROP_BUDGET)
+
+        for variant, (src, budget) in sources.items():
+            data, quality, size = encode_to_budget(src, budget)
+            path = _variant_path(evidence_path, variant)
+            with open(path, 'wb') as f:
+                f.write(data)
+            media[variant] = {"path": path, "bytes": len(data), "size": list(size), "quality": quality}
+
+        with open(_manifest_path(evidence_path), 'w') as f:
+            json.dump(media, f, indent=1)
+
+        logging.info("🗜️ Alert media: " + ", ".join(f"{k} {v['bytes'] // 1024}KB" for k, v in media.items()))
+    with _locks_guard:
+        _locks.pop(evidence_path, None)
+    return media
+
+
+def pick_variant(evidence_path, max_bytes=None, channel=None, order=VARIANT_ORDER, box=None):
+    """
+    Path of the first variant in `order` that fits the byte budget.
+
+    Falls back to the smallest variant if none fits, and to the original
+    image if the variants cannot be prepared.
+    """
+    if max_bytes is None:
+        max_bytes = CHANNEL_BUDGETS.get(channel, float('inf'))
+    try:
+        media = prepare_alert_media(evidence_path, box=box)
+    except Exception as e:
+        logging.error(f"❌ Alert media preparation failed: {e}")
+        return evidence_path
+
+    available = [media[v] for v in order if v in media]
+    for variant in available:
+        if variant["bytes"] <= max_bytes:
+            return variant["path"]
+    return min(available, key=lambda v: v["bytes"])["path"]
@@ -0,0 +1,307 @@
+"""
+Store-and-forward alert outbox.
+
+When the uplink drops, WhatsApp gives up after its retries and the
+Blynk/Telegram calls swallow their errors, so the alert is lost. The
+outbox makes every remote alert durable first and delivers it later:
+
+    outbox = AlertOutbox("drishtix")
+    outbox.register("whatsapp", send_fn)          # send_fn(payload) -> True when delivered
+    outbox.enqueue("whatsapp", {"animal": "TIGER", "image": path}, alert_id="0012_TIGER")
+
+enqueue() only appends to an in-memory journal (microseconds). A writer
+thread appends journal records to outbox/<name>.wal as JSON lines and
+fsyncs once per batch (group commit, at most every FSYNC_INTERVAL). Each
+channel has its own sender thread that delivers its alerts in order, so a
+slow channel (the 20-40 s WhatsApp GUI send) never delays another; a
+failed delivery is retried with exponential backoff and holds back that
+channel only.
+An alert that failed MAX_ATTEMPTS times (in this run) or is older than
+MAX_AGE is dropped so the rest of its channel moves on, and so is one
+whose handler raises PermanentError (e.g. the evidence file is gone, the
+API rejected the request): retrying can't fix those.
+
+    add   {"op": "add", "id", "channel", "payload", "ts"}
+    done  {"op": "done", "id", "channel"}
+    drop  {"op": "drop", "id", "channel", "reason"}   (full / attempts / expired / rejected)
+
+On start the log is replayed: anything added and not done is sent again
+(at-least-once: an alert cut off mid-delivery by a restart is resent).
+The same (channel, alert id) is accepted only once, also across restarts.
+Once enough records are dead, the log is compacted to the pending alerts
+plus the most recent delivered ids. Media is referenced by path, not copied.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import collections
+
+# --- CONFIGURATION ---
+OUTBOX_DIR = "outbox"
+FSYNC_INTERVAL = 0.2        # Seconds; at most one fsync per interval (group commit)
+BASE_BACKOFF = 5.0          # First retry after this many seconds...
+MAX_BACKOFF = 300.0         # ...doubling up to this
+MAX_PENDING = 5000          # Oldest undelivered alerts are dropped beyond this (bounded disk)
+MAX_ATTEMPTS = 20           # Failed deliveries before an alert is given up...
+MAX_AGE = 6 * 3600          # ...or seconds since it was raised (a stale alert only misleads)
+DEDUP_MEMORY = 2000         # Delivered ids remembered (and kept through compaction)
+COMPACT_AFTER = 1000        # Dead records in the log before it is rewritten
+
+
+class PermanentError(Exception):
+    """Raised by a handler when resending the same alert can never succeed"""
+
+
+def check_response(response):
+    """raise_for_status() for handlers: a 4xx (other than timeout / rate limit) is permanent"""
+    if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+        raise PermanentError(f"HTTP {response.status_code}: {response.text[:200]}")
+    response.raise_for_status()
+
+
+class AlertOutbox:
+    """Durable, ordered, deduplicated delivery of remote alerts"""
+    def __init__(self, name="alerts", folder=OUTBOX_DIR, max_pending=MAX_PENDING,
+                 max_attempts=MAX_ATTEMPTS, max_age=MAX_AGE):
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, f"{name}.wal")
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.max_age = max_age
+        self.handlers = {}
+        self.pending = collections.OrderedDict()     # key -> add record, in enqueue order
+        self.retry = {}                              # key -> [attempts, next_try (monotonic)]
+        self.delivered = collections.OrderedDict()   # key -> None, bounded
+        self.journal = collections.deque()           # Records not yet written
+        self.dead = 0
+        self.sent = self.failures = self.dropped = self.expired = 0
+
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()     # Journal has records
+        self.ready = {}                    # channel -> Event: something new to send
+        self.senders = {}                  # channel -> sender thread
+        self.idle = threading.Condition(self.lock)
+        self.running = True                # Senders
+        self.writing = True                # Writer (stops after the senders)
+
+        self._replay()
+        self.wal = open(self.path, 'a', encoding='utf-8')
+        self.writer = threading.Thread(target=self._write_loop, name="outbox-writer", daemon=True)
+        self.writer.start()
+        if self.pending:
+            logging.info(f"📮 Outbox: {len(self.pending)} undelivered alert(s) from last run")
+
+    @staticmethod
+    def _key(channel, alert_id):
+        return f"{channel}:{alert_id}"
+
+    # --- LOG ---
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue          # Torn last line after a crash
+                key = self._key(record['channel'], record['id'])
+                if record['op'] == 'add':
+                    self.pending[key] = record
+                    self.retry[key] = [0, 0.0]
+                elif key in self.pending or record['op'] == 'done':
+                    self.pending.pop(key, None)
+                    self.retry.pop(key, None)
+                    self.dead += 1
+                    if record['op'] == 'done':
+                        self._remember(key)
+
+    def _remember(self, key):
+        self.delivered[key] = None
+        if len(self.delivered) > DEDUP_MEMORY:
+            self.delivered.popitem(last=False)
+
+    def _write_loop(self):
+        while True:
+            self.dirty.wait()
+            self.dirty.clear()
+            with self.lock:
+                records, self.journal = list(self.journal), collections.deque()
+                running = self.writing
+            if records:
+                self.wal.write("".join(json.dumps(r) + "\n" for r in records))
+                self.wal.flush()
+                os.fsync(self.wal.fileno())
+            if self.dead >= COMPACT_AFTER:
+                self._compact()
+            if not running:
+                break
+            time.sleep(FSYNC_INTERVAL)       # Batch everything that arrives meanwhile
+
+    def _compact(self):
+        """Rewrites the log as: recent delivered ids + pending alerts"""
+        with self.lock:
+            # Journal records not yet written are already reflected in the snapshot
+            self.journal.clear()
+            done = [{'op': 'done', 'channel': k.split(':', 1)[0], 'id': k.split(':', 1)[1]} for k in self.delivered]
+            live = list(self.pending.values())
+            self.dead = 0
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write("".join(json.dumps(r) + "\n" for r in done + live))
+            f.flush()
+            os.fsync(f.fileno())
+        self.wal.close()
+        os.replace(tmp, self.path)
+        self.wal = open(self.path, 'a', encoding='utf-8')
+        logging.info(f"🗜️ Outbox compacted: {len(live)} pending")
+
+    # --- API ---
+    def register(self, channel, handler):
+        """
+        handler(payload) -> truthy when delivered; False or an exception means retry,
+        PermanentError means drop. Each channel is delivered by its own thread.
+        """
+        with self.lock:
+            self.handlers[channel] = handler
+            if channel not in self.senders:
+                self.ready[channel] = threading.Event()
+                self.senders[channel] = threading.Thread(target=self._send_loop, args=(channel,),
+                                                         name=f"outbox-{channel}", daemon=True)
+                self.senders[channel].start()
+        self.ready[channel].set()
+
+    def enqueue(self, channel, payload, alert_id=None):
+        """Queues one alert; returns its id, or None for a duplicate"""
+        alert_id = alert_id or uuid.uuid4().hex
+        key = self._key(channel, alert_id)
+        with self.lock:
+            if key in self.pending or key in self.delivered:
+                return None
+            record = {'op': 'add', 'id': alert_id, 'channel': channel, 'payload': payload, 'ts': time.time()}
+            self.pending[key] = record
+            self.retry[key] = [0, 0.0]
+            self.journal.append(record)
+            if len(self.pending) > self.max_pending:
+                old_key = next(iter(self.pending))
+                self._drop(old_key, "full")
+                logging.warning(f"⚠️ Outbox full, dropped oldest alert {old_key}")
+        self.dirty.set()
+        if channel in self.ready:
+            self.ready[channel].set()
+        return alert_id
+
+    # --- DELIVERY ---
+    def _drop(self, key, reason):
+        """Gives up on a pending alert (lock held)"""
+        record = self.pending.pop(key)
+        self.retry.pop(key, None)
+        self.journal.append({'op': 'drop', 'id': record['id'], 'channel': record['channel'], 'reason': reason})
+        self.dead += 2
+        if reason == "expired":
+            self.expired += 1
+        else:
+            self.dropped += 1
+
+    def _due(self, channel):
+        """(key, record) of the channel's head alert if its retry time has come; plus the next wake-up"""
+        with self.lock:
+            # Later alerts of the channel wait their turn behind the oldest one
+            key = next((k for k, r in self.pending.items() if r['channel'] == channel), None)
+            if key is None:
+                return None, None
+            next_try = self.retry[key][1]
+            if next_try <= time.monotonic():
+                return (key, self.pending[key]), None
+            return None, next_try
+
+    def _send_loop(self, channel):
+        ready = self.ready[channel]
+        while self.running:
+            ready.clear()                  # Before looking, so an enqueue meanwhile wakes the wait
+            head, wake = self._due(channel)
+            if head:
+                key, record = head
+                reason = None
+                if time.time() - record['ts'] > self.max_age:
+                    ok, reason = False, "expired"
+                else:
+                    try:
+                        ok = self.handlers[channel](record['payload'])
+                    except PermanentError as e:
+                        logging.error(f"❌ Outbox delivery of {key} rejected: {e}")
+                        ok, reason = False, "rejected"
+                    except Exception as e:
+                        logging.error(f"❌ Outbox delivery of {key} failed: {e}")
+                        ok = False
+                with self.lock:
+                    if ok:
+                        self.pending.pop(key, None)
+                        self.retry.pop(key, None)
+                        self._remember(key)
+                        self.journal.append({'op': 'done', 'id': record['id'], 'channel': record['channel']})
+                        self.dead += 2
+                        self.sent += 1
+                    elif key not in self.pending:
+                        pass                       # Dropped meanwhile (outbox full)
+                    elif reason:
+                        self._drop(key, reason)
+                        logging.warning(f"🗑️ {key} dropped ({reason})")
+                    elif self.retry[key][0] + 1 >= self.max_attempts:
+                        self.failures += 1
+                        self._drop(key, "attempts")
+                        logging.warning(f"🗑️ {key} dropped after {self.max_attempts} failed attempts")
+                    else:
+                        attempts = self.retry[key][0] + 1
+                        delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                        self.retry[key] = [attempts, time.monotonic() + delay]
+                        self.failures += 1
+                        logging.warning(f"📮 {key} undelivered (attempt {attempts}), retrying in {delay:.0f}s")
+                    self.idle.notify_all()
+                self.dirty.set()
+                continue
+            timeout = 1.0 if wake is None else max(0.0, min(1.0, wake - time.monotonic()))
+            ready.wait(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {'pending': len(self.pending), 'sent': self.sent, 'failures': self.failures,
+                    'dropped': self.dropped, 'expired': self.expired}
+
+    def wait_idle(self, timeout):
+        """Waits until nothing is pending (or the timeout); True if all delivered"""
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self.pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.idle.wait(remaining)
+        return True
+
+    def close(self, timeout=0.0):
+        """
+        Gives pending alerts `timeout` seconds, then stops; the rest stays in the log.
+        A delivery already in progress is waited for, so its result is logged.
+        """
+        if timeout:
+            self.wait_idle(timeout)
+        with self.lock:
+            self.running = False
+            senders = list(self.senders.values())
+        for ready in self.ready.values():
+            ready.set()
+        for sender in senders:
+            sender.join()
+        with self.lock:
+            self.writing = False
+        self.dirty.set()
+        self.writer.join()
+        self.wal.close()
+        if self.pending:
+            logging.info(f"📮 {len(self.pending)} alert(s) kept in {self.path} for the next run")
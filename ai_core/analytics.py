@@ -0,0 +1,197 @@
+"""
+Vectorized analytics over detection history.
+
+Loads the detection log (detection_log.py) or the evidence index
+(evidence_store.py) into flat NumPy arrays and answers questions such as:
+
+    hourly_heatmap()      intrusions per species per hour of day
+    dwell_times()         mean time an animal stays in view, per species
+    night_counts()        which camera sees the most of a species at night
+
+Everything is done with sorts, bincounts and reduceat, so it stays well
+under a second on millions of detections. The functions return plain
+dicts / arrays so the Streamlit dashboards can render them directly.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Flat imports below also work when loaded as ai_core.analytics (dashboards)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from detection_log import DetectionLogReader, LOG_DIR, NO_CLASS
+
+# --- CONFIGURATION ---
+TRACK_GAP = 300           # Seconds without a sighting that end a visit
+NIGHT_HOURS = (18, 6)
+
+
+class DetectionHistory:
+    """Column arrays: ts, species (codes into species_names), camera, track"""
+    def __init__(self, ts, species, species_names, camera, track):
+        order = np.argsort(ts, kind='stable')
+        self.ts = np.asarray(ts, dtype=np.float64)[order]
+        self.species = np.asarray(species, dtype=np.int32)[order]
+        self.species_names = list(species_names)
+        self.camera = np.asarray(camera, dtype=np.int32)[order]
+        self.track = np.asarray(track, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.ts)
+
+    # --- LOADERS ---
+    @classmethod
+    def from_detection_log(cls, folder=LOG_DIR, name_map=None, confirmed_only=True, t0=None, t1=None):
+        """
+        Rows from the binary detection log.
+
+        name_map maps raw model classes to threat names (e.g. NAME_MAP) so
+        "cat" and "zebra" both count as TIGER.
+        """
+        reader = DetectionLogReader(folder)
+        rows = reader.scan(t0, t1)
+        rows = rows[rows['cls'] != NO_CLASS]
+        if confirmed_only:
+            rows = rows[rows['confirmed'] == 1]
+
+        raw_names = reader.classes
+        final = [(name_map or {}).get(n, n.upper()) for n in raw_names]
+        species_names = sorted(set(final))
+        remap = np.array([species_names.index(f) for f in final] or [0], dtype=np.int32)
+        return cls(rows['ts'], remap[rows['cls']], species_names, rows['camera'], rows['track'])
+
+    @classmethod
+    def from_evidence_index(cls, store):
+        """One row per saved evidence image (every row is its own visit)"""
+        records = list(store.records())
+        species_names = sorted({r['species'] for r in records})
+        codes = {name: i for i, name in enumerate(species_names)}
+        return cls(
+            [r['ts'] for r in records],
+            [codes[r['species']] for r in records],
+            species_names,
+            [r.get('camera', 0) for r in records],
+            np.arange(len(records)),
+        )
+
+    @classmethod
+    def load(cls, log_folder=LOG_DIR, evidence_store=None, name_map=None):
+        """Detection log if there is one, otherwise the evidence index (empty on a fresh install)"""
+        if os.path.exists(os.path.join(log_folder, "index.json")):
+            return cls.from_detection_log(log_folder, name_map=name_map)
+        if evidence_store is None:
+            return cls([], [], [], [], [])
+        return cls.from_evidence_index(evidence_store)
+
+    # --- VISITS ---
+    def visits(self, gap=TRACK_GAP):
+        """
+        Collapses rows into visits (one animal's continuous presence).
+
+        A visit is a run of rows with the same camera and track id and no
+        gap longer than `gap` seconds (track ids restart with the app).
+
+        Returns:
+            dict of arrays: start, end, species, camera
+        """
+        if not len(self):
+            empty = np.empty(0)
+            return {'start': empty, 'end': empty, 'species': empty.astype(np.int32),
+                    'camera': empty.astype(np.int32)}
+
+        order = np.lexsort((self.ts, self.track, self.camera))
+        ts, track, camera = self.ts[order], self.track[order], self.camera[order]
+        new_visit = np.ones(len(ts), dtype=bool)
+        new_visit[1:] = (camera[1:] != camera[:-1]) | (track[1:] != track[:-1]) | (np.diff(ts) > gap)
+        starts = np.flatnonzero(new_visit)
+
+        return {
+            'start': np.minimum.reduceat(ts, starts),
+            'end': np.maximum.reduceat(ts, starts),
+            'species': self.species[order][starts],
+            'camera': camera[starts],
+        }
+
+
+def _local_hour(ts):
+    offset = time.localtime().tm_gmtoff
+    return ((np.asarray(ts) + offset) // 3600 % 24).astype(np.int64)
+
+
+def _is_night(hours, night_hours=NIGHT_HOURS):
+    start, end = night_hours
+    return (hours >= start) | (hours < end) if start > end else (hours >= start) & (hours < end)
+
+
+def hourly_heatmap(history, gap=TRACK_GAP):
+    """
+    Visits per species per hour of day (by visit start).
+
+    Returns:
+        dict: {"species": [...], "counts": int array (n_species, 24)}
+    """
+    v = history.visits(gap)
+    n = len(history.species_names)
+    flat = v['species'].astype(np.int64) * 24 + _local_hour(v['start'])
+    counts = np.bincount(flat, minlength=n * 24).reshape(n, 24)
+    return {'species': history.species_names, 'counts': counts}
+
+
+def dwell_times(history, gap=TRACK_GAP):
+    """
+    Mean and max visit length in seconds per species.
+
+    Returns:
+        dict: {species: {"visits", "mean_s", "max_s"}}
+    """
+    v = history.visits(gap)
+    n = len(history.species_names)
+    dwell = v['end'] - v['start']
+    visits = np.bincount(v['species'], minlength=n)
+    total = np.bincount(v['species'], weights=dwell, minlength=n)
+    longest = np.zeros(n)
+    np.maximum.at(longest, v['species'], dwell)
+    return {
+        name: {'visits': int(visits[i]),
+               'mean_s': float(total[i] / visits[i]) if visits[i] else 0.0,
+               'max_s': float(longest[i])}
+        for i, name in enumerate(history.species_names)
+    }
+
+
+def night_counts(history, species, night_hours=NIGHT_HOURS, gap=TRACK_GAP):
+    """
+    Night-time visits of one species per camera, busiest camera first.
+
+    Returns:
+        list: [(camera, visits)]
+    """
+    if species not in history.species_names:
+        return []
+    v = history.visits(gap)
+    mask = (v['species'] == history.species_names.index(species)) & _is_night(_local_hour(v['start']), night_hours)
+    cams, counts = np.unique(v['camera'][mask], return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return [(int(c), int(n)) for c, n in zip(cams[order], counts[order])]
+
+
+def daily_counts(history, gap=TRACK_GAP):
+    """
+    Visits per species per calendar day.
+
+    Returns:
+        dict: {"days": [date strings], "species": [...], "counts": (n_days, n_species)}
+    """
+    v = history.visits(gap)
+    if not len(v['start']):
+        return {'days': [], 'species': history.species_names,
+                'counts': np.zeros((0, len(history.species_names)), dtype=np.int64)}
+    offset = time.localtime().tm_gmtoff
+    day = ((v['start'] + offset) // 86400).astype(np.int64)
+    days, day_idx = np.unique(day, return_inverse=True)
+    n = len(history.species_names)
+    counts = np.bincount(day_idx * n + v['species'], minlength=len(days) * n).reshape(len(days), n)
+    labels = [time.strftime("%Y-%m-%d", time.gmtime(d * 86400)) for d in days]
+    return {'days': labels, 'species': history.species_names, 'counts': counts}
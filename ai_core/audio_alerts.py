@@ -0,0 +1,150 @@
+"""
+Preloaded, non-blocking audio alerts.
+
+The dashboards used to call pygame.mixer.music.load(SIREN_FILE) on every
+alert (re-reading and decoding the MP3) and silently skipped the alert if
+something was already playing. AudioEngine instead:
+
+    - decodes the siren and every species tone into memory once at startup
+    - plays them on one reserved mixer channel from a background thread,
+      so play() only puts a name on a queue (microseconds)
+    - lets a higher-priority species preempt a lower one (TIGER over
+      WILD BOAR); equal or lower priority never cuts off a running alarm
+    - runs on SDL's "dummy" driver for tests / headless boxes (only if
+      SDL_AUDIODRIVER is not already set); `played` records what would
+      have sounded
+
+Species without their own sound file get a synthesized beep pattern, so
+the operator can tell animals apart by ear.
+
+    engine = AudioEngine()                  # AudioEngine(driver=NULL_DRIVER) in tests
+    engine.play("TIGER")
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+import numpy as np
+
+# --- CONFIGURATION ---
+SIREN_FILE = "alarm.mp3"
+SOUND_FILES = {                 # Species -> file; others use their tone, then DEFAULT
+    "DEFAULT": SIREN_FILE,
+    "TIGER": SIREN_FILE,
+    "ELEPHANT": SIREN_FILE,
+}
+PRIORITIES = {                  # Higher preempts lower
+    "TIGER": 3,
+    "ELEPHANT": 3,
+    "WILD BOAR": 2,
+    "DEER": 1,
+}
+DEFAULT_PRIORITY = 1
+SPECIES_TONES = {               # Species -> (frequency Hz, beeps), used if no file is configured
+    "TIGER": (880, 3),
+    "ELEPHANT": (660, 2),
+    "WILD BOAR": (520, 4),
+    "DEER": (440, 1),
+}
+SAMPLE_RATE = 44100
+MIXER_BUFFER = 512              # Small buffer = low start latency
+NULL_DRIVER = "dummy"           # SDL audio driver that outputs nothing
+
+
+def make_tone(frequency, beeps, channels=2, beep_s=0.25, gap_s=0.1, volume=0.6):
+    """16-bit PCM bytes of `beeps` short sine beeps"""
+    t = np.arange(int(SAMPLE_RATE * beep_s)) / SAMPLE_RATE
+    beep = np.sin(2 * np.pi * frequency * t)
+    fade = min(len(beep) // 10, 441)
+    beep[:fade] *= np.linspace(0, 1, fade)       # No clicks
+    beep[-fade:] *= np.linspace(1, 0, fade)
+    gap = np.zeros(int(SAMPLE_RATE * gap_s))
+    wave = np.concatenate([np.concatenate([beep, gap]) for _ in range(beeps)])
+    pcm = (wave * volume * 32767).astype(np.int16)
+    return np.repeat(pcm[:, None], channels, axis=1).tobytes()
+
+
+class AudioEngine:
+    """Owns the mixer; play() is safe to call from the detection thread"""
+    def __init__(self, sound_files=SOUND_FILES, priorities=PRIORITIES, driver=None):
+        self.priorities = {k.upper(): v for k, v in priorities.items()}
+        self.sounds = {}
+        self.played = []                  # [(time, species)] actually started
+        self.current_priority = 0
+        self.requests = queue.SimpleQueue()
+        self.enabled = False
+
+        try:
+            import pygame
+            if driver == NULL_DRIVER and "SDL_AUDIODRIVER" not in os.environ:
+                os.environ["SDL_AUDIODRIVER"] = driver     # Never override an explicit choice
+            pygame.mixer.pre_init(SAMPLE_RATE, -16, 2, MIXER_BUFFER)
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(1)
+            self.channel = pygame.mixer.Channel(0)     # Dedicated alarm channel
+            self._load(pygame, sound_files)
+            self.enabled = True
+        except Exception as e:
+            logging.error(f"❌ Audio disabled: {e}")
+            return
+
+        self.thread = threading.Thread(target=self._loop, name="audio-alerts", daemon=True)
+        self.thread.start()
+
+    def _load(self, pygame, sound_files):
+        """Decodes everything once; the mixer keeps the PCM in memory"""
+        channels = pygame.mixer.get_init()[2]
+        decoded = {}
+        for species, path in sound_files.items():
+            if path not in decoded:
+                if not os.path.exists(path):
+                    logging.warning(f"⚠️ MISSING SOUND FILE: {path}")
+                    continue
+                decoded[path] = pygame.mixer.Sound(path)
+            self.sounds[species.upper()] = decoded[path]
+        for species, (frequency, beeps) in SPECIES_TONES.items():
+            if species not in self.sounds:
+                self.sounds[species] = pygame.mixer.Sound(buffer=make_tone(frequency, beeps, channels))
+        logging.info(f"🔊 Audio ready: {len(self.sounds)} sounds preloaded")
+
+    def priority(self, species):
+        return self.priorities.get((species or "").upper(), DEFAULT_PRIORITY)
+
+    def play(self, species=None):
+        """Requests the alarm for a species; returns immediately"""
+        if self.enabled:
+            self.requests.put((species or "DEFAULT").upper())
+
+    def _sound_for(self, species):
+        return self.sounds.get(species) or self.sounds.get("DEFAULT")
+
+    def _loop(self):
+        while True:
+            species = self.requests.get()
+            if species is None:
+                break
+            sound = self._sound_for(species)
+            if sound is None:
+                continue
+            priority = self.priority(species)
+            if self.channel.get_busy():
+                if priority <= self.current_priority:
+                    continue              # The running alarm is at least as urgent
+                self.channel.stop()       # Preempt
+            self.channel.play(sound)
+            self.current_priority = priority
+            self.played.append((time.time(), species))
+
+    def stop(self):
+        """Silences the current alarm"""
+        if self.enabled:
+            self.channel.stop()
+
+    def close(self):
+        if self.enabled:
+            self.requests.put(None)
+            self.thread.join()
+            self.channel.stop()
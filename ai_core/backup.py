@@ -40,7 +40,9 @@ except:
     ser = None
 
 # --- 4. MAIN LOOP ---
-cap = cv2.VideoCapture(0)
+# Reconnects in the background if the camera drops, stalls or freezes
+from camera_watchdog import SupervisedCamera
+cap = SupervisedCamera(lambda: cv2.VideoCapture(0), name="camera 0")
 cap.set(3, 640)
 cap.set(4, 480)
 
@@ -48,7 +50,11 @@ print(">>> CAMERA ACTIVE. SHOW AN IMAGE NOW! <<<")
 
 while True:
     success, img = cap.read()
-    if not success: break
+    if not success:
+        # Camera down: keep the window responsive while it reconnects
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+        continue
 
     # Run AI
     results = model(img, stream=True, verbose=False)
@@ -94,6 +100,7 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
+print(f"📷 Camera health: {cap.stats()}")
 cap.release()
 cv2.destroyAllWindows()
 if ser: ser.close()
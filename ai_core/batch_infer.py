@@ -0,0 +1,302 @@
+"""
+Bulk offline inference over image folders, globs and videos.
+
+Re-scores historical evidence or vets a new model against past breaches
+without touching the camera loops:
+
+    python batch_infer.py breached/ --model models/best.pt --out rescored.jsonl
+    python batch_infer.py "archive/**/*.jpg" night_cam.mp4 --batch 32 --video-stride 5
+
+Decoding runs in a process pool that prefetches a bounded number of tasks
+ahead of the model (images are shrunk to the model size in the workers,
+so little pixel data crosses process boundaries). The model runs on
+batches of `--batch` frames. Every detection goes through the same
+NAME_MAP / CONFIDENCE_THRESHOLDS policy as the live system
+(detection_policy.yaml), and results are streamed as they are produced:
+
+    --out file.jsonl      one line per image / video frame
+    --to-index DIR        best detection per image appended to DIR/index.jsonl
+                          (evidence index format, see evidence_store.py);
+                          images already indexed are re-scored in place,
+                          images outside DIR are skipped (the index only
+                          stores file names)
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import collections
+from multiprocessing import Pool
+
+import cv2
+
+from detection_policy import DetectionPolicy, POLICY_FILE
+from evidence_store import EvidenceStore, INDEX_NAME
+
+# --- CONFIGURATION ---
+BATCH_SIZE = 16
+IMGSZ = 640
+PREFETCH_TASKS = 64           # Decode tasks in flight ahead of the model
+VIDEO_SEGMENT = 32            # Video frames decoded per task
+PROGRESS_EVERY = 5.0          # Seconds between progress lines
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTS = ('.mp4', '.avi', '.mkv', '.mov', '.mjpg', '.mjpeg')
+SKIP_SUFFIXES = ("_crop.jpg", "_preview.jpg")   # Alert variants next to evidence
+
+
+# --- INPUTS ---
+def expand_inputs(inputs, recursive=False):
+    """Directories, globs and files -> (images, videos), sorted and de-duplicated"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            paths.extend(glob.glob(pattern, recursive=recursive))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(glob.glob(item, recursive=True))
+        elif os.path.exists(item):
+            paths.append(item)
+        else:
+            logging.warning(f"⚠️ Not found: {item}")
+
+    images, videos = [], []
+    for path in sorted(set(os.path.abspath(p) for p in paths)):
+        lower = path.lower()
+        if lower.endswith(SKIP_SUFFIXES) or os.sep + "archive" + os.sep in path:
+            continue
+        if lower.endswith(IMAGE_EXTS):
+            images.append(path)
+        elif lower.endswith(VIDEO_EXTS):
+            videos.append(path)
+    return images, videos
+
+
+def make_tasks(images, videos, stride=1, segment=VIDEO_SEGMENT):
+    """One task per image, one per `segment` sampled frames of each video"""
+    tasks = [("image", path, 0, 0, 1) for path in images]
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if count <= 0:
+            tasks.append(("video", path, 0, -1, stride))      # Unknown length: one task
+            continue
+        span = segment * stride
+        for start in range(0, count, span):
+            tasks.append(("video", path, start, min(count, start + span), stride))
+    return tasks
+
+
+def _shrink(img, imgsz):
+    """Longest side -> imgsz; the model would resize anyway. Returns (img, scale)."""
+    h, w = img.shape[:2]
+    scale = min(1.0, imgsz / max(h, w))
+    if scale < 1.0:
+        img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return img, scale
+
+
+def _decode_task(args):
+    """Worker: [(path, frame_index or None, image, scale)]"""
+    (kind, path, start, end, stride), imgsz = args
+    cv2.setNumThreads(1)
+    out = []
+    if kind == "image":
+        img = cv2.imread(path)
+        if img is not None:
+            out.append((path, None, *_shrink(img, imgsz)))
+        return out
+
+    cap = cv2.VideoCapture(path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    index = start
+    while end < 0 or index < end:
+        if (index - start) % stride:
+            ok = cap.grab()                 # Skipped frames are not decoded
+        else:
+            ok, frame = cap.read()
+            if ok:
+                out.append((path, index, *_shrink(frame, imgsz)))
+        if not ok:
+            break
+        index += 1
+    cap.release()
+    return out
+
+
+def prefetch(pool, tasks, imgsz, ahead=PREFETCH_TASKS):
+    """Decoded frames in task order, never more than `ahead` tasks buffered"""
+    pending = collections.deque()
+    it = iter(tasks)
+    for task in it:
+        pending.append(pool.apply_async(_decode_task, ((task, imgsz),)))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        result = pending.popleft().get()
+        for task in it:
+            pending.append(pool.apply_async(_decode_task, ((task, imgsz),)))
+            break
+        yield from result
+
+
+def batched(frames, size):
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- OUTPUTS ---
+class JSONLSink:
+    def __init__(self, path):
+        self.f = sys.stdout if path == "-" else open(path, 'w')
+
+    def write(self, record):
+        self.f.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class IndexSink:
+    """Best detection of each image -> evidence index records"""
+    def __init__(self, folder):
+        self.store = EvidenceStore(folder)
+        self.indexed = {r['file'] for r in self.store.records()}
+        self.rescored = {}      # file -> new fields, for images the index already has
+        self.outside = 0
+
+    def write(self, record):
+        threats = [d for d in record['detections'] if d['species']]     # --all also keeps unmapped classes
+        if record['frame'] is not None or not threats:
+            return                          # Index entries are images of threats, one per file
+        source = os.path.abspath(record['source'])
+        if os.path.dirname(source) != self.store.folder:
+            self.outside += 1               # Only the name is stored: the index could never find it
+            return
+        best = max(threats, key=lambda d: d['conf'])
+        name = os.path.basename(source)
+        if name in self.indexed:
+            self.rescored[name] = {'species': best['species'], 'box': list(best['box']), 'conf': best['conf']}
+            return
+        self.store.add(source, best['species'], box=best['box'], conf=best['conf'], ts=os.path.getmtime(source))
+        self.indexed.add(name)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.rescored:
+            self.store.update(self.rescored)
+            logging.info(f"🗂️ Re-scored {len(self.rescored)} image(s) already in the index")
+        if self.outside:
+            logging.warning(f"⚠️ {self.outside} image(s) outside {self.store.folder} not indexed, copy them there first")
+
+
+# --- RUN ---
+def run(inputs, model_path="yolov8n.pt", out="-", to_index=None, batch_size=BATCH_SIZE, imgsz=IMGSZ,
+        workers=None, video_stride=1, policy_path=POLICY_FILE, keep_all=False, recursive=False):
+    from ultralytics import YOLO
+
+    images, videos = expand_inputs(inputs, recursive)
+    tasks = make_tasks(images, videos, video_stride)
+    if not tasks:
+        logging.error("❌ Nothing to process")
+        return None
+    policy = DetectionPolicy.load(policy_path)
+    model = YOLO(model_path)
+    thresholds = None if keep_all else policy.threshold_array(model.names)
+    sinks = [IndexSink(to_index)] if to_index else []
+    if out and (out != "-" or not to_index):
+        sinks.append(JSONLSink(out))
+    if to_index and videos:
+        logging.warning("⚠️ Video frames are only written to the JSONL output, not the evidence index")
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    logging.info(f"🗂️ {len(images)} images, {len(videos)} videos -> {len(tasks)} decode tasks "
+                 f"on {workers} workers, batch {batch_size}")
+
+    frames = kept = 0
+    species_counts = collections.Counter()
+    infer_s = 0.0
+    t0 = last_report = time.perf_counter()
+    with Pool(workers) as pool:
+        for batch in batched(prefetch(pool, tasks, imgsz), batch_size):
+            t_infer = time.perf_counter()
+            results = model([img for _, _, img, _ in batch], imgsz=imgsz, verbose=False)
+            infer_s += time.perf_counter() - t_infer
+
+            for (path, index, _, scale), r in zip(batch, results):
+                detections = []
+                cls_ids, confs, boxes = r.boxes.cls.cpu().numpy().astype(int), r.boxes.conf.cpu().numpy(), r.boxes.xyxy.cpu().numpy()
+                if thresholds is not None:
+                    # One vectorized comparison drops everything under its class threshold
+                    keep = confs >= thresholds[cls_ids]
+                    cls_ids, confs, boxes = cls_ids[keep], confs[keep], boxes[keep]
+                for cls_id, conf, xyxy in zip(cls_ids.tolist(), confs.tolist(), boxes.tolist()):
+                    raw = model.names[int(cls_id)]
+                    final = policy.map_name(raw, conf)
+                    if final is None and not keep_all:
+                        continue
+                    detections.append({'class': raw, 'species': final, 'conf': round(float(conf), 4),
+                                       'box': [int(v / scale) for v in xyxy]})
+                    if final:
+                        species_counts[final] += 1
+                record = {'source': path, 'frame': index, 'detections': detections}
+                for sink in sinks:
+                    sink.write(record)
+                frames += 1
+                kept += any(d['species'] for d in detections)
+            for sink in sinks:
+                sink.flush()
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_EVERY:
+                last_report = now
+                logging.info(f"⏳ {frames} frames, {frames / (now - t0):.1f} frames/s, "
+                             f"model busy {infer_s / (now - t0) * 100:.0f}%")
+
+    for sink in sinks:
+        sink.close()
+    elapsed = time.perf_counter() - t0
+    report = {'frames': frames, 'frames_with_threats': kept, 'seconds': elapsed,
+              'frames_per_s': frames / elapsed if elapsed else 0.0,
+              'model_busy': infer_s / elapsed if elapsed else 0.0,
+              'species': dict(species_counts)}
+    logging.info(f"✅ {frames} frames in {elapsed:.1f}s ({report['frames_per_s']:.1f} frames/s), "
+                 f"{kept} with threats: {dict(species_counts)}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch inference over images / videos with the detection policy")
+    parser.add_argument("inputs", nargs="+", help="directories, globs, image or video files")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--out", default="-", help="JSONL output ('-' = stdout)")
+    parser.add_argument("--to-index", help="append best detections to this folder's " + INDEX_NAME)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: cores - 1)")
+    parser.add_argument("--video-stride", type=int, default=1, help="use every Nth video frame")
+    parser.add_argument("--policy", default=POLICY_FILE)
+    parser.add_argument("--all", action="store_true", help="also keep detections the policy filters out")
+    parser.add_argument("-r", "--recursive", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    run(args.inputs, args.model, args.out, args.to_index, args.batch, args.imgsz, args.workers,
+        args.video_stride, args.policy, args.all, args.recursive)
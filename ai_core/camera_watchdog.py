@@ -0,0 +1,302 @@
+"""
+Camera health watchdog with background reconnect.
+
+One failed cap.read() used to end the detection loop, and a USB hiccup or
+an RTSP stall can block read() for many seconds. SupervisedCamera owns
+the capture in a reader thread and looks like a VideoCapture to the loop:
+
+    cam = SupervisedCamera(lambda: cv2.VideoCapture(0), name="gate")
+    while cam.isOpened():
+        ret, frame = cam.read()      # waits at most READ_TIMEOUT
+        if not ret:
+            continue                 # camera down: keep serving, the watchdog reconnects
+
+It detects
+    - dropped streams: MAX_FAILED_READS failed reads in a row
+    - stalls: read() blocked in the driver for STALL_TIMEOUT;
+      the stuck reader is abandoned and a fresh one opens a new capture
+    - frozen streams: bit-identical frames for FROZEN_SECONDS (a live
+      sensor always has some noise)
+
+and reopens the camera with exponential backoff (with jitter) without
+blocking the caller. Every outage is logged with its blind time, the
+seconds in which nothing could be detected; stats() has the totals.
+
+Settings made with set() are replayed on every reconnect, and
+`configure(cap)` is called on each newly opened capture.
+
+Frames are only decoded when the caller asks for one, so a slow caller
+(the power scheduler's IDLE state at 1 FPS) keeps decoding at its own
+rate. Captures with grab()/retrieve() are grabbed continuously, which
+keeps the driver queue fresh and the stall check live, and retrieve()
+runs only for a waiting read(); others are read on demand.
+"""
+
+import time
+import random
+import logging
+import threading
+
+import numpy as np
+
+# --- CONFIGURATION ---
+READ_TIMEOUT = 1.0        # read() returns (False, None) after this long without a frame
+STALL_TIMEOUT = 5.0       # read() blocked for this long -> stream stalled
+FROZEN_SECONDS = 3.0      # Identical frames for this long -> stream frozen
+MAX_FAILED_READS = 5      # Consecutive failed reads -> stream dropped
+BASE_BACKOFF = 0.5        # First reconnect delay (seconds)...
+MAX_BACKOFF = 30.0        # ...doubling up to this
+CHECK_INTERVAL = 0.5      # Stall checks per second
+FINGERPRINT_STEP = 16     # Frozen check compares every Nth pixel
+
+
+class SupervisedCamera:
+    """VideoCapture look-alike that survives camera failures"""
+    def __init__(self, open_fn, name="camera", configure=None, pool=None,
+                 stall_timeout=STALL_TIMEOUT, frozen_seconds=FROZEN_SECONDS):
+        self.open_fn = open_fn
+        self.name = name
+        self.configure = configure
+        self.pool = pool                  # FramePool: read into pooled buffers (see frame_pool.py)
+        self.stall_timeout = stall_timeout
+        self.frozen_seconds = frozen_seconds
+
+        self.settings = {}                # prop -> value, replayed on reconnect
+        self.capture = None               # Current underlying capture (None while down)
+        self.latest = None                # Newest unread (FrameBuffer or frame)
+        self.state = "connecting"         # connecting / up / down
+        self.down_since = None
+        self.outages = []                 # [[wall-clock start, blind seconds, reason]]
+        self.blind_seconds = 0.0
+        self.reconnects = 0
+        self.frames = 0
+
+        self.cond = threading.Condition()
+        self.running = True
+        self.generation = 0
+        self.reader = None
+        self.reading_since = None         # Set while the current reader is inside read()
+        self.reconfigure = False
+        self.wanted = False               # A consumer waits in read_buffer(): decode the next frame
+        self._start_reader()
+        self.monitor = threading.Thread(target=self._monitor_loop, name=f"{name}-watchdog", daemon=True)
+        self.monitor.start()
+
+    # --- READER (one per capture; a stalled one is abandoned) ---
+    def _start_reader(self):
+        with self.cond:
+            self.generation += 1
+            generation = self.generation
+            self.reading_since = None
+        self.reader = threading.Thread(target=self._read_loop, args=(generation,),
+                                       name=f"{self.name}-reader-{generation}", daemon=True)
+        self.reader.start()
+
+    def _current(self, generation):
+        return self.running and generation == self.generation
+
+    def _open(self):
+        try:
+            cap = self.open_fn()
+            if cap is not None and cap.isOpened():
+                for prop, value in self.settings.items():
+                    cap.set(prop, value)
+                if self.configure:
+                    self.configure(cap)
+                return cap
+            if cap is not None:
+                cap.release()
+        except Exception as e:
+            logging.error(f"❌ {self.name}: open failed: {e}")
+        return None
+
+    def _read(self, cap, retrieve=False):
+        if self.pool:
+            return self.pool.read(cap, retrieve)
+        ret, frame = cap.retrieve() if retrieve else cap.read()
+        return frame if ret else None
+
+    def _wait_for_reader(self, generation):
+        """Blocks until a consumer waits in read_buffer(); False if there is none yet"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.wanted or not self._current(generation), CHECK_INTERVAL)
+            return self.wanted and self._current(generation)
+
+    def _read_loop(self, generation):
+        backoff = BASE_BACKOFF
+        while self._current(generation):
+            cap = self._open()
+            if cap is not None:
+                with self.cond:
+                    if not self._current(generation):
+                        cap.release()
+                        return
+                    self.capture = cap
+                if self._stream(cap, generation):
+                    backoff = BASE_BACKOFF     # It delivered: the next failure starts over
+                cap.release()
+                with self.cond:
+                    if self.capture is cap:
+                        self.capture = None
+            else:
+                self._down("unavailable")
+            if not self._current(generation):
+                return
+            time.sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(MAX_BACKOFF, backoff * 2)
+
+    def _stream(self, cap, generation):
+        """Reads until the stream fails; True if it delivered any frame"""
+        failures, failing_since, delivered = 0, None, False
+        fingerprint, same_since = None, None
+        grab = hasattr(cap, 'grab') and hasattr(cap, 'retrieve')
+        while self._current(generation):
+            if self.reconfigure:
+                self.reconfigure = False
+                for prop, value in self.settings.items():
+                    cap.set(prop, value)
+            if not grab and not self._wait_for_reader(generation):
+                continue
+            self.reading_since = time.monotonic()
+            if grab:
+                grabbed = cap.grab()
+                if grabbed and not self.wanted:
+                    # Nobody is waiting: drop the frame undecoded
+                    self.reading_since = None
+                    failures, failing_since, delivered = 0, None, True
+                    continue
+                item = self._read(cap, retrieve=True) if grabbed else None
+            else:
+                item = self._read(cap)
+            if not self._current(generation):
+                if item is not None and self.pool:
+                    item.release()
+                return delivered
+            self.reading_since = None
+            if item is None:
+                failures += 1
+                failing_since = failing_since or time.monotonic()
+                if failures >= MAX_FAILED_READS:
+                    self._down("dropped", failing_since)
+                    return delivered
+                time.sleep(0.05)
+                continue
+            failures, failing_since = 0, None
+
+            frame = item.array if self.pool else item
+            now = time.monotonic()
+            current = np.ascontiguousarray(frame[::FINGERPRINT_STEP, ::FINGERPRINT_STEP])
+            if fingerprint is not None and fingerprint.shape == current.shape and np.array_equal(fingerprint, current):
+                if now - same_since >= self.frozen_seconds:
+                    if self.pool:
+                        item.release()
+                    self._down("frozen", same_since)
+                    return delivered
+            else:
+                fingerprint, same_since = current, now
+            self._publish(item, now)
+            delivered = True
+        return delivered
+
+    def _publish(self, item, now):
+        with self.cond:
+            if self.state != "up":
+                if self.down_since is not None:
+                    blind = now - self.down_since
+                    self.blind_seconds += blind
+                    self.outages[-1][1] = blind
+                    logging.info(f"📷 {self.name} back after {blind:.1f}s blind")
+                self.state, self.down_since = "up", None
+            if self.latest is not None and self.pool:
+                self.latest.release()          # Never read: the newer frame wins
+            self.latest = item
+            self.wanted = False
+            self.frames += 1
+            self.cond.notify_all()
+
+    def _down(self, reason, since=None):
+        """Marks the camera down; blind time counts from `since` (the last useful frame)"""
+        with self.cond:
+            if self.state == "down":
+                return
+            self.state = "down"
+            self.down_since = since or time.monotonic()
+            self.outages.append([time.time(), 0.0, reason])
+            self.reconnects += 1
+        logging.warning(f"⚠️ {self.name}: stream {reason}, reconnecting in the background")
+
+    def _monitor_loop(self):
+        while self.running:
+            time.sleep(CHECK_INTERVAL)
+            since = self.reading_since
+            stalled = since is not None and time.monotonic() - since > self.stall_timeout
+            if stalled and self.running:
+                # The reader is stuck inside read(): leave it, start over with a new capture
+                self._down("stalled", since)
+                with self.cond:
+                    self.capture = None
+                self._start_reader()
+
+    # --- VideoCapture API ---
+    def read_buffer(self, timeout=READ_TIMEOUT):
+        """Newest frame (a FrameBuffer when pooled), or None if none came within `timeout`"""
+        with self.cond:
+            if self.latest is None:
+                self.wanted = True
+                self.cond.notify_all()
+                self.cond.wait_for(lambda: self.latest is not None or not self.running, timeout)
+            item, self.latest = self.latest, None
+        return item
+
+    def read(self, timeout=READ_TIMEOUT):
+        """VideoCapture-style read; pooled frames are copied out so the buffer goes back at once"""
+        item = self.read_buffer(timeout)
+        if item is None:
+            return False, None
+        if not self.pool:
+            return True, item
+        frame = item.array.copy()
+        item.release()
+        return True, frame
+
+    def isOpened(self):
+        """True until release(): a camera that is down is being reconnected"""
+        return self.running
+
+    @property
+    def healthy(self):
+        return self.state == "up"
+
+    def set(self, prop, value):
+        """Applied by the reader thread, and again after every reconnect"""
+        self.settings[prop] = value
+        self.reconfigure = True
+        return True
+
+    def get(self, prop):
+        cap = self.capture
+        return cap.get(prop) if cap is not None else 0.0
+
+    def __getattr__(self, name):
+        # Backend extras (e.g. MJPEGCapture.set_target_width) go to the current capture
+        cap = self.__dict__.get('capture')
+        if cap is None:
+            raise AttributeError(name)
+        return getattr(cap, name)
+
+    def stats(self):
+        with self.cond:
+            blind = self.blind_seconds
+            if self.down_since is not None:
+                blind += time.monotonic() - self.down_since
+            return {'state': self.state, 'frames': self.frames, 'reconnects': self.reconnects,
+                    'outages': len(self.outages), 'blind_seconds': round(blind, 1)}
+
+    def release(self):
+        """Stops reading; the reader releases its capture once its read() returns"""
+        with self.cond:
+            self.running = False
+            self.generation += 1
+            self.cond.notify_all()
+        if self.reader:
+            self.reader.join(self.stall_timeout)
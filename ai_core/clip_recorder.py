@@ -0,0 +1,173 @@
+"""
+Pre-event ring buffer and background MP4 clip recording.
+
+The detection loop only hands over a frame reference (a deque append).
+A compressor thread JPEG-encodes frames into an in-memory ring holding
+the last few seconds; when an alert fires, that history plus the next few
+seconds are written to an MP4 next to the evidence JPEG by an encoder
+thread. Both memory and disk use are capped.
+"""
+
+import os
+import glob
+import time
+import queue
+import logging
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+PRE_SECONDS = 5          # History kept before the alert
+POST_SECONDS = 5         # Recording continues this long after the alert
+MAX_MEMORY_MB = 64       # Ring buffer + clips being collected
+MAX_DISK_MB = 500        # Oldest clips are deleted beyond this
+JPEG_QUALITY = 80
+CLIP_FPS_LIMITS = (1, 30)
+
+
+class _ClipJob:
+    def __init__(self, path, frames, until):
+        self.path = path
+        self.frames = frames        # [(timestamp, jpeg_bytes)]
+        self.until = until
+        self.bytes = sum(len(b) for _, b in frames)
+
+
+class ClipRecorder:
+    """Keeps recent frames compressed in RAM and turns alerts into MP4 clips"""
+    def __init__(self, folder, pre_seconds=PRE_SECONDS, post_seconds=POST_SECONDS,
+                 max_memory_mb=MAX_MEMORY_MB, max_disk_mb=MAX_DISK_MB):
+        self.folder = folder
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self.max_disk = max_disk_mb * 1024 * 1024
+
+        self.incoming = deque(maxlen=8)   # (ts, frame, done); oldest dropped if we fall behind
+        self.ring = deque()               # [(timestamp, jpeg_bytes)]
+        self.ring_bytes = 0
+        self.active = []                  # Clips still collecting post-event frames
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.encode_queue = queue.Queue()
+        self.running = True
+
+        self.compressor = threading.Thread(target=self._compress_loop, name="clip-compressor", daemon=True)
+        self.encoder = threading.Thread(target=self._encode_loop, name="clip-encoder", daemon=True)
+        self.compressor.start()
+        self.encoder.start()
+
+    # --- DETECTION THREAD API (cheap) ---
+    def push(self, frame, done=None):
+        """
+        Hands a frame to the recorder. Never encodes on the caller's thread.
+
+        `done()` is called once the frame is no longer needed (encoded or
+        dropped), e.g. to give a pooled buffer back (see frame_pool.py).
+        """
+        if len(self.incoming) == self.incoming.maxlen:
+            try:
+                _, _, dropped = self.incoming.popleft()
+            except IndexError:
+                dropped = None            # The compressor got there first
+            if dropped:
+                dropped()
+        self.incoming.append((time.time(), frame, done))
+        self.wakeup.set()
+
+    def trigger(self, clip_path):
+        """Starts a clip: the buffered history plus POST_SECONDS of what follows"""
+        with self.lock:
+            job = _ClipJob(clip_path, list(self.ring), time.time() + self.post_seconds)
+            self.active.append(job)
+        logging.info(f"🎬 Recording clip: {clip_path}")
+
+    # --- BACKGROUND ---
+    def _compress_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
+        while self.running or self.incoming:
+            self.wakeup.wait(0.5)
+            self.wakeup.clear()
+            while self.incoming:
+                ts, frame, done = self.incoming.popleft()
+                ok, buf = cv2.imencode('.jpg', frame, params)
+                if done:
+                    done()
+                if ok:
+                    self._store(ts, buf.tobytes())
+            self._finish_due(time.time())
+        self._finish_due(float('inf'))
+
+    def _store(self, ts, data):
+        with self.lock:
+            self.ring.append((ts, data))
+            self.ring_bytes += len(data)
+            # Evict by age and by memory budget (clips in progress count too)
+            budget = self.max_memory - sum(j.bytes for j in self.active)
+            while self.ring and (ts - self.ring[0][0] > self.pre_seconds or self.ring_bytes > budget):
+                _, old = self.ring.popleft()
+                self.ring_bytes -= len(old)
+
+            for job in self.active:
+                if ts <= job.until:
+                    job.frames.append((ts, data))
+                    job.bytes += len(data)
+                    if job.bytes > self.max_memory // 2:
+                        job.until = ts     # Memory cap: cut the clip short
+
+    def _finish_due(self, now):
+        with self.lock:
+            done = [j for j in self.active if j.until <= now]
+            self.active = [j for j in self.active if j.until > now]
+        for job in done:
+            self.encode_queue.put(job)
+
+    def _encode_loop(self):
+        while True:
+            job = self.encode_queue.get()
+            if job is None:
+                break
+            try:
+                self._write_clip(job)
+                self._enforce_disk_cap()
+            except Exception as e:
+                logging.error(f"❌ Clip encoding failed for {job.path}: {e}")
+
+    def _write_clip(self, job):
+        if not job.frames:
+            return
+        duration = job.frames[-1][0] - job.frames[0][0]
+        fps = len(job.frames) / duration if duration > 0 else CLIP_FPS_LIMITS[1]
+        fps = min(max(fps, CLIP_FPS_LIMITS[0]), CLIP_FPS_LIMITS[1])
+
+        writer = None
+        for _, data in job.frames:
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if writer is None:
+                h, w = frame.shape[:2]
+                writer = cv2.VideoWriter(job.path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+            elif frame.shape[:2] != (h, w):
+                frame = cv2.resize(frame, (w, h))   # Resolution changed mid-clip
+            writer.write(frame)
+        writer.release()
+        logging.info(f"🎬 Clip saved: {job.path} ({len(job.frames)} frames, {duration:.1f}s)")
+
+    def _enforce_disk_cap(self):
+        clips = sorted(glob.glob(os.path.join(self.folder, "*.mp4")), key=os.path.getmtime)
+        total = sum(os.path.getsize(c) for c in clips)
+        while clips and total > self.max_disk:
+            oldest = clips.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+            logging.info(f"🧹 Removed old clip to stay under disk cap: {oldest}")
+
+    def close(self):
+        """Finishes clips in progress (without waiting for their post window) and stops"""
+        self.running = False
+        self.wakeup.set()
+        self.compressor.join()
+        self.encode_queue.put(None)
+        self.encoder.join()
@@ -0,0 +1,178 @@
+"""
+Compact per-frame detection log.
+
+Every raw model detection (before thresholds, so they can be re-tuned
+offline) is appended as one fixed-width NumPy record:
+
+    ts, frame, camera, cls, conf, x1, y1, x2, y2, track, confirmed, infer_ms
+
+Rows are buffered in memory and written by a background thread as .npy
+chunks (one every CHUNK_SECONDS or CHUNK_ROWS), with a small JSON time
+index of the chunks. The reader memory-maps chunks and binary-searches
+the timestamps, so range scans never load the whole history.
+
+Offline tuning example:
+    log = DetectionLogReader("detections")
+    rows = log.scan(t0, t1)
+    cat = rows[rows['cls'] == log.class_id("cat")]
+    print((cat['conf'] >= 0.35).mean())
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+# --- CONFIGURATION ---
+LOG_DIR = "detections"
+CHUNK_ROWS = 65536          # Flush when this many rows are buffered...
+CHUNK_SECONDS = 300         # ...or when the oldest buffered row is this old
+LOG_EMPTY_FRAMES = False    # True: one placeholder row per frame without detections
+NO_CLASS = 0xFFFF           # cls value of the placeholder rows
+
+DETECTION_DTYPE = np.dtype([
+    ('ts', '<f8'),          # Unix time of the frame
+    ('frame', '<u4'),       # Frame counter
+    ('camera', '<u2'),
+    ('cls', '<u2'),         # Index into classes.json (raw model class name)
+    ('conf', '<f4'),
+    ('x1', '<i2'), ('y1', '<i2'), ('x2', '<i2'), ('y2', '<i2'),
+    ('track', '<i4'),       # ThreatTracker id, -1 if below threshold
+    ('confirmed', 'u1'),    # 1 if confirmed (alert-worthy) on this frame
+    ('infer_ms', '<f4'),
+])
+
+INDEX_NAME = "index.json"
+CLASSES_NAME = "classes.json"
+
+
+class DetectionLog:
+    """Buffered, asynchronously flushed writer"""
+    def __init__(self, folder=LOG_DIR):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.index = _load_json(os.path.join(folder, INDEX_NAME), [])
+        self.classes = _load_json(os.path.join(folder, CLASSES_NAME), [])
+        self.class_ids = {name: i for i, name in enumerate(self.classes)}
+
+        self.buffer = []
+        self.buffer_started = None
+        self.lock = threading.Lock()
+        self.flush_now = threading.Event()
+        self.running = True
+        self.writer = threading.Thread(target=self._write_loop, name="detection-log", daemon=True)
+        self.writer.start()
+
+    def _class_id(self, name):
+        cid = self.class_ids.get(name)
+        if cid is None:
+            cid = len(self.classes)
+            self.classes.append(name)
+            self.class_ids[name] = cid
+        return cid
+
+    def log_frame(self, ts, frame, camera, detections, infer_ms):
+        """
+        Appends one frame's detections. Only touches an in-memory list.
+
+        Args:
+            detections: [(raw_name, conf, (x1, y1, x2, y2), track_id, confirmed)]
+        """
+        with self.lock:
+            if not detections:
+                if not LOG_EMPTY_FRAMES:
+                    return
+                rows = [(ts, frame, camera, NO_CLASS, 0.0, 0, 0, 0, 0, -1, 0, infer_ms)]
+            else:
+                rows = [(ts, frame, camera, self._class_id(name), conf, x1, y1, x2, y2, track, int(confirmed), infer_ms)
+                        for name, conf, (x1, y1, x2, y2), track, confirmed in detections]
+            if not self.buffer:
+                self.buffer_started = time.monotonic()
+            self.buffer.extend(rows)
+            if len(self.buffer) >= CHUNK_ROWS:
+                self.flush_now.set()
+
+    def _write_loop(self):
+        while self.running:
+            self.flush_now.wait(1.0)
+            self.flush_now.clear()
+            with self.lock:
+                due = self.buffer and (len(self.buffer) >= CHUNK_ROWS or
+                                       time.monotonic() - self.buffer_started >= CHUNK_SECONDS)
+            if due:
+                self.flush()
+
+    def flush(self):
+        """Writes whatever is buffered as a new chunk"""
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+            classes = list(self.classes)
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=DETECTION_DTYPE)
+        chunk.sort(order='ts', kind='stable')
+        name = f"chunk_{len(self.index):06d}.npy"
+        np.save(os.path.join(self.folder, name), chunk)
+        self.index.append({'file': name, 'ts_min': float(chunk['ts'][0]),
+                           'ts_max': float(chunk['ts'][-1]), 'rows': int(len(chunk))})
+        _save_json(os.path.join(self.folder, CLASSES_NAME), classes)
+        _save_json(os.path.join(self.folder, INDEX_NAME), self.index)
+
+    def close(self):
+        self.running = False
+        self.flush_now.set()
+        self.writer.join()
+        self.flush()
+
+
+class DetectionLogReader:
+    """Memory-mapped range scans over the chunks"""
+    def __init__(self, folder=LOG_DIR):
+        self.folder = folder
+        self.index = _load_json(os.path.join(folder, INDEX_NAME), [])
+        self.classes = _load_json(os.path.join(folder, CLASSES_NAME), [])
+        self._maps = {}
+
+    def class_id(self, name):
+        return self.classes.index(name)
+
+    def _chunk(self, entry):
+        if entry['file'] not in self._maps:
+            self._maps[entry['file']] = np.load(os.path.join(self.folder, entry['file']), mmap_mode='r')
+        return self._maps[entry['file']]
+
+    def scan(self, t0=None, t1=None):
+        """All rows with t0 <= ts < t1 as one structured array"""
+        t0 = -np.inf if t0 is None else t0
+        t1 = np.inf if t1 is None else t1
+        parts = []
+        for entry in self.index:
+            if entry['ts_max'] < t0 or entry['ts_min'] >= t1:
+                continue
+            chunk = self._chunk(entry)
+            lo, hi = np.searchsorted(chunk['ts'], [t0, t1], side='left')
+            if hi > lo:
+                parts.append(chunk[lo:hi])
+        if not parts:
+            return np.empty(0, dtype=DETECTION_DTYPE)
+        return np.concatenate(parts)
+
+    def __len__(self):
+        return sum(e['rows'] for e in self.index)
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
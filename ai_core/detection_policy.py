@@ -0,0 +1,144 @@
+"""
+Hot-reloadable detection policy.
+
+NAME_MAP, CONFIDENCE_THRESHOLDS, CONFIRMATION_FRAMES, PATIENCE_FRAMES and
+the alert cooldown live in detection_policy.yaml. A watcher thread checks
+the file's mtime, validates and compiles a new policy off the detection
+thread and publishes it with a single reference swap; the detection loop
+picks it up between frames. No model reload, no camera reopen.
+
+A broken edit is logged and ignored: the last good policy stays active.
+"""
+
+import os
+import logging
+import threading
+
+import yaml
+
+# --- CONFIGURATION ---
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detection_policy.yaml")
+CHECK_INTERVAL = 1.0      # Seconds between mtime checks
+
+
+def _is_number(value, integer=False):
+    """int/float but not bool: YAML turns `yes`/`no` into True/False, which isinstance(.., int) accepts"""
+    return not isinstance(value, bool) and isinstance(value, int if integer else (int, float))
+
+
+class DetectionPolicy:
+    """Validated, compiled policy. Treat as immutable: swap, don't edit."""
+    def __init__(self, name_map, thresholds, confirmation_frames, patience_frames, alert_cooldown, version=0):
+        self.name_map = dict(name_map)
+        self.thresholds = dict(thresholds)
+        self.confirmation_frames = confirmation_frames
+        self.patience_frames = patience_frames
+        self.alert_cooldown = alert_cooldown
+        self.version = version
+
+        # One dict lookup per detection: {raw_name: (threshold, final_name)}
+        self.rules = {
+            raw: (thr, self.name_map.get(raw, raw.upper()))
+            for raw, thr in self.thresholds.items()
+        }
+        self._arrays = {}
+
+    def map_name(self, raw_name, conf):
+        """Final threat name for a raw detection, or None if it is filtered out"""
+        rule = self.rules.get(raw_name)
+        if rule is None or conf < rule[0]:
+            return None
+        return rule[1]
+
+    def threshold_array(self, model_names):
+        """
+        Per-class-id thresholds for vectorized filtering (inf = ignore class).
+
+        Args:
+            model_names (dict): {class_id: raw_name}, i.e. model.names
+        """
+        import numpy as np
+        key = tuple(sorted(model_names.items()))
+        if key not in self._arrays:
+            arr = np.full(max(model_names) + 1, np.inf, dtype=np.float32)
+            for cls_id, raw in model_names.items():
+                if raw in self.rules:
+                    arr[cls_id] = self.rules[raw][0]
+            self._arrays[key] = arr
+        return self._arrays[key]
+
+    @classmethod
+    def from_dict(cls, data, version=0):
+        """Validates a parsed policy file; raises ValueError on any problem"""
+        if not isinstance(data, dict):
+            raise ValueError("policy must be a mapping")
+
+        name_map = data.get('name_map', {})
+        thresholds = data.get('confidence_thresholds')
+        if not isinstance(name_map, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in name_map.items()):
+            raise ValueError("name_map must map class names to threat names")
+        if not isinstance(thresholds, dict) or not thresholds:
+            raise ValueError("confidence_thresholds must be a non-empty mapping")
+        for raw, thr in thresholds.items():
+            if not _is_number(thr) or not 0.0 <= thr <= 1.0:
+                raise ValueError(f"threshold for '{raw}' must be between 0 and 1, got {thr!r}")
+
+        confirmation = data.get('confirmation_frames')
+        patience = data.get('patience_frames')
+        cooldown = data.get('alert_cooldown')
+        if not _is_number(confirmation, integer=True) or confirmation < 1:
+            raise ValueError("confirmation_frames must be a positive integer")
+        if not _is_number(patience, integer=True) or patience < confirmation:
+            raise ValueError("patience_frames must be an integer >= confirmation_frames")
+        if not _is_number(cooldown) or cooldown < 0:
+            raise ValueError("alert_cooldown must be a non-negative number of seconds")
+
+        return cls(name_map, {k: float(v) for k, v in thresholds.items()},
+                   confirmation, patience, float(cooldown), version)
+
+    @classmethod
+    def load(cls, path, version=0):
+        with open(path) as f:
+            return cls.from_dict(yaml.safe_load(f), version)
+
+
+class PolicyWatcher:
+    """Reloads the policy file in the background; `current` is always a valid policy"""
+    def __init__(self, path=POLICY_FILE, default=None, interval=CHECK_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.mtime = None
+        self.current = default
+        self.stop_event = threading.Event()
+
+        self._check()
+        if self.current is None:
+            raise FileNotFoundError(f"No valid detection policy at {path}")
+        self.thread = threading.Thread(target=self._loop, name="policy-watcher", daemon=True)
+        self.thread.start()
+
+    def _check(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.mtime:
+            return
+        self.mtime = mtime
+        version = (self.current.version + 1) if self.current else 1
+        try:
+            policy = DetectionPolicy.load(self.path, version)
+        except Exception as e:
+            logging.error(f"❌ Policy file rejected, keeping the previous one: {e}")
+            return
+        # Single reference assignment: readers see the old or the new policy, never a mix
+        self.current = policy
+        logging.info(f"🔄 Detection policy v{version} loaded from {self.path}")
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self._check()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
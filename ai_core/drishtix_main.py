@@ -1,19 +1,49 @@
 import cv2
 import time
+import asyncio
 import logging
 import threading
+import argparse
+import signal
 import os
+import sys
 from datetime import datetime
 from ultralytics import YOLO
-from whatsapp_sender import send_alert_with_image
+
+# Flat imports below also work when loaded as ai_core.drishtix_main (console script)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+from power_scheduler import PowerScheduler, estimate_distance
+from pipeline import Pipeline, BLOCK, DROP_OLDEST
+from inference_pool import InferencePool, MAX_INFLIGHT_PER_WORKER
+from clip_recorder import ClipRecorder
+from alert_media import pick_variant
+from event_dedup import EventDeduplicator
+from evidence_store import EvidenceStore, RetentionManager
+from detection_log import DetectionLog
+from detection_policy import DetectionPolicy, PolicyWatcher
+from mjpeg_capture import MJPEGCapture
+from alert_bus import AlertPublisher
+from keyframe_tracker import KeyframeTracker
+from alert_outbox import AlertOutbox, PermanentError
+from frame_pool import FramePool, FrameBuffer, Letterbox
+from perimeter import Perimeter, PERIMETER_FILE
+from species_classifier import SpeciesClassifier, SpeciesCache
+from camera_watchdog import SupervisedCamera
 
 # --- CONFIGURATION (THE "BRAIN") ---
 # We use the standard model because it's stable and fast
 MODEL_PATH = "yolov8n.pt"
 CAMERA_INDEX = 0
+CAPTURE_BACKEND = "opencv"          # "mjpeg": reduced-scale JPEG decode (see mjpeg_capture.py)
+MJPEG_CAMERA_RESOLUTION = (1280, 720)  # Camera mode for the mjpeg backend (evidence resolution)
+CAMERA_WATCHDOG = True              # Live cameras reconnect in the background (see camera_watchdog.py)
+LIVE_PREFIXES = ("rtsp://", "http://", "https://")   # Camera URLs that are live streams, not files
 
 # --- THE HACKATHON "CHEAT SHEET" ---
 # This maps what the AI *sees* to what you *want* it to be.
+# NOTE: these are the fallback defaults. The live values are read from
+# detection_policy.yaml and can be edited while the system runs.
 NAME_MAP = {
     # REAL ANIMALS (If the model is smart enough)
     "elephant": "ELEPHANT",
@@ -50,15 +80,74 @@ CONFIDENCE_THRESHOLDS = {
 CONFIRMATION_FRAMES = 5  # Must see object for 5 frames (removes flickering)
 PATIENCE_FRAMES = 10     # How long to remember an object if it disappears
 
+# --- RUNTIME ---
+PIPELINE_MODE = False    # True: asyncio stages (see pipeline.py) instead of one loop
+INFERENCE_WORKERS = 0    # >0: spread inference over N processes (see inference_pool.py)
+DRAIN_TIMEOUT = 10       # Seconds to wait for in-flight worker results at shutdown
+DISPLAY = True           # False: headless service, no GUI calls at all (`drishtix --headless`)
+ALERT_DRAIN_TIMEOUT = 30 # Seconds to wait for queued alerts on shutdown (the rest is kept on disk)
+
+# --- TEMPORAL REUSE ---
+KEYFRAME_TRACKING = True # Model on keyframes only, optical flow in between (see keyframe_tracker.py)
+KEYFRAME_INTERVAL = 5    # Model at least every N frames
+KEYFRAME_CONF_MARGIN = 0.10  # Detections this close to their threshold are re-checked next frame
+
+# --- CASCADE ---
+CASCADE = False          # Detector finds animals, a classifier names confirmed ones (see species_classifier.py)
+
+# --- MEMORY ---
+POOLED_FRAMES = True     # Capture into reused buffers, model input built in place (see frame_pool.py)
+MODEL_IMGSZ = 640        # Model input size for the preallocated letterbox
+
+# --- POWER SAVING ---
+POWER_SAVING = True      # Duty-cycle FPS/model/resolution (see power_scheduler.py)
+POWER_PROFILES = {
+    "IDLE":    {'fps': 1,  'model': None,       'resolution': (320, 240)},  # Motion check only
+    "WATCH":   {'fps': 5,  'model': MODEL_PATH, 'resolution': (640, 480)},
+    "ENGAGED": {'fps': 15, 'model': MODEL_PATH, 'resolution': (640, 480)},
+}
+
+# --- DEDUPLICATION ---
+# Same animal, same scene -> one alert (see event_dedup.py). When on, the
+# global cooldown is not used, so a genuinely new arrival alerts at once.
+DEDUPLICATE_ALERTS = True
+DEDUP_MAX_HAMMING = 10   # Lower = stricter "same scene" match
+
+# --- LAN ALERTS ---
+LAN_ALERTS = True        # Multicast every alert to local sirens / receivers (see alert_bus.py)
+
+# --- EVIDENCE CLIPS ---
+RECORD_CLIPS = True      # Save a pre/post-event MP4 next to each evidence JPEG
+
+# --- EVIDENCE RETENTION ---
+EVIDENCE_QUOTA_MB = 1024 # breached/ is kept under this (thumbnails, then archives)
+
+# --- TELEMETRY ---
+LOG_DETECTIONS = True    # Every raw detection -> detections/*.npy (see detection_log.py)
+
+DEFAULT_POLICY = DetectionPolicy(NAME_MAP, CONFIDENCE_THRESHOLDS, CONFIRMATION_FRAMES,
+                                 PATIENCE_FRAMES, alert_cooldown=60)
+
 # --- SETUP LOGGING ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
 class ThreatTracker:
     """Filters out noise/glitches"""
-    def __init__(self):
+    def __init__(self, confirmation_frames=CONFIRMATION_FRAMES, patience_frames=PATIENCE_FRAMES):
+        self.confirmation_frames = confirmation_frames
+        self.patience_frames = patience_frames
         self.active_threats = {} # {name: count}
+        self.track_ids = {}      # {name: id}, stable while the name stays active
+        self.next_track_id = 1
 
-    def update(self, raw_detections):
+    def update(self, raw_detections, model_hit=True):
+        """
+        Confirmed threats after this frame.
+
+        model_hit=False: the boxes were propagated by optical flow, not
+        detected. They keep known threats alive and in place, but only the
+        model's own detections count toward confirmation.
+        """
         # 1. Decay missing objects
         current_names = [d[0] for d in raw_detections]
         to_remove = []
@@ -67,79 +156,509 @@ class ThreatTracker:
                 self.active_threats[name] -= 1
                 if self.active_threats[name] <= 0:
                     to_remove.append(name)
-        for k in to_remove: del self.active_threats[k]
+        for k in to_remove:
+            del self.active_threats[k]
+            self.track_ids.pop(k, None)
 
         confirmed = []
         # 2. Increment present objects
         for name, conf, box in raw_detections:
+            if not model_hit:
+                if name in self.active_threats and self.active_threats[name] >= self.confirmation_frames:
+                    confirmed.append((name, conf, box))
+                continue
             if name not in self.active_threats:
                 self.active_threats[name] = 1
+                self.track_ids[name] = self.next_track_id
+                self.next_track_id += 1
             else:
                 self.active_threats[name] += 1
 
             # Cap counter
-            self.active_threats[name] = min(self.active_threats[name], PATIENCE_FRAMES)
+            self.active_threats[name] = min(self.active_threats[name], self.patience_frames)
 
             # 3. Confirm
-            if self.active_threats[name] >= CONFIRMATION_FRAMES:
+            if self.active_threats[name] >= self.confirmation_frames:
                 confirmed.append((name, conf, box))
 
         return confirmed
 
-def send_whatsapp_with_image_thread(animal_name, image_path):
-    """Sends WhatsApp alert with image in background thread"""
+def load_whatsapp():
+    """
+    Imports the WhatsApp sender on demand. pywhatkit / pyautogui need a
+    display, so on a headless server this fails and the channel is skipped.
+    """
+    global send_alert_with_image
+    try:
+        from whatsapp_sender import send_alert_with_image
+    except Exception as e:
+        logging.warning(f"⚠️ WhatsApp alerts disabled (sender unavailable: {e})")
+        return False
+    return True
+
+def send_whatsapp_with_image_thread(animal_name, image_path, box=None):
+    """Sends WhatsApp alert with image; returns True once delivered"""
     try:
         phone_no = "+918100661171"  # YOUR NUMBER
         logging.info(f"🚀 Triggering WhatsApp for {animal_name}...")
-        
+
+        # Smallest encoding that fits the link, prepared once per alert
+        image_path = pick_variant(image_path, channel="whatsapp", box=box)
         success = send_alert_with_image(phone_no, animal_name, image_path)
         
         if success:
             logging.info("✅ WhatsApp alert with image sent successfully!")
         else:
             logging.error("❌ Failed to send WhatsApp alert with image")
+        return success
             
     except Exception as e:
         logging.error(f"WhatsApp Error: {e}")
+        return False
+
+def deliver_whatsapp(payload):
+    """Outbox handler for the "whatsapp" channel"""
+    if not os.path.exists(payload['image']):
+        raise PermanentError(f"evidence {payload['image']} is gone")
+    return send_whatsapp_with_image_thread(payload['animal'], payload['image'], payload.get('box'))
+
+def scale_box(box, scale):
+    """Box in reduced-frame coordinates -> full-resolution coordinates"""
+    if scale == 1.0:
+        return box
+    return tuple(int(v * scale) for v in box)
 
 class DrishtiXSystem:
-    def __init__(self):
+    def __init__(self, power_saving=POWER_SAVING, display=DISPLAY, camera_index=CAMERA_INDEX,
+                 capture_backend=CAPTURE_BACKEND, source=None, cascade=CASCADE):
         logging.info("Initializing DrishtiX Ultimate...")
+        self.display = display
+        self.camera_index = camera_index
+        self.camera_id = camera_index if isinstance(camera_index, int) else 0   # Numeric id for logs / bus
+        self.capture_backend = capture_backend
+        self.stop_event = threading.Event()   # Set by 'q', SIGTERM or SIGINT
+        self.pipeline = None
         
         # Create breached folder
         self.breached_folder = os.path.abspath("breached")
         os.makedirs(self.breached_folder, exist_ok=True)
         logging.info(f"📁 Breach evidence folder: {self.breached_folder}")
+        self.evidence = EvidenceStore(self.breached_folder)
+        self.retention = RetentionManager(self.evidence, quota_mb=EVIDENCE_QUOTA_MB)
+        self.retention.start()
 
         # Load Model
-        try:
-            self.model = YOLO(MODEL_PATH)
-            logging.info("✅ Model Loaded.")
-        except:
-            logging.info("⬇️ Downloading model...")
-            self.model = YOLO("yolov8n.pt")
+        self.models = {}
+        self.model = self.get_model(MODEL_PATH)
+
+        # Live-tunable thresholds / name map / confirmation (detection_policy.yaml)
+        self.policy_watcher = PolicyWatcher(default=DEFAULT_POLICY)
+        self.policy = self.policy_watcher.current
+
+        self.tracker = ThreatTracker(self.policy.confirmation_frames, self.policy.patience_frames)
+
+        # Zones / tripwires: only animals inside the fence are breaches (perimeter.yaml)
+        self.perimeter = Perimeter.load(PERIMETER_FILE, self.camera_id)
+
+        # Second stage: species from a classifier, a few runs per track
+        self.species = SpeciesCache(SpeciesClassifier()) if cascade else None
+        self.label_tracks = {}   # {(species, box): track id} for tracks the classifier renamed
+
+        # No per-frame allocations for capture and model input
+        self.frames = FramePool() if POOLED_FRAMES else None
+        self.letterbox = Letterbox(MODEL_IMGSZ) if POOLED_FRAMES else None
+
+        # Duty cycling (idle / watch / engaged) for unattended nodes
+        self.power = PowerScheduler(POWER_PROFILES) if power_saving else None
+        self.capture_profile_pending = False
+
+        self.cap = source if source is not None else self.open_camera()   # Any VideoCapture look-alike
+        self.supervised = isinstance(self.cap, SupervisedCamera)
+        if self.power:
+            self.apply_power_profile()
+
+        # Skip the model between keyframes
+        self.keyframes = KeyframeTracker(KEYFRAME_INTERVAL) if KEYFRAME_TRACKING else None
+
+        # Pre-event ring buffer -> MP4 clip on alert
+        self.recorder = ClipRecorder(self.breached_folder) if RECORD_CLIPS else None
+
+        # Per-frame detection telemetry
+        self.detection_log = DetectionLog() if LOG_DETECTIONS else None
+        self.frame_index = 0
 
-        self.tracker = ThreatTracker()
-        self.cap = cv2.VideoCapture(CAMERA_INDEX)
+        # Repeat-event suppression (content-aware alternative to the cooldown)
+        self.dedup = EventDeduplicator(max_hamming=DEDUP_MAX_HAMMING) if DEDUPLICATE_ALERTS else None
+
+        # Local sirens first: no cloud round-trip
+        self.alert_bus = AlertPublisher() if LAN_ALERTS else None
+
+        # Remote alerts survive uplink outages and restarts (see alert_outbox.py)
+        self.outbox = AlertOutbox("drishtix")
+        self.whatsapp = load_whatsapp()
+        if self.whatsapp:
+            self.outbox.register("whatsapp", deliver_whatsapp)
 
         # Alert Cooldown (Don't spam WhatsApp)
         self.last_alert_time = 0
-        self.alert_cooldown = 60 # Seconds
+        self.alert_cooldown = self.policy.alert_cooldown # Seconds
+
+    def get_model(self, path):
+        """Loads each model file once and reuses it"""
+        if path not in self.models:
+            try:
+                self.models[path] = YOLO(path)
+                logging.info(f"✅ Model Loaded: {path}")
+            except:
+                logging.info("⬇️ Downloading model...")
+                self.models[path] = YOLO("yolov8n.pt")
+        return self.models[path]
+
+    def open_capture(self):
+        """cv2.VideoCapture, or the reduced-scale MJPEG backend (camera, URL or .mjpg file)"""
+        if self.capture_backend == "mjpeg":
+            cap = MJPEGCapture(self.camera_index)
+            width, height = MJPEG_CAMERA_RESOLUTION
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            logging.info(f"🎞️ MJPEG capture: {self.camera_index}")
+            return cap
+        return cv2.VideoCapture(self.camera_index)
+
+    def open_camera(self):
+        """The camera; a live one runs under the watchdog (files just end)"""
+        live = isinstance(self.camera_index, int) or str(self.camera_index).startswith(LIVE_PREFIXES)
+        if not (CAMERA_WATCHDOG and live):
+            return self.open_capture()
+        return SupervisedCamera(self.open_capture, name=f"camera {self.camera_index}",
+                                configure=self.configure_capture, pool=self.frames)
+
+    @property
+    def capture(self):
+        """The capture object itself (inside the watchdog, None while it reconnects)"""
+        return self.cap.capture if self.supervised else self.cap
+
+    def configure_capture(self, cap):
+        """Settings set() can't carry over a reconnect: the MJPEG decode width"""
+        if self.power and isinstance(cap, MJPEGCapture):
+            cap.set_target_width(self.power.profile['resolution'][0])
+
+    def apply_power_profile(self, capture=True):
+        """
+        Switches model and capture resolution to the current power state.
+        capture=False: only flags the capture change, for the thread that reads the camera.
+        """
+        profile = self.power.profile
+        if profile['model']:
+            self.model = self.get_model(profile['model'])
+        if capture:
+            self.apply_capture_profile()
+        else:
+            self.capture_profile_pending = True
+
+    def apply_capture_profile(self):
+        """Capture resolution (or MJPEG decode width) of the current power state"""
+        self.capture_profile_pending = False
+        width, height = self.power.profile['resolution']
+        mjpeg = self.capture_backend == "mjpeg" if self.supervised else isinstance(self.cap, MJPEGCapture)
+        if mjpeg:
+            # Camera stays at full resolution for evidence; only the decode shrinks
+            self.configure_capture(self.capture)
+            return
+        # Under the watchdog these are also re-applied after every reconnect
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
     
     def get_next_image_path(self, animal_name):
         """Generate sequential image path in breached folder"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        existing_files = [f for f in os.listdir(self.breached_folder) if f.endswith('.jpg')]
-        sequence = len(existing_files) + 1
-        filename = f"{sequence:04d}_{animal_name.replace(' ', '_')}_{timestamp}.jpg"
-        return os.path.join(self.breached_folder, filename)
+        return self.evidence.next_path(animal_name)
+
+    def refresh_policy(self):
+        """Swaps in a newly loaded policy; called between frames only"""
+        policy = self.policy_watcher.current
+        if policy is self.policy:
+            return
+        self.policy = policy
+        self.tracker.confirmation_frames = policy.confirmation_frames
+        self.tracker.patience_frames = policy.patience_frames
+        self.alert_cooldown = policy.alert_cooldown
+
+    def map_name(self, raw_name, conf):
+        """Final threat name for a raw detection, or None if it is filtered out"""
+        # Filter + RENAME (The Proxy Trick), via the compiled per-class rules
+        return self.policy.map_name(raw_name, conf)
+
+    def apply_policy(self, detections):
+        """[(raw_name, conf, box)] -> [(final_name, conf, box)] for the classes we care about"""
+        raw_detections = []
+        for raw_name, conf, box in detections:
+            final_name = self.map_name(raw_name, conf)
+            if final_name:
+                raw_detections.append((final_name, conf, box))
+        return raw_detections
+
+    def model_view(self, frame):
+        """Part of the frame the model sees (the perimeter's region) and its offset"""
+        roi = self.perimeter.roi(frame.shape) if self.perimeter else None
+        if roi is None:
+            return frame, (0, 0)
+        x1, y1, x2, y2 = roi
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    @staticmethod
+    def offset_detections(detections, offset):
+        """Boxes from model-view coordinates back to the full frame"""
+        ox, oy = offset
+        if not ox and not oy:
+            return detections
+        return [(name, conf, (x1 + ox, y1 + oy, x2 + ox, y2 + oy)) for name, conf, (x1, y1, x2, y2) in detections]
+
+    def infer(self, frame):
+        """Raw model output [(raw_name, conf, box)] and the inference time in ms"""
+        t0 = time.perf_counter()
+        frame, offset = self.model_view(frame)
+        if self.letterbox:
+            # Preprocessed into the reused input tensor; boxes come back in its coordinates
+            results = self.model(self.letterbox.tensor(frame), stream=True, verbose=False)
+        else:
+            results = self.model(frame, stream=True, verbose=False)
+        detections = []
+
+        for r in results:
+            for box in r.boxes:
+                conf = float(box.conf[0])
+                cls_id = int(box.cls[0])
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                if self.letterbox:
+                    x1, y1, x2, y2 = self.letterbox.unmap((x1, y1, x2, y2))
+                detections.append((self.model.names[cls_id], conf, (x1, y1, x2, y2)))
+
+        return self.offset_detections(detections, offset), (time.perf_counter() - t0) * 1000
+
+    def detect_or_track(self, frame):
+        """Raw detections for a frame: the model on keyframes, optical flow in between"""
+        if self.keyframes:
+            detections = self.keyframes.propagate(frame)
+            if detections is not None:
+                return detections, 0.0, False
+
+        detections, infer_ms = self.infer(frame)
+        if self.keyframes:
+            relevant = [d for d in detections if self.map_name(d[0], d[1])]
+            uncertain = any(conf < self.policy.rules[raw][0] + KEYFRAME_CONF_MARGIN for raw, conf, _ in relevant)
+            # Only model hits confirm: keep running the model until every threat in view is confirmed
+            unconfirmed = any(self.tracker.active_threats.get(self.map_name(raw, conf), 0) + 1
+                              < self.tracker.confirmation_frames for raw, conf, _ in relevant)
+            self.keyframes.keyframe(frame, relevant, uncertain or unconfirmed)
+        return detections, infer_ms, True
+
+    def idle_frame(self):
+        """The model was skipped for this frame (power saving)"""
+        if self.keyframes:
+            self.keyframes.reset()
+        return [], 0.0, True
+
+    def detect(self, frame):
+        """Runs the model and returns [(final_name, conf, box)] that pass the thresholds"""
+        return self.apply_policy(self.infer(frame)[0])
+
+    def confirm(self, frame, raw_detections, model_hit=True):
+        """Tracker confirmation; with a perimeter, only confirmed animals that breach it"""
+        confirmed_threats = self.tracker.update(raw_detections, model_hit)
+        if self.perimeter:
+            confirmed_threats = self.perimeter.check(confirmed_threats, self.tracker.track_ids, frame.shape,
+                                                       raw_detections)
+        if self.species:
+            confirmed_threats = self.classify(frame, confirmed_threats)
+        return confirmed_threats
+
+    def classify(self, frame, confirmed_threats):
+        """Cascade: the classifier's species for each confirmed track (cached per track)"""
+        self.species.forget(set(self.tracker.track_ids.values()))
+        self.label_tracks = {}
+        labelled = []
+        for name, conf, box in confirmed_threats:
+            track_id = self.tracker.track_ids.get(name, -1)
+            verdict = self.species.label(track_id, frame, box)
+            if verdict is None:
+                labelled.append((name, conf, box))        # Undecided: the detector's label for now
+            elif verdict[0]:
+                labelled.append((verdict[0], verdict[1], box))
+                self.label_tracks[verdict[0], tuple(box)] = track_id
+            # else: confidently none of our species (e.g. a village dog) -> no alert
+        return labelled
+
+    def track_id(self, name, box):
+        """Track id of a confirmed threat (-1 if unknown)"""
+        return self.label_tracks.get((name, tuple(box)), self.tracker.track_ids.get(name, -1))
+
+    def log_detections(self, detections, confirmed_threats, infer_ms, model_hit=True):
+        """Appends this frame's raw detections to the telemetry log"""
+        self.frame_index += 1
+        if not self.detection_log or not model_hit:
+            return          # Boxes propagated by the keyframe tracker aren't model output
+        confirmed_names = {name for name, _, _ in confirmed_threats}
+        rows = []
+        for raw_name, conf, box in detections:
+            final_name = self.map_name(raw_name, conf)
+            track_id = self.tracker.track_ids.get(final_name, -1)
+            rows.append((raw_name, conf, box, track_id, final_name in confirmed_names))
+        self.detection_log.log_frame(time.time(), self.frame_index, self.camera_id, rows, infer_ms)
+
+    def draw_threats(self, frame, confirmed_threats):
+        """Draws boxes and labels for confirmed threats"""
+        if self.perimeter:
+            self.perimeter.draw(frame)
+        for name, conf, (x1, y1, x2, y2) in confirmed_threats:
+            # Draw Box
+            color = (0, 0, 255) # Red
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+
+            # Draw Label
+            label = f"{name} {int(conf*100)}%"
+            (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+            cv2.rectangle(frame, (x1, y1-30), (x1+w, y1), color, -1)
+            cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+
+    def evidence_frame(self, frame, confirmed_threats):
+        """
+        Image to save as evidence, and the factor from frame to image coordinates.
+
+        With the MJPEG backend the frame was decoded at reduced scale; the
+        full-resolution decode is done here, only for frames that alert.
+        """
+        capture = self.capture
+        full = capture.full_frame(frame) if isinstance(capture, MJPEGCapture) else None
+        if full is None:
+            return frame, 1.0
+        scale = full.shape[1] / frame.shape[1]
+        self.draw_threats(full, [(name, conf, scale_box(box, scale)) for name, conf, box in confirmed_threats])
+        return full, scale
+
+    def raise_alerts(self, frame, confirmed_threats):
+        """Saves evidence and fires the (cooldown-limited) WhatsApp alert"""
+        evidence = None
+        for name, conf, box in confirmed_threats:
+            # TRIGGER WHATSAPP (With Cooldown, or once per distinct event)
+            curr_time = time.time()
+            if self.dedup:
+                should_alert = not self.dedup.is_repeat(name, frame, box, now=curr_time)
+            else:
+                should_alert = (curr_time - self.last_alert_time) > self.alert_cooldown
+            if should_alert:
+                if self.alert_bus:
+                    # The LAN siren is best effort: it must never hold up evidence and the remote alert
+                    try:
+                        self.alert_bus.publish(name, camera=self.camera_id, track=self.track_id(name, box),
+                                               ts=curr_time, conf=conf)
+                    except Exception as e:
+                        logging.error(f"❌ LAN alert failed: {e}")
+
+                # Save the current frame as evidence with sequential naming
+                if evidence is None:
+                    evidence, scale = self.evidence_frame(frame, confirmed_threats)
+                box = scale_box(box, scale)
+                evidence_path = self.get_next_image_path(name)
+                cv2.imwrite(evidence_path, evidence)
+                self.evidence.add(evidence_path, name, box=box, conf=conf, ts=curr_time)
+                logging.info(f"📸 Evidence saved: {evidence_path}")
+                if self.recorder:
+                    self.recorder.trigger(os.path.splitext(evidence_path)[0] + ".mp4")
+                
+                # Durable queue, delivered in the background so video doesn't freeze
+                if self.whatsapp:
+                    self.outbox.enqueue("whatsapp", {'animal': name, 'image': evidence_path, 'box': list(box)},
+                                        alert_id=os.path.basename(evidence_path))
+                    logging.info(f"📨 Alert queued for {name}")
+                self.last_alert_time = curr_time
+
+    def handle_threats(self, frame, confirmed_threats, buffer=None):
+        """Draws confirmed threats and fires the alert"""
+        self.draw_threats(frame, confirmed_threats)
+        self.record(frame, buffer)
+        self.raise_alerts(frame, confirmed_threats)
+
+    def record(self, frame, buffer=None):
+        """Passes the (annotated) frame to the clip ring buffer; costs one append"""
+        if self.recorder:
+            # A pooled frame stays out of the pool until the recorder has encoded it
+            self.recorder.push(frame, done=buffer.retain().release if buffer else None)
+
+    def read_frame(self):
+        """Next frame as a FrameBuffer (release() it when done), or None"""
+        if self.supervised:
+            # None: no frame within the read timeout, the camera is being reconnected
+            item = self.cap.read_buffer()
+            return FrameBuffer(item) if item is not None and not self.frames else item
+        if self.frames:
+            return self.frames.read(self.cap)
+        ret, frame = self.cap.read()
+        return FrameBuffer(frame) if ret else None
+
+    def show(self, frame):
+        """Optional display sink; 'q' stops the system. No-op when headless."""
+        if not self.display:
+            return
+        cv2.imshow("DrishtiX Ultimate", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.stop()
+
+    def stop(self, *_):
+        """Asks the running loop to finish; safe to call from a signal handler"""
+        self.stop_event.set()
+        if self.pipeline:
+            self.pipeline.stop()
+
+    def install_signal_handlers(self):
+        """SIGTERM (systemd stop) and SIGINT (Ctrl+C) -> graceful shutdown"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.stop)
+
+    def drain_alerts(self, timeout=ALERT_DRAIN_TIMEOUT):
+        """Gives queued alerts time to go out; undelivered ones are retried on next start"""
+        if self.outbox.stats()['pending']:
+            logging.info(f"⏳ Waiting for {self.outbox.stats()['pending']} alert(s) to finish...")
+        self.outbox.close(timeout)
+
+    def release(self):
+        """Frees the camera and window, drains alerts and flushes clips / logs"""
+        if self.supervised:
+            logging.info(f"📷 Camera health: {self.cap.stats()}")
+        self.cap.release()
+        if self.display:
+            cv2.destroyAllWindows()
+        self.drain_alerts()
+        if self.alert_bus:
+            self.alert_bus.close()
+        if self.recorder:
+            self.recorder.close()
+        self.retention.stop()
+        self.policy_watcher.stop()
+        if self.detection_log:
+            self.detection_log.close()
+
+    def update_power(self, frame=None, detections=None, distance_cm=None, capture=True):
+        """Feeds the power scheduler; returns False while the model should stay off"""
+        if not self.power:
+            return True
+        if self.power.observe(frame=frame, distance_cm=distance_cm, detections=detections):
+            self.apply_power_profile(capture)
+        return self.power.profile['model'] is not None
+
+    def report_detections(self, frame, detections, raw_detections, capture=True):
+        """
+        Model output -> power scheduler: threats engage; any box, even one below
+        the thresholds, counts as an animal at the distance its size suggests.
+        """
+        return self.update_power(detections=raw_detections, distance_cm=estimate_distance(detections, frame.shape),
+                                 capture=capture)
 
     def run(self):
         if not self.cap.isOpened():
             logging.error("❌ Camera not found.")
             return
 
-        logging.info("🚀 SYSTEM ONLINE. Press 'Q' to exit.")
+        logging.info("🚀 SYSTEM ONLINE. " + ("Press 'Q' to exit." if self.display else "Headless, stop with SIGTERM/Ctrl+C."))
         print("\n--- HACKATHON CHEAT SHEET ---")
         print(" Show CAT         -> Detects TIGER")
         print(" Show DOG/PIG     -> Detects WILD BOAR")
@@ -147,64 +666,201 @@ class DrishtiXSystem:
         print(" Show ELEPHANT    -> Detects ELEPHANT")
         print("-----------------------------\n")
 
-        while True:
-            ret, frame = self.cap.read()
-            if not ret: break
-
-            # 1. AI Inference
-            results = self.model(frame, stream=True, verbose=False)
-            raw_detections = []
+        while not self.stop_event.is_set():
+            if self.power:
+                self.power.throttle()
 
-            for r in results:
-                for box in r.boxes:
-                    conf = float(box.conf[0])
-                    cls_id = int(box.cls[0])
-                    raw_name = self.model.names[cls_id]
+            buffer = self.read_frame()
+            if buffer is None:
+                if self.supervised: continue   # Camera down: keep serving while it reconnects
+                break
+            frame = buffer.array
+            self.refresh_policy()
 
-                    # Filter: Do we care about this object?
-                    if raw_name in CONFIDENCE_THRESHOLDS:
-                        if conf >= CONFIDENCE_THRESHOLDS[raw_name]:
-                            # RENAME (The Proxy Trick)
-                            final_name = NAME_MAP.get(raw_name, raw_name.upper())
+            # 0. Power state: skip the model entirely while idle
+            run_model = self.update_power(frame=frame)
 
-                            x1, y1, x2, y2 = map(int, box.xyxy[0])
-                            raw_detections.append((final_name, conf, (x1, y1, x2, y2)))
+            # 1. AI Inference (or tracking between keyframes)
+            detections, infer_ms, model_hit = self.detect_or_track(frame) if run_model else self.idle_frame()
+            raw_detections = self.apply_policy(detections)
+            self.report_detections(frame, detections, raw_detections)
 
             # 2. Tracking (Stability)
-            confirmed_threats = self.tracker.update(raw_detections)
+            confirmed_threats = self.confirm(frame, raw_detections, model_hit)
+            self.log_detections(detections, confirmed_threats, infer_ms, model_hit)
 
             # 3. Visualization & Alerts
-            for name, conf, (x1, y1, x2, y2) in confirmed_threats:
-                # Draw Box
-                color = (0, 0, 255) # Red
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
-
-                # Draw Label
-                label = f"{name} {int(conf*100)}%"
-                (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-                cv2.rectangle(frame, (x1, y1-30), (x1+w, y1), color, -1)
-                cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
-
-                # TRIGGER WHATSAPP (With Cooldown)
-                curr_time = time.time()
-                if (curr_time - self.last_alert_time) > self.alert_cooldown:
-                    # Save the current frame as evidence with sequential naming
-                    evidence_path = self.get_next_image_path(name)
-                    cv2.imwrite(evidence_path, frame)
-                    logging.info(f"📸 Evidence saved: {evidence_path}")
-                    
-                    # Run in thread so video doesn't freeze
-                    t = threading.Thread(target=send_whatsapp_with_image_thread, args=(name, evidence_path))
-                    t.start()
-                    self.last_alert_time = curr_time
-                    logging.info(f"📨 Alert sent for {name}")
-
-            cv2.imshow("DrishtiX Ultimate", frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'): break
+            self.handle_threats(frame, confirmed_threats, buffer)
+            self.show(frame)
+            buffer.release()
+
+        logging.info("🛑 Shutting down...")
+        if self.power:
+            logging.info(f"🔋 Time per power state: {self.power.metrics()['percent']}")
+        if self.keyframes:
+            logging.info(f"🎯 Model ran on {self.keyframes.stats()['model_ratio'] * 100:.0f}% of frames")
+        if self.frames:
+            logging.info(f"🧱 Frame buffers: {self.frames.stats()}")
+        if self.species:
+            logging.info(f"🧬 Species classifier: {self.species.stats()}")
+        self.release()
+
+    # --- WORKER POOL MODE ---
+    def run_workers(self, workers=INFERENCE_WORKERS):
+        """Same loop as run(), but inference is spread over worker processes"""
+        if not self.cap.isOpened():
+            logging.error("❌ Camera not found.")
+            return
 
-        self.cap.release()
-        cv2.destroyAllWindows()
+        pool = InferencePool(MODEL_PATH, workers=workers)
+        pending = {}   # {seq: (FrameBuffer, offset)} waiting for its detections (and until pickled)
+        max_inflight = pool.n_workers * MAX_INFLIGHT_PER_WORKER
+        logging.info("🚀 SYSTEM ONLINE (worker pool).")
+
+        try:
+            while not self.stop_event.is_set():
+                # Backpressure: wait for results rather than holding more frames than the workers take
+                while pool.inflight >= max_inflight and not self.stop_event.is_set():
+                    self.handle_results(pool.results(timeout=0.1), pending)
+
+                buffer = self.read_frame()
+                if buffer is not None:
+                    view, offset = self.model_view(buffer.array)
+                    pending[pool.submit(view)] = (buffer, offset)
+                elif not self.supervised:
+                    break
+
+                self.handle_results(pool.results(), pending)
+        finally:
+            # Frames already submitted still get tracked and alerted on, then go back to the pool
+            try:
+                self.handle_results(pool.drain(timeout=DRAIN_TIMEOUT), pending)
+            finally:
+                for buffer, _ in pending.values():
+                    buffer.release()
+                pool.close()
+                self.release()
+
+    def handle_results(self, results, pending):
+        """Worker results -> tracking, alerts, display; they arrive in capture order"""
+        for _, seq, detections, infer_ms in results:
+            buffer, offset = pending.pop(seq)
+            if detections is None:
+                buffer.release()           # Lost with a dead worker
+                continue
+            frame = buffer.array
+            detections = self.offset_detections(detections, offset)
+            self.refresh_policy()
+            confirmed_threats = self.confirm(frame, self.apply_policy(detections))
+            self.log_detections(detections, confirmed_threats, infer_ms)
+            self.handle_threats(frame, confirmed_threats, buffer)
+            self.show(frame)
+            buffer.release()
+
+    # --- PIPELINE MODE ---
+    def _capture(self):
+        if self.power:
+            if self.capture_profile_pending:
+                self.apply_capture_profile()   # Flagged by the infer stage: the camera is only touched here
+            self.power.throttle()
+        while True:
+            ret, frame = self.cap.read()
+            # A supervised camera that is down keeps the pipeline waiting, not ending
+            if ret or not self.supervised or self.stop_event.is_set():
+                return frame if ret else None
+
+    def _infer(self, frame):
+        self.refresh_policy()
+        run_model = self.update_power(frame=frame, capture=False)
+        detections, infer_ms, model_hit = self.detect_or_track(frame) if run_model else self.idle_frame()
+        raw_detections = self.apply_policy(detections)
+        self.report_detections(frame, detections, raw_detections, capture=False)
+        return frame, detections, raw_detections, infer_ms, model_hit
+
+    def _track(self, item):
+        frame, detections, raw_detections, infer_ms, model_hit = item
+        confirmed_threats = self.confirm(frame, raw_detections, model_hit)
+        self.log_detections(detections, confirmed_threats, infer_ms, model_hit)
+        self.draw_threats(frame, confirmed_threats)
+        return frame, confirmed_threats
+
+    def _alert(self, item):
+        frame, confirmed_threats = item
+        if confirmed_threats:
+            self.raise_alerts(frame, confirmed_threats)
+
+    def _record(self, item):
+        self.record(item[0])
+
+    def _display(self, item):
+        self.show(item[0])
+
+    def build_pipeline(self):
+        """capture -> infer -> track -> {alert, record, display} as backpressured stages"""
+        pipe = Pipeline()
+        pipe.add_source("capture", self._capture)
+        # Vision stays real-time: stale frames are dropped, never queued up
+        pipe.add_stage("infer", self._infer, after="capture", maxsize=1, policy=DROP_OLDEST, cpu_bound=True)
+        pipe.add_stage("track", self._track, after="infer", maxsize=2, policy=BLOCK)
+        # Alerts must not be lost, but they run off the vision path
+        pipe.add_stage("alert", self._alert, after="track", maxsize=32, policy=BLOCK, cpu_bound=True)
+        pipe.add_stage("record", self._record, after="track", maxsize=4, policy=DROP_OLDEST)
+        if self.display:
+            pipe.add_stage("display", self._display, after="track", maxsize=1, policy=DROP_OLDEST)
+        return pipe
+
+    async def run_pipeline(self):
+        if not self.cap.isOpened():
+            logging.error("❌ Camera not found.")
+            return
+
+        logging.info("🚀 SYSTEM ONLINE (pipeline mode).")
+        self.pipeline = self.build_pipeline()
+        if self.stop_event.is_set():
+            self.pipeline.stop()
+        try:
+            await self.pipeline.run()
+        finally:
+            self.release()
+
+def main(argv=None):
+    """`drishtix` console entry point"""
+    parser = argparse.ArgumentParser(description="DrishtiX wildlife intrusion detection")
+    parser.add_argument("--headless", action="store_true", default=not DISPLAY,
+                        help="no window / GUI calls (service mode)")
+    parser.add_argument("--camera", default=str(CAMERA_INDEX),
+                        help="camera index, or an MJPEG URL / file with --mjpeg")
+    parser.add_argument("--mjpeg", action="store_true", default=CAPTURE_BACKEND == "mjpeg",
+                        help="reduced-scale MJPEG decode backend")
+    parser.add_argument("--workers", type=int, default=INFERENCE_WORKERS,
+                        help="inference worker processes (0 = in-process)")
+    parser.add_argument("--pipeline", action="store_true", default=PIPELINE_MODE,
+                        help="run as asyncio pipeline stages")
+    parser.add_argument("--no-power-saving", action="store_true", help="disable duty cycling")
+    parser.add_argument("--cascade", action="store_true", default=CASCADE,
+                        help="name confirmed animals with the species classifier")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="virtual camera with composited animals instead of a real one")
+    args = parser.parse_args(argv)
+
+    source = None
+    if args.synthetic:
+        from load_generator import VirtualCamera, load_sprites
+        source = VirtualCamera(load_sprites())
+
+    app = DrishtiXSystem(power_saving=POWER_SAVING and not args.no_power_saving,
+                         display=not args.headless,
+                         camera_index=int(args.camera) if args.camera.isdigit() else args.camera,
+                         capture_backend="mjpeg" if args.mjpeg else "opencv", source=source,
+                         cascade=args.cascade)
+    app.install_signal_handlers()
+    if args.workers:
+        app.run_workers(args.workers)
+    elif args.pipeline:
+        asyncio.run(app.run_pipeline())
+    else:
+        app.run()
+    logging.info("👋 DrishtiX stopped.")
 
 if __name__ == "__main__":
-    app = DrishtiXSystem()
-    app.run()
+    main()
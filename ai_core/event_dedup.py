@@ -0,0 +1,159 @@
+"""
+Perceptual-hash deduplication of repeated breach events.
+
+Every candidate alert gets a 64-bit difference hash (dHash) of the frame
+and a coarse box signature (species, grid cell, size bucket). Recent
+events are indexed by hash bands, so finding a near-duplicate is a few
+dict lookups instead of a scan: with B bands and a threshold of B-1 bits,
+any hash within the threshold shares at least one band exactly.
+
+A repeat of the same animal in the same place refreshes the existing
+event (its hash and box move along with the animal and the light, so a
+slow drift stays matched) instead of raising a new alert; a new arrival
+still alerts at once.
+"""
+
+import time
+import logging
+from collections import deque
+
+import cv2
+
+# --- CONFIGURATION ---
+MAX_HAMMING = 10          # Differing hash bits still counted as "the same scene"
+REPEAT_WINDOW = 600       # Seconds an event stays matchable after it was last seen
+REALERT_AFTER = 1800      # Re-alert for an animal that has been around this long
+GRID = 8                  # Box centre is quantised to a GRID x GRID cell
+MAX_CELL_SHIFT = 1        # Cells the box may move and still match
+
+
+def dhash(frame, hash_size=8):
+    """64-bit difference hash of a BGR (or grey) image"""
+    grey = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(grey, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def box_signature(box, frame_shape):
+    """(cell_x, cell_y, size_bucket) of a box"""
+    h, w = frame_shape[:2]
+    x1, y1, x2, y2 = box
+    cx = min(GRID - 1, int((x1 + x2) / 2 / w * GRID))
+    cy = min(GRID - 1, int((y1 + y2) / 2 / h * GRID))
+    area = max(1, (x2 - x1) * (y2 - y1)) / (w * h)
+    return cx, cy, int(area * GRID * GRID).bit_length()
+
+
+class BreachEvent:
+    def __init__(self, event_id, species, phash, signature, now):
+        self.event_id = event_id
+        self.species = species
+        self.phash = phash
+        self.signature = signature
+        self.first_seen = now
+        self.last_seen = now
+        self.last_alert = now
+        self.repeats = 0
+
+
+class EventDeduplicator:
+    """Suppresses alerts that repeat a recent event (same animal, same scene)"""
+    def __init__(self, max_hamming=MAX_HAMMING, window=REPEAT_WINDOW, realert_after=REALERT_AFTER):
+        self.max_hamming = max_hamming
+        self.window = window
+        self.realert_after = realert_after
+
+        self.n_bands = max_hamming + 1
+        self.band_bits = 64 // self.n_bands
+        self.band_mask = (1 << self.band_bits) - 1
+
+        self.events = {}           # {event_id: BreachEvent}
+        self.buckets = {}          # {(species, band, value): set(event_id)}
+        self.expiry = deque()      # (last_seen, event_id), oldest first
+        self.next_id = 1
+        self.suppressed = 0
+
+    def _bands(self, species, phash):
+        for band in range(self.n_bands):
+            yield species, band, (phash >> (band * self.band_bits)) & self.band_mask
+
+    def _index(self, event):
+        for key in self._bands(event.species, event.phash):
+            self.buckets.setdefault(key, set()).add(event.event_id)
+
+    def _unindex(self, event):
+        for key in self._bands(event.species, event.phash):
+            self.buckets[key].discard(event.event_id)
+            if not self.buckets[key]:
+                del self.buckets[key]
+
+    def _similar(self, event, phash, signature):
+        if bin(event.phash ^ phash).count("1") > self.max_hamming:
+            return False
+        (ex, ey, es), (x, y, s) = event.signature, signature
+        return abs(ex - x) <= MAX_CELL_SHIFT and abs(ey - y) <= MAX_CELL_SHIFT and abs(es - s) <= 1
+
+    def _expire(self, now):
+        # Each refresh queues a new (time, id) entry; only the newest one evicts
+        while self.expiry and now - self.expiry[0][0] > self.window:
+            ts, event_id = self.expiry.popleft()
+            event = self.events.get(event_id)
+            if event is None or event.last_seen != ts:
+                continue
+            self._unindex(event)
+            del self.events[event_id]
+
+    def find(self, species, phash, signature):
+        """The matching recent event, or None"""
+        seen = set()
+        for key in self._bands(species, phash):
+            for event_id in self.buckets.get(key, ()):
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+                event = self.events[event_id]
+                if self._similar(event, phash, signature):
+                    return event
+        return None
+
+    def is_repeat(self, species, frame, box, now=None):
+        """
+        Checks a candidate alert and records it.
+
+        Returns:
+            bool: True if it repeats a recent event and should not alert
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+
+        phash = dhash(frame)
+        signature = box_signature(box, frame.shape)
+        event = self.find(species, phash, signature)
+
+        if event is not None:
+            # Follow the animal: the next frame is compared with this one
+            if event.phash != phash:
+                self._unindex(event)
+                event.phash = phash
+                self._index(event)
+            event.signature = signature
+            event.last_seen = now
+            event.repeats += 1
+            self.expiry.append((now, event.event_id))
+            if now - event.last_alert < self.realert_after:
+                self.suppressed += 1
+                return True
+            event.last_alert = now
+            logging.info(f"⏰ {species} still present after {now - event.first_seen:.0f}s, alerting again")
+            return False
+
+        event = BreachEvent(self.next_id, species, phash, signature, now)
+        self.next_id += 1
+        self.events[event.event_id] = event
+        self.expiry.append((now, event.event_id))
+        self._index(event)
+        return False
@@ -0,0 +1,353 @@
+"""
+Evidence index and disk-bounded retention for `breached/`.
+
+EvidenceStore
+    Hands out sequential evidence paths from a counter file (no
+    directory listing per alert) and appends one JSON line per evidence
+    image to breached/index.jsonl. Several processes may write the same
+    folder (the live system plus `batch_infer --to-index`): the counter
+    and index writes are serialised by a file lock, and readers skip a
+    line that is still being appended.
+
+RetentionManager
+    Background, low-priority compaction that keeps the folder under a
+    disk quota:
+      - recent evidence stays at full quality
+      - older frames are replaced by thumbnails (alert variants dropped)
+      - aged frames are packed into monthly archive files with an offset
+        index, so one image can still be read without unpacking anything
+      - if still over quota, the oldest archives go first, then younger
+        frames are thumbnailed (oldest first), then the oldest loose
+        evidence is deleted, until the folder fits
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import logging
+import threading
+import contextlib
+from datetime import datetime
+
+import cv2
+
+try:
+    import fcntl
+except ImportError:           # Windows: only writers in this process are serialised
+    fcntl = None
+
+# --- CONFIGURATION ---
+INDEX_NAME = "index.jsonl"
+SEQUENCE_NAME = "index.seq"  # Last sequence number handed out, shared by every writer
+LOCK_NAME = "index.lock"
+ARCHIVE_DIR = "archive"
+FULL_QUALITY_DAYS = 7       # Untouched for this long
+THUMBNAIL_DAYS = 30         # Thumbnail after FULL_QUALITY_DAYS, archive after this
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_QUALITY = 70
+DISK_QUOTA_MB = 1024
+COMPACT_INTERVAL = 3600     # Seconds between background passes
+FILE_PAUSE = 0.01           # Sleep between files so compaction never hogs the SD card
+
+EVIDENCE_RE = re.compile(r"^(\d{4,})_(.+)_(\d{8}_\d{6})\.jpg$")
+SIDECAR_SUFFIXES = ("_crop.jpg", "_preview.jpg", ".media.json", ".mp4")
+
+
+def _lower_thread_priority():
+    """Lowest CPU priority for the calling thread (Linux), best effort"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+class EvidenceStore:
+    """Sequential evidence naming plus an append-only JSONL index"""
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        os.makedirs(self.folder, exist_ok=True)
+        self.index_path = os.path.join(self.folder, INDEX_NAME)
+        self.sequence_path = os.path.join(self.folder, SEQUENCE_NAME)
+        self.lock = threading.Lock()
+        with self._locked():
+            self.sequence = max(self._load_sequence(), self._read_sequence())
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive access to the index and counter, across threads and processes"""
+        with self.lock, open(os.path.join(self.folder, LOCK_NAME), 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _read_sequence(self):
+        try:
+            with open(self.sequence_path) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _load_sequence(self):
+        if os.path.exists(self.index_path):
+            last = 0
+            for record in self.records():
+                last = max(last, record.get('seq') or 0)
+            return last
+        return self._bootstrap_index()
+
+    def _bootstrap_index(self):
+        """One-time scan of an existing folder that has no index yet"""
+        records = []
+        for name in sorted(os.listdir(self.folder)):
+            m = EVIDENCE_RE.match(name)
+            if not m:
+                continue
+            ts = datetime.strptime(m.group(3), "%Y%m%d_%H%M%S").timestamp()
+            records.append({'seq': int(m.group(1)), 'file': name, 'species': m.group(2).replace('_', ' '),
+                            'ts': ts, 'box': None, 'conf': None, 'camera': 0})
+        with open(self.index_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        if records:
+            logging.info(f"🗂️ Indexed {len(records)} existing evidence images")
+        return max((r['seq'] for r in records), default=0)
+
+    def next_path(self, animal_name):
+        """Next sequential evidence path, e.g. breached/0011_ELEPHANT_20260105_143022.jpg"""
+        with self._locked():
+            # Another process may have handed out numbers since: continue after the highest
+            sequence = self.sequence = max(self.sequence, self._read_sequence()) + 1
+            tmp = self.sequence_path + ".tmp"
+            with open(tmp, 'w') as f:
+                f.write(str(sequence))
+            os.replace(tmp, self.sequence_path)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{sequence:04d}_{animal_name.replace(' ', '_')}_{timestamp}.jpg"
+        return os.path.join(self.folder, filename)
+
+    def add(self, path, species, box=None, conf=None, camera=0, ts=None):
+        """Records a saved evidence image in the index"""
+        name = os.path.basename(path)
+        m = EVIDENCE_RE.match(name)
+        record = {
+            'seq': int(m.group(1)) if m else None,
+            'file': name,
+            'species': species,
+            'ts': time.time() if ts is None else ts,
+            'box': list(box) if box is not None else None,
+            'conf': conf,
+            'camera': camera,
+        }
+        with self._locked(), open(self.index_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def update(self, changes):
+        """Rewrites the index with {file: {field: value}} applied to those files' records"""
+        with self._locked():
+            records = [dict(r, **changes.get(r['file'], {})) for r in self.records()]
+            tmp = self.index_path + ".tmp"
+            with open(tmp, 'w') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp, self.index_path)
+
+    def records(self):
+        """Iterates over every index record, oldest first"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue          # Being appended by another process (or torn by a crash)
+                yield record
+
+    def read_image(self, name):
+        """JPEG bytes of an evidence image, whether on disk or inside an archive"""
+        path = os.path.join(self.folder, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        for idx_path in glob.glob(os.path.join(self.folder, ARCHIVE_DIR, "*.idx.json")):
+            with open(idx_path) as f:
+                index = json.load(f)
+            if name in index:
+                offset, length = index[name]
+                with open(idx_path[:-len(".idx.json")] + ".pack", 'rb') as f:
+                    f.seek(offset)
+                    return f.read(length)
+        raise FileNotFoundError(name)
+
+
+class RetentionManager:
+    """Thumbnails, packs and trims evidence in a low-priority background thread"""
+    def __init__(self, store, quota_mb=DISK_QUOTA_MB, full_days=FULL_QUALITY_DAYS,
+                 thumb_days=THUMBNAIL_DAYS, interval=COMPACT_INTERVAL):
+        self.store = store
+        self.folder = store.folder
+        self.archive_dir = os.path.join(self.folder, ARCHIVE_DIR)
+        self.quota = quota_mb * 1024 * 1024
+        self.full_age = full_days * 86400
+        self.thumb_age = thumb_days * 86400
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, name="evidence-retention", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _loop(self):
+        _lower_thread_priority()
+        while not self.stop_event.is_set():
+            try:
+                self.compact()
+            except Exception as e:
+                logging.error(f"❌ Evidence compaction failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    # --- PASSES ---
+    def compact(self, now=None):
+        """One full retention pass"""
+        now = time.time() if now is None else now
+        thumbed = archived = 0
+        for record in self.store.records():
+            if self.stop_event.is_set():
+                break
+            path = os.path.join(self.folder, record['file'])
+            if not os.path.exists(path):
+                continue
+            age = now - record['ts']
+            if age > self.thumb_age:
+                self._archive(record, path)
+                archived += 1
+            elif age > self.full_age and self._thumbnail(path):
+                thumbed += 1
+            else:
+                continue
+            time.sleep(FILE_PAUSE)
+
+        removed, squeezed, deleted = self._enforce_quota()
+        if thumbed or archived or removed or squeezed or deleted:
+            logging.info(f"🗜️ Retention: {thumbed + squeezed} thumbnailed, {archived} archived, "
+                         f"{removed} archives dropped, {deleted} images deleted")
+
+    def _drop_sidecars(self, path):
+        stem = os.path.splitext(path)[0]
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(stem + suffix):
+                os.remove(stem + suffix)
+
+    def _thumbnail(self, path):
+        img = cv2.imread(path)
+        if img is None:
+            return False
+        h, w = img.shape[:2]
+        if w <= THUMBNAIL_WIDTH:
+            return False
+        thumb = cv2.resize(img, (THUMBNAIL_WIDTH, int(h * THUMBNAIL_WIDTH / w)), interpolation=cv2.INTER_AREA)
+        tmp = path + ".tmp.jpg"
+        cv2.imwrite(tmp, thumb, [int(cv2.IMWRITE_JPEG_QUALITY), THUMBNAIL_QUALITY])
+        os.replace(tmp, path)
+        self._drop_sidecars(path)
+        return True
+
+    def _archive(self, record, path):
+        """Appends the JPEG to this month's pack and removes the loose file"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        month = datetime.fromtimestamp(record['ts']).strftime("%Y%m")
+        pack_path = os.path.join(self.archive_dir, f"evidence_{month}.pack")
+        idx_path = os.path.join(self.archive_dir, f"evidence_{month}.idx.json")
+
+        index = {}
+        if os.path.exists(idx_path):
+            with open(idx_path) as f:
+                index = json.load(f)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(pack_path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        index[record['file']] = [offset, len(data)]
+
+        tmp = idx_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, idx_path)
+
+        os.remove(path)
+        self._drop_sidecars(path)
+
+    def _footprint(self, path):
+        """Bytes of an evidence image plus its sidecars"""
+        stem = os.path.splitext(path)[0]
+        paths = [path] + [stem + suffix for suffix in SIDECAR_SUFFIXES]
+        return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+    def _folder_size(self):
+        total = 0
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                total += os.path.getsize(os.path.join(root, name))
+        return total
+
+    def _enforce_quota(self):
+        """
+        Escalates until under quota: whole archives (oldest month first), then
+        thumbnails of younger frames, then deletion of the oldest loose evidence.
+
+        Returns:
+            (archives dropped, frames thumbnailed, images deleted)
+        """
+        removed = squeezed = deleted = 0
+        packs = sorted(glob.glob(os.path.join(self.archive_dir, "*.pack")))
+        total = self._folder_size()
+        while total > self.quota and packs:
+            pack = packs.pop(0)
+            total -= os.path.getsize(pack)
+            os.remove(pack)
+            idx = pack[:-len(".pack")] + ".idx.json"
+            if os.path.exists(idx):
+                total -= os.path.getsize(idx)
+                os.remove(idx)
+            removed += 1
+        if total <= self.quota:
+            return removed, squeezed, deleted
+
+        loose = [os.path.join(self.folder, r['file']) for r in self.store.records()]
+        loose = [path for path in loose if os.path.exists(path)]
+        for path in loose:
+            if total <= self.quota or self.stop_event.is_set():
+                break
+            before = self._footprint(path)
+            if self._thumbnail(path):
+                total -= before - self._footprint(path)
+                squeezed += 1
+                time.sleep(FILE_PAUSE)
+        for path in loose:
+            if total <= self.quota or self.stop_event.is_set():
+                break
+            total -= self._footprint(path)
+            os.remove(path)
+            self._drop_sidecars(path)
+            deleted += 1
+        if deleted:
+            logging.warning(f"⚠️ Evidence over its quota even as thumbnails: deleted the {deleted} oldest image(s)")
+        if total > self.quota:
+            logging.warning(f"⚠️ Evidence folder still {total // (1024 * 1024)}MB, over its quota")
+        return removed, squeezed, deleted
@@ -0,0 +1,289 @@
+"""
+Preallocated, reference-counted frame buffers.
+
+Every cap.read() used to return a freshly allocated frame, and colour
+conversion and model preprocessing each allocated again. At 15-30 FPS
+that is a steady stream of multi-megabyte allocations (allocator churn,
+RSS creep on small boards). FramePool keeps a few fixed-size buffers and
+hands them out again once nobody uses them:
+
+    pool = FramePool()
+    buf = pool.read(cap)             # cap.read(image=...) into a free buffer
+    frame = buf.array
+    recorder.push(frame, done=buf.retain().release)   # still needed after this frame
+    buf.release()                    # back to the pool when the last holder releases
+
+A buffer that is still held when the next frame is read is simply not
+reused; the pool allocates another one (counted in `stats()`), so a slow
+holder costs memory, never a corrupted frame. Sources that can't read
+into a given array (MJPEGCapture, VirtualCamera) still work; their frames
+are wrapped without pooling.
+
+Letterbox builds the model input (letterbox, BGR -> RGB, HWC -> CHW,
+0..1 float) in buffers allocated once per frame size.
+
+    python frame_pool.py --synthetic --frames 300
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+POOL_SIZE = 4          # Free buffers kept per pool (frames in flight beyond this allocate)
+IMGSZ = 640            # Model input size
+PAD_VALUE = 114        # Letterbox border grey (same as ultralytics)
+
+
+class FrameBuffer:
+    """One pooled array; returns to its pool when the last reference is released"""
+    __slots__ = ('array', 'pool', 'refs')
+
+    def __init__(self, array, pool=None):
+        self.array = array
+        self.pool = pool
+        self.refs = 1
+
+    def retain(self):
+        if self.pool:
+            with self.pool.lock:
+                self.refs += 1
+        return self
+
+    def release(self):
+        if self.pool:
+            self.pool._release(self)
+
+
+class FramePool:
+    """Fixed-size buffers of one frame shape; reshapes when the camera mode changes"""
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.shape = None
+        self.free = []
+        self.lock = threading.Lock()
+        self.allocations = 0      # Buffers created
+        self.reuses = 0           # Reads served by a free buffer
+        self.unpooled = 0         # Frames from sources that can't read into a buffer
+
+    def acquire(self, shape, dtype=np.uint8):
+        """A free buffer of `shape` (refcount 1), allocating only if none is free"""
+        with self.lock:
+            if shape != self.shape:
+                self.shape = shape        # Old-shape buffers are dropped on release
+                self.free.clear()
+            if self.free:
+                buf = self.free.pop()
+                buf.refs = 1
+                self.reuses += 1
+                return buf
+            self.allocations += 1
+        return FrameBuffer(np.empty(shape, dtype), self)
+
+    def _release(self, buf):
+        with self.lock:
+            buf.refs -= 1
+            if buf.refs == 0 and buf.array.shape == self.shape and len(self.free) < self.size:
+                self.free.append(buf)
+
+    def _adopt(self, frame):
+        """Wraps a frame the source allocated itself; it joins the pool if it fits"""
+        with self.lock:
+            self.shape = frame.shape
+            self.allocations += 1
+        return FrameBuffer(frame, self)
+
+    def read(self, cap, retrieve=False):
+        """
+        Next frame of `cap` as a FrameBuffer, or None at the end of the stream.
+        retrieve=True decodes the frame taken by an earlier cap.grab() instead.
+        """
+        read = cap.retrieve if retrieve else cap.read
+        if not isinstance(cap, cv2.VideoCapture):
+            ret, frame = read()
+            if not ret:
+                return None
+            self.unpooled += 1
+            return FrameBuffer(frame)
+
+        if self.shape is None:
+            ret, frame = read()               # First frame tells the size
+            return self._adopt(frame) if ret else None
+
+        buf = self.acquire(self.shape)
+        ret, frame = read(image=buf.array)
+        if not ret:
+            buf.release()
+            return None
+        if frame is not buf.array:
+            # Resolution changed: OpenCV allocated a new frame of the new size
+            buf.release()
+            return self._adopt(frame)
+        return buf
+
+    def stats(self):
+        with self.lock:
+            return {'allocations': self.allocations, 'reuses': self.reuses,
+                    'free': len(self.free), 'unpooled': self.unpooled}
+
+
+def to_rgb(frame, out=None):
+    """BGR -> RGB into `out` (reallocated only when the frame size changes)"""
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+
+
+class Letterbox:
+    """Frame -> (1, 3, imgsz, imgsz) float32 RGB 0..1 model input, in reused buffers"""
+    def __init__(self, imgsz=IMGSZ):
+        self.imgsz = imgsz
+        self.canvas = np.full((imgsz, imgsz, 3), PAD_VALUE, np.uint8)
+        self.input = np.zeros((1, 3, imgsz, imgsz), np.float32)
+        self.resized = None
+        self.source_shape = None
+        self.ratio, self.left, self.top = 1.0, 0, 0
+        self.allocations = 2
+        self._tensor = None
+
+    def _fit(self, h0, w0):
+        """New frame size: scale, padding and the resize buffer"""
+        self.ratio = self.imgsz / max(h0, w0)
+        new_w, new_h = int(round(w0 * self.ratio)), int(round(h0 * self.ratio))
+        self.left, self.top = (self.imgsz - new_w) // 2, (self.imgsz - new_h) // 2
+        self.resized = np.empty((new_h, new_w, 3), np.uint8)
+        self.canvas[:] = PAD_VALUE
+        self.interpolation = cv2.INTER_AREA if new_w < w0 else cv2.INTER_LINEAR
+        self.source_shape = (h0, w0)
+        self.allocations += 1
+
+    def __call__(self, frame):
+        """Fills and returns self.input (the same array every call)"""
+        h0, w0 = frame.shape[:2]
+        if (h0, w0) != self.source_shape:
+            self._fit(h0, w0)
+        new_h, new_w = self.resized.shape[:2]
+        cv2.resize(frame, (new_w, new_h), dst=self.resized, interpolation=self.interpolation)
+        self.canvas[self.top:self.top + new_h, self.left:self.left + new_w] = self.resized
+        # BGR HWC uint8 -> RGB CHW float in one pass, straight into the input buffer
+        np.multiply(self.canvas.transpose(2, 0, 1)[::-1], np.float32(1 / 255), out=self.input[0])
+        return self.input
+
+    def tensor(self, frame):
+        """Same as calling, as a torch tensor sharing the input buffer (for model(...))"""
+        self(frame)
+        if self._tensor is None:
+            import torch
+            self._tensor = torch.from_numpy(self.input)
+        return self._tensor
+
+    def unmap(self, box):
+        """(x1, y1, x2, y2) in model input pixels -> frame pixels"""
+        h0, w0 = self.source_shape
+        x1, y1, x2, y2 = box
+        return (int(min(w0, max(0, (x1 - self.left) / self.ratio))),
+                int(min(h0, max(0, (y1 - self.top) / self.ratio))),
+                int(min(w0, max(0, (x2 - self.left) / self.ratio))),
+                int(min(h0, max(0, (y2 - self.top) / self.ratio))))
+
+
+# --- BENCHMARK ---
+def _naive_step(cap, imgsz):
+    """What the loops did before: every step allocates"""
+    ret, frame = cap.read()
+    if not ret:
+        return False
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h0, w0 = rgb.shape[:2]
+    r = imgsz / max(h0, w0)
+    new_w, new_h = int(round(w0 * r)), int(round(h0 * r))
+    resized = cv2.resize(rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    padded = cv2.copyMakeBorder(resized, top, imgsz - new_h - top, left, imgsz - new_w - left,
+                                cv2.BORDER_CONSTANT, value=(PAD_VALUE,) * 3)
+    np.ascontiguousarray(padded.transpose(2, 0, 1))[None].astype(np.float32) / 255
+    return True
+
+
+def _bench(mode, source, frames, imgsz):
+    """Runs in a fresh process so peak RSS belongs to this mode only"""
+    import resource
+    cap = cv2.VideoCapture(source)
+    pool, letterbox, rgb = FramePool(), Letterbox(imgsz), None
+    tracemalloc.start()
+    done, churn, t0 = 0, 0, time.perf_counter()
+    while done < frames:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        if mode == "naive":
+            if not _naive_step(cap, imgsz):
+                break
+        else:
+            buf = pool.read(cap)
+            if buf is None:
+                break
+            rgb = to_rgb(buf.array, rgb)
+            letterbox(buf.array)
+            buf.release()
+        churn += tracemalloc.get_traced_memory()[1] - before
+        done += 1
+    elapsed = time.perf_counter() - t0
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    cap.release()
+    report = {'mode': mode, 'frames': done, 'ms_per_frame': elapsed / done * 1000 if done else 0.0,
+              'allocated_mb_per_frame': churn / done / 2 ** 20 if done else 0.0,
+              'traced_peak_mb': traced_peak / 2 ** 20,
+              'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if mode == "pooled":
+        report['buffer_allocations'] = pool.stats()['allocations'] + letterbox.allocations + (rgb is not None)
+    return report
+
+
+def make_test_video(path, frames=300, size=(1280, 720)):
+    """A moving-gradient MJPG clip, so the benchmark needs no camera"""
+    w, h = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    across = np.tile(np.linspace(0, 255, w, dtype=np.uint8), (h, 1))
+    down = np.tile(np.linspace(0, 255, h, dtype=np.uint8)[:, None], (1, w))
+    for i in range(frames):
+        writer.write(cv2.merge([np.roll(across, i * 4, axis=1), down, np.roll(across, -i * 2, axis=1)]))
+    writer.release()
+
+
+def benchmark(source, frames, imgsz=IMGSZ):
+    ctx = get_context("spawn")
+    reports = []
+    for mode in ("naive", "pooled"):
+        with ctx.Pool(1) as p:
+            reports.append(p.apply(_bench, (mode, source, frames, imgsz)))
+    for r in reports:
+        extra = f", {r['buffer_allocations']} buffers allocated in total" if 'buffer_allocations' in r else ""
+        logging.info(f"📊 {r['mode']:>6}: {r['frames']} frames, {r['ms_per_frame']:.2f} ms/frame, "
+                     f"{r['allocated_mb_per_frame']:.2f} MB allocated/frame, "
+                     f"traced peak {r['traced_peak_mb']:.1f} MB, peak RSS {r['peak_rss_mb']:.0f} MB{extra}")
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pooled vs. allocating capture + preprocessing")
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--synthetic", action="store_true", help="generate a 720p test clip instead")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.avi")
+            make_test_video(path, args.frames)
+            benchmark(path, args.frames, args.imgsz)
+    else:
+        benchmark(int(args.source) if args.source.isdigit() else args.source, args.frames, args.imgsz)
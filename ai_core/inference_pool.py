@@ -0,0 +1,276 @@
+"""
+Process-pool inference workers.
+
+One PyTorch model call does not scale across 8-16 cores, and the GIL
+serialises post-processing. The pool starts N worker processes, each with
+its own YOLO model and its own intra-op thread count, dispatches frames
+round-robin (or pins each camera to one worker) and hands results back in
+sequence order so tracking sees frames in the order they were captured.
+
+Workers ignore SIGINT/SIGTERM (Ctrl-C and systemd signal the whole
+process group) and stop only on the None sentinel from close(), so the
+parent can still drain the frames they hold. A worker that dies anyway
+takes its frames with it: they come back as lost (detections None) so
+the camera's sequence moves on, and the worker gets no more frames. Each
+worker sends results over its own pipe, so one that dies mid-send can't
+leave a shared queue lock held and stall the others.
+
+Benchmark:
+    python inference_pool.py --model yolov8n.pt --workers 1 2 4 8
+"""
+
+import os
+import glob
+import time
+import queue
+import atexit
+import signal
+import logging
+import argparse
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+# --- CONFIGURATION ---
+ROUND_ROBIN = "round_robin"
+PER_CAMERA = "per_camera"
+MAX_INFLIGHT_PER_WORKER = 2   # Frames queued per worker before submit() blocks
+IMGSZ = 640
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+
+def load_yolo(model_path, threads, imgsz):
+    """Default worker model: YOLO with its own thread budget, as frame -> [(name, conf, box)]"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    from ultralytics import YOLO
+    torch.set_num_threads(threads)
+
+    model = YOLO(model_path)
+    names = model.names
+
+    def predict(frame):
+        detections = []
+        for r in model(frame, imgsz=imgsz, verbose=False):
+            for cls_id, conf, xyxy in zip(r.boxes.cls.tolist(), r.boxes.conf.tolist(), r.boxes.xyxy.tolist()):
+                detections.append((names[int(cls_id)], float(conf), tuple(int(v) for v in xyxy)))
+        return detections
+    return predict
+
+
+def _worker_main(model_path, threads, imgsz, inbox, results, loader=load_yolo):
+    """Worker process: own model, own thread budget, plain-tuple results"""
+    # Only the sentinel stops a worker: the parent drains in-flight frames on Ctrl-C / SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    predict = loader(model_path, threads, imgsz)
+    results.send(('ready', os.getpid()))
+
+    while True:
+        job = inbox.get()
+        if job is None:
+            break
+        camera, seq, frame = job
+        t0 = time.perf_counter()
+        detections = []
+        try:
+            detections = predict(frame)
+        except Exception as e:
+            logging.error(f"❌ Worker {os.getpid()} failed on frame {seq}: {e}")
+        results.send((camera, seq, detections, (time.perf_counter() - t0) * 1000))
+
+
+class ReorderBuffer:
+    """Releases results strictly in sequence order, per camera"""
+    def __init__(self):
+        self.next_seq = {}
+        self.pending = {}
+
+    def push(self, camera, seq, item):
+        self.pending.setdefault(camera, {})[seq] = item
+
+    def pop_ready(self):
+        ready = []
+        for camera, waiting in self.pending.items():
+            seq = self.next_seq.get(camera, 0)
+            while seq in waiting:
+                ready.append((camera, seq, waiting.pop(seq)))
+                seq += 1
+            self.next_seq[camera] = seq
+        return ready
+
+
+class InferencePool:
+    """N model-holding processes behind a submit()/results() interface"""
+    def __init__(self, model_path, workers=None, threads_per_worker=None,
+                 dispatch=ROUND_ROBIN, imgsz=IMGSZ, loader=load_yolo):
+        cores = os.cpu_count() or 1
+        self.n_workers = workers or max(1, cores // 2)
+        self.threads = threads_per_worker or max(1, cores // self.n_workers)
+        self.dispatch = dispatch
+
+        ctx = mp.get_context("spawn")   # Torch and fork don't mix
+        self.inboxes = [ctx.Queue(MAX_INFLIGHT_PER_WORKER) for _ in range(self.n_workers)]
+        self.outboxes = []                  # One result pipe per worker
+        self.procs = []
+        for inbox in self.inboxes:
+            reader, writer = ctx.Pipe(duplex=False)
+            p = ctx.Process(target=_worker_main, daemon=True,
+                            args=(model_path, self.threads, imgsz, inbox, writer, loader))
+            p.start()
+            writer.close()                  # The worker holds the only write end: EOF when it dies
+            self.outboxes.append(reader)
+            self.procs.append(p)
+
+        # Wait until every model is loaded so benchmarks don't time startup
+        for w, reader in enumerate(self.outboxes):
+            try:
+                reader.recv()
+            except EOFError:
+                raise RuntimeError(f"inference worker {w} died while loading {model_path}") from None
+        logging.info(f"🧵 Inference pool ready: {self.n_workers} workers x {self.threads} threads")
+
+        self.seq = {}
+        self.rr = 0
+        self.inflight = 0
+        self.owner = {}                     # (camera, seq) -> worker holding the frame
+        self.alive = list(range(self.n_workers))
+        self.lost = 0
+        self.reorder = ReorderBuffer()
+        self.closed = False
+        atexit.register(self.close)         # Before multiprocessing's exit hook: workers ignore SIGTERM
+
+    def _pick_worker(self, camera):
+        if not self.alive:
+            raise RuntimeError("every inference worker has died")
+        if self.dispatch == PER_CAMERA:
+            return self.alive[hash(camera) % len(self.alive)]
+        self.rr = (self.rr + 1) % len(self.alive)
+        return self.alive[self.rr]
+
+    def _reap(self, dead=()):
+        """Writes off the frames of workers that died: they come back as lost, in order"""
+        dead = set(dead) | {w for w in self.alive if not self.procs[w].is_alive()}
+        dead &= set(self.alive)
+        if not dead:
+            return
+        for w in dead:
+            self.alive.remove(w)
+            logging.error(f"❌ Inference worker {w} died (exit code {self.procs[w].exitcode})")
+        for key, w in list(self.owner.items()):
+            if w in dead:
+                del self.owner[key]
+                self.inflight -= 1
+                self.lost += 1
+                self.reorder.push(*key, (None, 0.0))
+
+    def submit(self, frame, camera=0):
+        """Queues a frame; blocks while the chosen worker is saturated. Returns its seq."""
+        seq = self.seq.get(camera, 0)
+        self.seq[camera] = seq + 1
+        while True:
+            worker = self._pick_worker(camera)
+            try:
+                self.inboxes[worker].put((camera, seq, frame), timeout=1.0)
+                break
+            except queue.Full:
+                self._reap()                # A dead worker never empties its inbox
+        self.owner[(camera, seq)] = worker
+        self.inflight += 1
+        return seq
+
+    def results(self, timeout=0.0):
+        """
+        Collects finished frames and returns the ones now in order.
+
+        Returns:
+            list: [(camera, seq, detections, infer_ms)], detections being
+            [(raw_name, conf, (x1, y1, x2, y2))], or None for a frame lost with its worker
+        """
+        block = timeout > 0
+        while self.inflight:
+            readers = {self.outboxes[w]: w for w in self.alive}
+            ready = wait(list(readers), timeout if block else 0)
+            if not ready:
+                self._reap()
+                break
+            block = False     # Only wait for the first one
+            for reader in ready:
+                try:
+                    camera, seq, detections, infer_ms = reader.recv()
+                except EOFError:
+                    self._reap([readers[reader]])      # Its results so far were read first
+                    continue
+                if self.owner.pop((camera, seq), None) is None:
+                    continue  # Already written off with its worker
+                self.inflight -= 1
+                self.reorder.push(camera, seq, (detections, infer_ms))
+        return [(camera, seq, det, ms) for camera, seq, (det, ms) in self.reorder.pop_ready()]
+
+    def drain(self, timeout=None):
+        """Blocks until every submitted frame has come back (or `timeout` seconds passed)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        out = []
+        while self.inflight and (deadline is None or time.monotonic() < deadline):
+            out.extend(self.results(timeout=1.0))
+        return out + [(c, s, d, m) for c, s, (d, m) in self.reorder.pop_ready()]
+
+    def close(self):
+        """Stops the workers with the sentinel; one that doesn't stop in time is killed"""
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        for w in self.alive:
+            try:
+                self.inboxes[w].put(None, timeout=1.0)
+            except queue.Full:
+                pass
+        for p in self.procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.kill()            # SIGTERM is ignored
+                p.join()
+        for reader in self.outboxes:
+            reader.close()
+
+
+def benchmark(model_path, worker_counts, frames=200, imgsz=IMGSZ):
+    """Aggregate FPS for each worker count on the same set of frames"""
+    import cv2
+    import numpy as np
+
+    images = [cv2.imread(p) for p in sorted(glob.glob("breached/*.jpg"))[:20]]
+    images = [img for img in images if img is not None]
+    if not images:
+        images = [np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+
+    report = {}
+    for n in worker_counts:
+        pool = InferencePool(model_path, workers=n, imgsz=imgsz)
+        t0 = time.perf_counter()
+        done = 0
+        for i in range(frames):
+            pool.submit(images[i % len(images)])
+            done += len(pool.results())
+        done += len(pool.drain())
+        fps = done / (time.perf_counter() - t0)
+        pool.close()
+        report[n] = fps
+        logging.info(f"📊 {n} workers x {pool.threads} threads: {fps:.1f} FPS")
+
+    base = report[worker_counts[0]]
+    print("\nWorkers | FPS    | Speed-up")
+    for n, fps in report.items():
+        print(f"{n:7d} | {fps:6.1f} | {fps / base:.2f}x")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the process-pool inference mode")
+    parser.add_argument('--model', default='yolov8n.pt')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--imgsz', type=int, default=IMGSZ)
+    args = parser.parse_args()
+    benchmark(args.model, args.workers, frames=args.frames, imgsz=args.imgsz)
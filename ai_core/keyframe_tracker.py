@@ -0,0 +1,158 @@
+"""
+Keyframe detection with optical-flow tracking in between.
+
+Animals at a fence move slowly compared to the frame rate, so running
+YOLO on every frame mostly re-finds the same boxes. KeyframeTracker lets
+the model run only on keyframes and moves the boxes on the frames in
+between with sparse Lucas-Kanade optical flow on a small grey image
+(a few milliseconds instead of a model call).
+
+A keyframe is forced when:
+    - KEYFRAME_INTERVAL frames have passed since the last one
+    - a box loses its feature points or fails the forward-backward check
+    - something moves outside the tracked boxes (a new arrival)
+    - the last keyframe had a detection close to its threshold
+    - the frame size changed (power profile switch)
+
+Propagated detections keep the keyframe's class and confidence. They keep
+ThreatTracker's tracks alive, but only model hits count toward
+confirmation, so the caller forces keyframes while a threat in view is
+still unconfirmed.
+
+    detections = keyframes.propagate(frame)      # None -> run the model
+    if detections is None:
+        detections = detect(frame)
+        keyframes.keyframe(frame, detections)
+"""
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+KEYFRAME_INTERVAL = 5     # Model at least every K frames
+TRACK_WIDTH = 320         # Optical flow runs on frames downscaled to this width
+MAX_CORNERS = 30          # Feature points per box
+MIN_POINTS = 5            # Fewer surviving points -> tracker failure
+FB_ERROR = 1.0            # Max forward-backward error (pixels, small image)
+NEW_MOTION = 0.01         # Fraction of changed pixels outside boxes that forces a keyframe
+MOTION_DELTA = 25         # Grey-level change that counts as motion
+BOX_MARGIN = 8            # Pixels (small image) around boxes ignored by the motion check
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+class KeyframeTracker:
+    """Decides when the model must run and tracks boxes when it does not"""
+    def __init__(self, interval=KEYFRAME_INTERVAL, track_width=TRACK_WIDTH):
+        self.interval = interval
+        self.track_width = track_width
+        self.prev_grey = None
+        self.frame_shape = None
+        self.scale = 1.0
+        self.tracks = []          # [[raw_name, conf, box, points]] in full-frame box coords
+        self.since_keyframe = 0
+        self.force = True
+        self.frames = 0
+        self.keyframes = 0
+
+    def _grey(self, frame):
+        h, w = frame.shape[:2]
+        self.scale = min(1.0, self.track_width / w)
+        small = cv2.resize(frame, (int(w * self.scale), int(h * self.scale)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _small_box(self, box):
+        return [int(round(v * self.scale)) for v in box]
+
+    def _features(self, grey, box):
+        x1, y1, x2, y2 = self._small_box(box)
+        mask = np.zeros_like(grey)
+        mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 255
+        return cv2.goodFeaturesToTrack(grey, MAX_CORNERS, 0.01, 3, mask=mask)
+
+    def keyframe(self, frame, detections, uncertain=False):
+        """
+        Starts tracking this frame's detections.
+
+        Args:
+            detections: [(raw_name, conf, (x1, y1, x2, y2))]
+            uncertain: a detection is close to its threshold -> next frame is a keyframe too
+        """
+        grey = self._grey(frame)
+        self.tracks = []
+        for raw_name, conf, box in detections:
+            points = self._features(grey, box)
+            # A box without texture can't be tracked: the next frame re-detects it
+            if points is None or len(points) < MIN_POINTS:
+                uncertain = True
+                continue
+            self.tracks.append([raw_name, conf, box, points])
+        self.prev_grey = grey
+        self.frame_shape = frame.shape
+        self.since_keyframe = 0
+        self.force = uncertain
+        self.frames += 1
+        self.keyframes += 1
+
+    def reset(self):
+        """Next frame is a keyframe (e.g. after the model was switched off)"""
+        self.force = True
+
+    def _new_motion(self, grey):
+        """Changed pixels outside every tracked box"""
+        moved = cv2.absdiff(grey, self.prev_grey) > MOTION_DELTA
+        for _, _, box, _ in self.tracks:
+            x1, y1, x2, y2 = self._small_box(box)
+            moved[max(0, y1 - BOX_MARGIN):max(0, y2 + BOX_MARGIN), max(0, x1 - BOX_MARGIN):max(0, x2 + BOX_MARGIN)] = False
+        return moved.mean() > NEW_MOTION
+
+    def _move(self, grey, track):
+        """Shifts and scales one box by its points' median motion; False on failure"""
+        raw_name, conf, box, points = track
+        nxt, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_grey, grey, points, None, **LK_PARAMS)
+        back, status_back, _ = cv2.calcOpticalFlowPyrLK(grey, self.prev_grey, nxt, None, **LK_PARAMS)
+        fb = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb < FB_ERROR)
+        if good.sum() < MIN_POINTS:
+            return False
+
+        old, new = points.reshape(-1, 2)[good], nxt.reshape(-1, 2)[good]
+        shift = np.median(new - old, axis=0) / self.scale
+        # Scale from the spread of the points around their centre
+        old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+        new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+        ok = old_spread > 1e-3
+        zoom = float(np.median(new_spread[ok] / old_spread[ok])) if ok.any() else 1.0
+
+        x1, y1, x2, y2 = box
+        cx, cy = (x1 + x2) / 2 + shift[0], (y1 + y2) / 2 + shift[1]
+        hw, hh = (x2 - x1) / 2 * zoom, (y2 - y1) / 2 * zoom
+        h, w = self.frame_shape[:2]
+        box = (int(max(0, cx - hw)), int(max(0, cy - hh)), int(min(w, cx + hw)), int(min(h, cy + hh)))
+        if box[2] - box[0] < 4 or box[3] - box[1] < 4:
+            return False                    # Walked out of the frame
+        track[2], track[3] = box, new.reshape(-1, 1, 2)
+        return True
+
+    def propagate(self, frame):
+        """Tracked detections for this frame, or None when the model must run"""
+        self.since_keyframe += 1
+        if (self.force or self.prev_grey is None or frame.shape != self.frame_shape
+                or self.since_keyframe >= self.interval):
+            return None
+
+        grey = self._grey(frame)
+        if self._new_motion(grey):
+            return None
+        for track in self.tracks:
+            if not self._move(grey, track):
+                return None
+
+        self.prev_grey = grey
+        self.frames += 1
+        return [(raw_name, conf, box) for raw_name, conf, box, _ in self.tracks]
+
+    def stats(self):
+        return {'frames': self.frames, 'keyframes': self.keyframes,
+                'model_ratio': self.keyframes / self.frames if self.frames else 0.0}
@@ -0,0 +1,465 @@
+"""
+Synthetic multi-camera load generator.
+
+Builds N virtual cameras that composite animal crops onto background
+plates with controlled motion, density and frame rate, and records the
+ground-truth box of every animal in every frame. A VirtualCamera is a
+drop-in for cv2.VideoCapture (read / isOpened / get / set / release), so
+it can feed DrishtiXSystem directly (`drishtix --synthetic`).
+
+run_load_test() drives N cameras through the inference pool with the live
+detection policy and measures, per species and overall:
+    - frames generated / dropped (a late consumer drops frames, like a real camera)
+    - frame latency (capture -> detections back)
+    - detection and confirmation latency (animal enters view -> first hit /
+      CONFIRMATION_FRAMES hits)
+    - miss rate (animals that left the view without being confirmed)
+
+Sprites come from the YOLO-labelled dataset (boxes from the label files)
+or from breached/ (boxes from the evidence index; whole image otherwise).
+
+Usage:
+    python load_generator.py --cameras 1 2 4 8 --duration 30 --workers 2
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import logging
+import argparse
+import collections
+
+import cv2
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BASE_DIR), "training_data"))
+
+from detection_policy import DetectionPolicy, POLICY_FILE
+from evidence_store import INDEX_NAME, EVIDENCE_RE
+
+# --- CONFIGURATION ---
+DATASET_YAML = os.path.join(os.path.dirname(BASE_DIR), "training_data", "dataset", "data.yaml")
+EVIDENCE_DIR = os.path.join(os.path.dirname(BASE_DIR), "breached")
+FRAME_SIZE = (640, 480)
+FPS = 15
+DENSITY = 1.0               # Mean number of animals in view per camera
+SPEED = 80                  # Pixels per second
+SPRITE_SCALE = (0.25, 0.5)  # Sprite height as a fraction of the frame height
+MIN_VISIBLE = 0.5           # Fraction of a sprite in frame before it counts as "in view"
+MATCH_IOU = 0.3
+MAX_SPRITES = 200
+CONFIRMATION_FRAMES = 5     # Used if the policy file cannot be read
+
+
+# --- SPRITES ---
+def _crop(img, box):
+    x1, y1, x2, y2 = [int(v) for v in box]
+    h, w = img.shape[:2]
+    x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+    if x2 - x1 < 16 or y2 - y1 < 16:
+        return None
+    return img[y1:y2, x1:x2].copy()
+
+
+def load_dataset_sprites(data_yaml=DATASET_YAML, limit=MAX_SPRITES):
+    """[(species, crop)] from YOLO label boxes"""
+    from dataset_cache import resolve_split_dirs, label_path_for, read_label_file, IMAGE_EXTS
+    import yaml
+
+    if not os.path.exists(data_yaml):
+        return []
+    with open(data_yaml) as f:
+        names = yaml.safe_load(f).get('names', [])
+    sprites = []
+    for image_dir in resolve_split_dirs(data_yaml).values():
+        for path in sorted(glob.glob(os.path.join(image_dir, "*"))):
+            if len(sprites) >= limit:
+                return sprites
+            rows = read_label_file(label_path_for(path))
+            if not path.lower().endswith(IMAGE_EXTS) or not rows:
+                continue
+            img = cv2.imread(path)
+            if img is None:
+                continue
+            h, w = img.shape[:2]
+            for cls, cx, cy, bw, bh in rows:
+                crop = _crop(img, ((cx - bw / 2) * w, (cy - bh / 2) * h, (cx + bw / 2) * w, (cy + bh / 2) * h))
+                if crop is not None:
+                    species = names[cls] if cls < len(names) else str(cls)
+                    sprites.append((species, crop))
+    return sprites
+
+
+def _evidence_records(folder):
+    """Index records if breached/ has an index, else what the file names tell (read-only either way)"""
+    index_path = os.path.join(folder, INDEX_NAME)
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    for path in sorted(glob.glob(os.path.join(folder, "*.jpg"))):
+        m = EVIDENCE_RE.match(os.path.basename(path))
+        if m:
+            yield {'file': os.path.basename(path), 'species': m.group(2).replace('_', ' '), 'box': None}
+
+
+def load_evidence_sprites(folder=EVIDENCE_DIR, limit=MAX_SPRITES):
+    """[(species, crop)] from saved evidence (box from the index when known)"""
+    if not os.path.isdir(folder):
+        return []
+    sprites = []
+    for record in _evidence_records(folder):
+        if len(sprites) >= limit:
+            break
+        img = cv2.imread(os.path.join(folder, record['file']))
+        if img is None:
+            continue
+        crop = _crop(img, record['box']) if record.get('box') else img
+        if crop is not None:
+            sprites.append((record['species'], crop))
+    return sprites
+
+
+def load_sprites(data_yaml=DATASET_YAML, evidence_dir=EVIDENCE_DIR, limit=MAX_SPRITES):
+    sprites = load_dataset_sprites(data_yaml, limit) or load_evidence_sprites(evidence_dir, limit)
+    if not sprites:
+        raise FileNotFoundError("No sprites: need a labelled dataset or images in breached/")
+    logging.info(f"🐘 {len(sprites)} sprites loaded")
+    return sprites
+
+
+def make_background(size=FRAME_SIZE, rng=None):
+    """Terrain-like plate: smooth colour noise, upscaled"""
+    rng = rng or np.random.default_rng()
+    w, h = size
+    coarse = rng.integers(40, 160, (h // 32 + 1, w // 32 + 1, 3), dtype=np.uint8)
+    coarse[..., 1] = np.clip(coarse[..., 1].astype(np.int16) + 30, 0, 255)    # A bit greener
+    plate = cv2.resize(coarse, (w, h), interpolation=cv2.INTER_CUBIC)
+    return cv2.GaussianBlur(plate, (0, 0), 3)
+
+
+def load_backgrounds(folder, size=FRAME_SIZE):
+    plates = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        img = cv2.imread(path)
+        if img is not None:
+            plates.append(cv2.resize(img, size, interpolation=cv2.INTER_AREA))
+    return plates
+
+
+def iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+# --- VIRTUAL CAMERA ---
+class _Animal:
+    __slots__ = ("id", "species", "sprite", "x0", "y0", "vx", "vy", "t0")
+
+    def position(self, t):
+        return self.x0 + self.vx * (t - self.t0), self.y0 + self.vy * (t - self.t0)
+
+
+class VirtualCamera:
+    """
+    cv2.VideoCapture look-alike producing composited frames on a fixed clock.
+
+    Frames are due every 1/fps seconds; a consumer that falls behind gets
+    the latest frame and the skipped ones count as dropped.
+    `truth` holds [(animal_id, species, box)] for the frame last returned.
+    """
+    def __init__(self, sprites, camera_id=0, size=FRAME_SIZE, fps=FPS, density=DENSITY,
+                 speed=SPEED, backgrounds=None, seed=None):
+        self.camera_id = camera_id
+        self.sprites = sprites
+        self.size = size
+        self.fps = fps
+        self.density = density
+        self.speed = speed
+        self.rng = random.Random(seed)
+        self.background = (self.rng.choice(backgrounds) if backgrounds
+                           else make_background(size, np.random.default_rng(seed)))
+
+        self.animals = []
+        self.next_id = camera_id * 1_000_000 + 1
+        self.t_start = time.monotonic()
+        self.last_tick = -1
+        self.last_spawn_t = 0.0
+        self.dropped = 0
+        self.emitted = 0
+        self.truth = []
+        self.timestamp = None       # time.monotonic() of the frame last returned
+        self.opened = True
+
+        # Spawn rate so that on average `density` animals are in view
+        mean_width = size[1] * sum(SPRITE_SCALE) / 2 * 1.5
+        crossing_s = (size[0] + mean_width) / max(speed, 1e-6)
+        self.spawn_rate = density / crossing_s
+
+    # --- SCENE ---
+    def _spawn(self, t):
+        species, crop = self.rng.choice(self.sprites)
+        w, h = self.size
+        target_h = int(h * self.rng.uniform(*SPRITE_SCALE))
+        scale = target_h / crop.shape[0]
+        sprite = cv2.resize(crop, (max(8, int(crop.shape[1] * scale)), max(8, target_h)),
+                            interpolation=cv2.INTER_AREA)
+        if self.rng.random() < 0.5:
+            sprite = sprite[:, ::-1].copy()      # Walking the other way
+
+        a = _Animal()
+        a.id, a.species, a.sprite, a.t0 = self.next_id, species, sprite, t
+        self.next_id += 1
+        from_left = self.rng.random() < 0.5
+        a.x0 = -sprite.shape[1] if from_left else w
+        a.y0 = self.rng.uniform(0, max(1, h - sprite.shape[0]))
+        a.vx = self.speed if from_left else -self.speed
+        a.vy = self.rng.uniform(-0.15, 0.15) * self.speed
+        self.animals.append(a)
+
+    def _advance(self, t):
+        # Poisson arrivals between the previous frame and this one
+        dt = t - self.last_spawn_t
+        self.last_spawn_t = t
+        expected = self.spawn_rate * dt
+        arrivals = int(expected) + (self.rng.random() < expected - int(expected))
+        for _ in range(arrivals):
+            self._spawn(t)
+
+        w, h = self.size
+        alive = []
+        for a in self.animals:
+            x, _ = a.position(t)
+            if -a.sprite.shape[1] - 1 <= x <= w + 1:
+                alive.append(a)
+        self.animals = alive
+
+    def render(self, t):
+        """Frame and ground truth at scene time t (seconds since start)"""
+        self._advance(t)
+        frame = self.background.copy()
+        w, h = self.size
+        truth = []
+        for a in self.animals:
+            x, y = a.position(t)
+            x, y = int(round(x)), int(round(y))
+            sh, sw = a.sprite.shape[:2]
+            x1, y1, x2, y2 = max(0, x), max(0, y), min(w, x + sw), min(h, y + sh)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            frame[y1:y2, x1:x2] = a.sprite[y1 - y:y2 - y, x1 - x:x2 - x]
+            if (x2 - x1) * (y2 - y1) >= MIN_VISIBLE * sw * sh:
+                truth.append((a.id, a.species, (x1, y1, x2, y2)))
+        return frame, truth
+
+    def poll(self):
+        """Newest frame if one is due, else None (never blocks)"""
+        now = time.monotonic()
+        tick = int((now - self.t_start) * self.fps)
+        if tick <= self.last_tick:
+            return None
+        if self.last_tick >= 0:
+            self.dropped += tick - self.last_tick - 1
+        self.last_tick = tick
+        frame, self.truth = self.render(tick / self.fps)
+        self.timestamp = now
+        self.emitted += 1
+        return frame
+
+    # --- VideoCapture API ---
+    def read(self):
+        if not self.opened:
+            return False, None
+        frame = self.poll()
+        while frame is None:
+            due = self.t_start + (self.last_tick + 1) / self.fps
+            time.sleep(max(0.0, due - time.monotonic()))
+            frame = self.poll()
+        return True, frame
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.size[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.size[1]
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+
+
+# --- LOAD TEST ---
+class GroundTruthScorer:
+    """Matches detections to ground truth and tracks per-animal latency"""
+    def __init__(self, confirmation_frames):
+        self.confirmation_frames = confirmation_frames
+        self.first_seen = {}      # animal_id -> (species, capture time it came into view)
+        self.last_seen = {}
+        self.first_hit = {}
+        self.confirmed = {}
+        self.hits = collections.Counter()
+        self.frame_latency = []
+
+    def score(self, truth, capture_ts, detections, done_ts):
+        self.frame_latency.append((done_ts - capture_ts) * 1000)
+        for animal_id, species, box in truth:
+            self.first_seen.setdefault(animal_id, (species, capture_ts))
+            self.last_seen[animal_id] = capture_ts
+            matched = any(iou(box, det_box) >= MATCH_IOU for _, _, det_box in detections)
+            # Same counting rule as ThreatTracker: +1 when seen, -1 when missed
+            if matched:
+                self.first_hit.setdefault(animal_id, done_ts)
+                self.hits[animal_id] += 1
+                if self.hits[animal_id] >= self.confirmation_frames:
+                    self.confirmed.setdefault(animal_id, done_ts)
+            elif self.hits[animal_id] > 0:
+                self.hits[animal_id] -= 1
+
+    def report(self, still_visible=()):
+        """Per-species and overall latency / miss rate"""
+        per_species = collections.defaultdict(lambda: {'animals': 0, 'missed': 0, 'detect_ms': [], 'confirm_ms': []})
+        for animal_id, (species, t_in) in self.first_seen.items():
+            if animal_id in still_visible and animal_id not in self.confirmed:
+                continue     # Still in view at the end: no verdict yet
+            s = per_species[species]
+            s['animals'] += 1
+            if animal_id in self.first_hit:
+                s['detect_ms'].append((self.first_hit[animal_id] - t_in) * 1000)
+            if animal_id in self.confirmed:
+                s['confirm_ms'].append((self.confirmed[animal_id] - t_in) * 1000)
+            else:
+                s['missed'] += 1
+
+        def summary(s):
+            return {'animals': s['animals'], 'missed': s['missed'],
+                    'miss_rate': s['missed'] / s['animals'] if s['animals'] else 0.0,
+                    'detect_ms_p50': _pct(s['detect_ms'], 50), 'detect_ms_p95': _pct(s['detect_ms'], 95),
+                    'confirm_ms_p50': _pct(s['confirm_ms'], 50), 'confirm_ms_p95': _pct(s['confirm_ms'], 95)}
+
+        total = {'animals': 0, 'missed': 0, 'detect_ms': [], 'confirm_ms': []}
+        for s in per_species.values():
+            for k in total:
+                total[k] += s[k]
+        return {'species': {name: summary(s) for name, s in per_species.items()},
+                'overall': summary(total),
+                'frame_ms_p50': _pct(self.frame_latency, 50), 'frame_ms_p95': _pct(self.frame_latency, 95)}
+
+
+def _pct(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def _load_policy():
+    try:
+        return DetectionPolicy.load(POLICY_FILE)
+    except Exception as e:
+        logging.warning(f"⚠️ Policy file unusable ({e}); counting every detection")
+        return None
+
+
+def run_load_test(n_cameras, duration=30, model_path="yolov8n.pt", workers=None, sprites=None,
+                  fps=FPS, density=DENSITY, speed=SPEED, backgrounds=None, seed=0):
+    """Drives n_cameras virtual cameras through the inference pool for `duration` seconds"""
+    from inference_pool import InferencePool
+
+    sprites = sprites or load_sprites()
+    policy = _load_policy()
+    scorer = GroundTruthScorer(policy.confirmation_frames if policy else CONFIRMATION_FRAMES)
+    cameras = [VirtualCamera(sprites, camera_id=i, fps=fps, density=density, speed=speed,
+                             backgrounds=backgrounds, seed=seed + i) for i in range(n_cameras)]
+
+    pool = InferencePool(model_path, workers=workers)
+    inflight = {}         # (camera, seq) -> (truth, capture time)
+    processed = 0
+
+    def collect(results):
+        nonlocal processed
+        done = time.monotonic()
+        for camera, seq, detections, _ in results:
+            truth, captured = inflight.pop((camera, seq))
+            if detections is None:
+                continue          # Lost with a dead worker
+            if policy:
+                detections = [d for d in detections if policy.map_name(d[0], d[1])]
+            scorer.score(truth, captured, detections, done)
+            processed += 1
+
+    t_end = time.monotonic() + duration
+    try:
+        while time.monotonic() < t_end:
+            submitted = False
+            for cam in cameras:
+                frame = cam.poll()
+                if frame is not None:
+                    # submit() blocks while workers are saturated -> cameras drop frames
+                    seq = pool.submit(frame, camera=cam.camera_id)
+                    inflight[(cam.camera_id, seq)] = (cam.truth, cam.timestamp)
+                    submitted = True
+            collect(pool.results())
+            if not submitted:
+                time.sleep(0.001)
+        collect(pool.drain())
+    finally:
+        pool.close()
+
+    still_visible = {animal_id for cam in cameras for animal_id, _, _ in cam.truth}
+    report = scorer.report(still_visible)
+    emitted = sum(c.emitted for c in cameras)
+    dropped = sum(c.dropped for c in cameras)
+    report.update({'cameras': n_cameras, 'duration_s': duration, 'processed_fps': processed / duration,
+                   'frames_emitted': emitted, 'frames_dropped': dropped,
+                   'drop_rate': dropped / (emitted + dropped) if emitted + dropped else 0.0})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic multi-camera load test")
+    parser.add_argument("--cameras", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--density", type=float, default=DENSITY)
+    parser.add_argument("--speed", type=float, default=SPEED)
+    parser.add_argument("--backgrounds", help="folder of background plates (default: synthetic)")
+    parser.add_argument("--out", help="write all reports to this JSON file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    sprites = load_sprites()
+    plates = load_backgrounds(args.backgrounds) if args.backgrounds else None
+    reports = []
+    for n in args.cameras:
+        r = run_load_test(n, args.duration, args.model, args.workers, sprites,
+                          args.fps, args.density, args.speed, plates)
+        reports.append(r)
+        o = r['overall']
+        logging.info(f"📊 {n} cameras: {r['processed_fps']:.1f} FPS processed, "
+                     f"{r['drop_rate'] * 100:.0f}% frames dropped, frame p95 {r['frame_ms_p95'] or 0:.0f} ms, "
+                     f"confirm p50 {o['confirm_ms_p50'] or 0:.0f} ms, miss rate {o['miss_rate'] * 100:.0f}%")
+
+    print("\nCameras | FPS    | Dropped | Frame p95 ms | Confirm p50 ms | Miss rate")
+    for r in reports:
+        o = r['overall']
+        print(f"{r['cameras']:7d} | {r['processed_fps']:6.1f} | {r['drop_rate'] * 100:6.1f}% | "
+              f"{r['frame_ms_p95'] or 0:12.0f} | {o['confirm_ms_p50'] or 0:14.0f} | {o['miss_rate'] * 100:.1f}%")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(reports, f, indent=2)
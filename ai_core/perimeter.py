@@ -0,0 +1,211 @@
+"""
+Perimeter zones and directional tripwires.
+
+Without a perimeter any confirmed box anywhere in the frame is a breach,
+including an animal grazing on the far side of the fence. perimeter.yaml
+defines, per camera, polygon zones and tripwires in normalized (0..1)
+image coordinates:
+
+    cameras:
+      0:
+        zones:
+          - name: farm
+            points: [[0.0, 0.55], [1.0, 0.45], [1.0, 1.0], [0.0, 1.0]]
+        tripwires:
+          - name: fence
+            a: [0.0, 0.55]
+            b: [1.0, 0.45]
+            direction: right      # alert on crossings to this side of a->b ("left", "right", "both")
+        crop: true                # run the model only on the bounding region of the above
+
+Everything is rasterised once per capture resolution: a zone label mask
+(bit i set = inside zone i) and, per tripwire, a side mask (+1 / -1 on
+either side, 0 beyond the ends of the segment). Testing all tracks is
+then one fancy-indexing lookup of their footprints (bottom-centre of the
+box, where the animal touches the ground); a crossing is a track whose
+side flipped since the last frame. Sides are followed for every tracked
+detection, confirmed or not, so an animal that crosses while ThreatTracker
+is still confirming it breaches as soon as it is confirmed.
+
+    perimeter = Perimeter.load(PERIMETER_FILE, camera_id)   # None: whole frame counts
+    breaches = perimeter.check(confirmed_threats, tracker.track_ids, frame.shape, raw_detections)
+"""
+
+import os
+import logging
+
+import cv2
+import numpy as np
+import yaml
+
+# --- CONFIGURATION ---
+PERIMETER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perimeter.yaml")
+CROP_MARGIN = 0.05        # Fraction of the frame added around the crop region
+MAX_ZONES = 32            # Zone label mask is uint32 (one bit per zone)
+DIRECTIONS = {"left": -1, "right": 1, "both": 0}    # Side the animal must end up on
+ZONE_COLOR = (0, 200, 255)
+WIRE_COLOR = (255, 0, 255)
+
+
+def _point(value, what):
+    if not (isinstance(value, (list, tuple)) and len(value) == 2
+            and all(isinstance(v, (int, float)) and 0.0 <= v <= 1.0 for v in value)):
+        raise ValueError(f"{what} must be [x, y] with 0 <= x, y <= 1, got {value!r}")
+    return float(value[0]), float(value[1])
+
+
+class Perimeter:
+    """One camera's zones and tripwires, rasterised for the current frame size"""
+    def __init__(self, zones=(), tripwires=(), crop=False):
+        self.zones = [(z['name'], [_point(p, f"zone '{z['name']}' point") for p in z['points']]) for z in zones]
+        self.tripwires = []
+        for w in tripwires:
+            direction = w.get('direction', 'both')
+            if direction not in DIRECTIONS:
+                raise ValueError(f"tripwire '{w['name']}' direction must be one of {list(DIRECTIONS)}")
+            self.tripwires.append((w['name'], _point(w['a'], "tripwire a"), _point(w['b'], "tripwire b"),
+                                   DIRECTIONS[direction]))
+        if len(self.zones) > MAX_ZONES:
+            raise ValueError(f"at most {MAX_ZONES} zones per camera")
+        if any(len(points) < 3 for _, points in self.zones):
+            raise ValueError("a zone needs at least 3 points")
+        self.crop = crop
+        self.shape = None
+        self.zone_mask = None      # (h, w) uint32, bit i = zone i
+        self.side_masks = None     # (n_wires, h, w) int8
+        self.crop_box = None
+        self.last_side = {}        # track id -> (n_wires,) side at the previous footprint
+        self.crossed = set()       # Track ids that crossed and haven't been reported yet
+
+    @classmethod
+    def load(cls, path=PERIMETER_FILE, camera=0):
+        """Perimeter of `camera` from the config file, or None (whole frame counts)"""
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        config = (data.get('cameras') or {}).get(camera)
+        if not config or not (config.get('zones') or config.get('tripwires')):
+            return None
+        perimeter = cls(config.get('zones') or (), config.get('tripwires') or (), bool(config.get('crop', False)))
+        logging.info(f"🚧 Perimeter for camera {camera}: {len(perimeter.zones)} zone(s), "
+                     f"{len(perimeter.tripwires)} tripwire(s){', cropped inference' if perimeter.crop else ''}")
+        return perimeter
+
+    # --- RASTERISATION (once per resolution) ---
+    def _rasterise(self, shape):
+        h, w = shape[:2]
+        self.zone_mask = np.zeros((h, w), np.uint32)
+        single = np.zeros((h, w), np.uint8)
+        for i, (_, points) in enumerate(self.zones):
+            single[:] = 0
+            cv2.fillPoly(single, [np.array([(x * (w - 1), y * (h - 1)) for x, y in points], np.int32)], 1)
+            self.zone_mask |= single.astype(np.uint32) << np.uint32(i)
+
+        self.side_masks = np.zeros((len(self.tripwires), h, w), np.int8)
+        ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+        for i, (_, (ax, ay), (bx, by), _) in enumerate(self.tripwires):
+            ax, ay, bx, by = ax * (w - 1), ay * (h - 1), bx * (w - 1), by * (h - 1)
+            dx, dy = bx - ax, by - ay
+            cross = dx * (ys - ay) - dy * (xs - ax)          # > 0: right of a->b (image y points down)
+            along = ((xs - ax) * dx + (ys - ay) * dy) / max(dx * dx + dy * dy, 1e-6)
+            within = (along >= 0) & (along <= 1)             # Passing beside the wire doesn't count
+            self.side_masks[i] = np.where(within, np.sign(cross), 0).astype(np.int8)
+
+        self.crop_box = self._crop_box(h, w) if self.crop else None
+        self.shape = shape[:2]
+        self.last_side.clear()        # Old footprints are in the old resolution
+        self.crossed.clear()
+
+    def _crop_box(self, h, w):
+        """Bounding region of all zones and tripwires, plus a margin"""
+        points = [p for _, pts in self.zones for p in pts]
+        points += [p for _, a, b, _ in self.tripwires for p in (a, b)]
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        x1, x2 = max(0.0, min(xs) - CROP_MARGIN), min(1.0, max(xs) + CROP_MARGIN)
+        y1, y2 = max(0.0, min(ys) - CROP_MARGIN), min(1.0, max(ys) + CROP_MARGIN)
+        box = (int(x1 * w), int(y1 * h), int(np.ceil(x2 * w)), int(np.ceil(y2 * h)))
+        return None if box == (0, 0, w, h) else box
+
+    def prepare(self, shape):
+        if shape[:2] != self.shape:
+            self._rasterise(shape)
+
+    # --- PER FRAME ---
+    def roi(self, shape):
+        """(x1, y1, x2, y2) the model needs to see, or None for the whole frame"""
+        self.prepare(shape)
+        return self.crop_box
+
+    def _footprints(self, boxes):
+        h, w = self.shape
+        boxes = np.asarray(boxes, np.int32).reshape(-1, 4)
+        xs = np.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, w - 1)
+        ys = np.clip(boxes[:, 3], 0, h - 1)
+        return ys, xs
+
+    def zones_of(self, boxes):
+        """Zone bitmask per box (0 = outside every zone)"""
+        ys, xs = self._footprints(boxes)
+        return self.zone_mask[ys, xs]
+
+    def crossings(self, boxes, track_ids):
+        """(n_boxes,) bool: the footprint crossed a tripwire in its alert direction since last frame"""
+        if not self.tripwires:
+            return np.zeros(len(track_ids), bool)
+        ys, xs = self._footprints(boxes)
+        sides = self.side_masks[:, ys, xs]                              # (n_wires, n_boxes)
+        none = np.zeros(len(self.tripwires), np.int8)
+        previous = np.stack([self.last_side.get(t, none) for t in track_ids], axis=1)
+        directions = np.array([d for _, _, _, d in self.tripwires], np.int8)[:, None]
+        flipped = (previous != 0) & (sides != 0) & (previous != sides)
+        wanted = (directions == 0) | (sides == directions)
+        for i, t in enumerate(track_ids):
+            self.last_side[t] = sides[:, i]
+        return (flipped & wanted).any(axis=0)
+
+    def observe(self, detections, track_ids):
+        """Follows every tracked footprint; a crossing is kept until its track is confirmed"""
+        tracked = [(track_ids[name], box) for name, _, box in detections if name in track_ids]
+        if not tracked or not self.tripwires:
+            return
+        ids = [t for t, _ in tracked]
+        hits = self.crossings([box for _, box in tracked], ids)
+        self.crossed.update(t for t, hit in zip(ids, hits) if hit)
+
+    def check(self, threats, track_ids, shape, detections=None):
+        """
+        Confirmed threats that breach the perimeter.
+
+        Args:
+            threats: [(name, conf, box)] from ThreatTracker
+            track_ids: {name: track id}, ThreatTracker.track_ids
+            shape: frame shape (masks are rebuilt when it changes)
+            detections: every tracked detection of this frame (default: the threats)
+        """
+        self.prepare(shape)
+        active = set(track_ids.values())
+        for t in list(self.last_side):
+            if t not in active:
+                del self.last_side[t]            # Lost tracks start fresh
+        self.crossed &= active
+        self.observe(threats if detections is None else detections, track_ids)
+        if not threats:
+            return []
+        boxes = [box for _, _, box in threats]
+        inside = self.zones_of(boxes) != 0 if self.zones else np.zeros(len(threats), bool)
+        ids = [track_ids.get(name, -1) for name, _, _ in threats]
+        crossed = np.array([t in self.crossed for t in ids], bool)
+        self.crossed.difference_update(ids)      # Each crossing alerts once
+        return [t for t, hit in zip(threats, inside | crossed) if hit]
+
+    def draw(self, frame):
+        """Outlines zones and tripwires (for the display and evidence)"""
+        h, w = frame.shape[:2]
+        for name, points in self.zones:
+            pts = np.array([(x * (w - 1), y * (h - 1)) for x, y in points], np.int32)
+            cv2.polylines(frame, [pts], True, ZONE_COLOR, 2)
+        for name, (ax, ay), (bx, by), _ in self.tripwires:
+            a, b = (int(ax * (w - 1)), int(ay * (h - 1))), (int(bx * (w - 1)), int(by * (h - 1)))
+            cv2.line(frame, a, b, WIRE_COLOR, 2)
+            cv2.putText(frame, name, a, cv2.FONT_HERSHEY_SIMPLEX, 0.5, WIRE_COLOR, 1)
@@ -0,0 +1,216 @@
+"""
+Asyncio pipeline runtime with backpressured stages.
+
+A pipeline is a source plus stages connected by bounded queues:
+
+    capture -> infer -> track -> alert
+                             \\-> record
+                             \\-> publish
+
+Every stage input queue has an explicit policy when it is full:
+    BLOCK        - the upstream stage waits (nothing is lost)
+    DROP_OLDEST  - the oldest queued item is thrown away (stay real-time)
+
+Blocking or CPU-heavy functions run in an executor so a slow sink (e.g.
+a WhatsApp send) can never stall capture and inference.
+
+Example:
+    pipe = Pipeline()
+    pipe.add_source("capture", read_frame)
+    pipe.add_stage("infer", detect, after="capture", cpu_bound=True, policy=DROP_OLDEST, maxsize=2)
+    pipe.add_stage("alert", send, after="infer", policy=BLOCK, maxsize=100)
+    asyncio.run(pipe.run())
+"""
+
+import time
+import asyncio
+import logging
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURATION ---
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+REPORT_EVERY = 1.0        # Seconds between stage-rate updates (logged at DEBUG)
+LOG_EVERY = 60.0          # Seconds between stage summaries at INFO (0: never)
+
+_STOP = object()          # End-of-stream marker passed down the queues
+
+
+class StageQueue:
+    """asyncio.Queue with a full-queue policy and a drop counter"""
+    def __init__(self, maxsize, policy=BLOCK):
+        if policy not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    async def put(self, item):
+        if item is _STOP or self.policy == BLOCK:
+            await self.queue.put(item)
+            return
+        while self.queue.full():
+            old = self.queue.get_nowait()
+            if old is _STOP:
+                # Never drop the end-of-stream marker
+                self.queue.put_nowait(old)
+                return
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class Stage:
+    """One named step: reads its input queue, calls func, fans out the result"""
+    def __init__(self, name, func, cpu_bound=False, inbox=None):
+        self.name = name
+        self.func = func
+        self.cpu_bound = cpu_bound
+        self.inbox = inbox
+        self.outputs = []
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+
+    async def call(self, loop, executor, *args):
+        t0 = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(self.func):
+                return await self.func(*args)
+            if self.cpu_bound:
+                return await loop.run_in_executor(executor, self.func, *args)
+            return self.func(*args)
+        finally:
+            self.busy_time += time.perf_counter() - t0
+
+    async def emit(self, item):
+        for queue in self.outputs:
+            await queue.put(item)
+
+
+class Pipeline:
+    """Wires stages together and runs them as asyncio tasks"""
+    def __init__(self, executor=None, report_every=REPORT_EVERY, log_every=LOG_EVERY):
+        self.stages = {}
+        self.source = None
+        self.executor = executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix="drishtix")
+        self.report_every = report_every
+        self.log_every = log_every
+        self.rates = {}               # {stage: items/s over the last report window}
+        self._stopping = False
+        self._last_counts = {}
+
+    # --- BUILDING ---
+    def add_source(self, name, func, cpu_bound=True):
+        """func() returns the next item, or None at end of stream"""
+        stage = Stage(name, func, cpu_bound=cpu_bound)
+        self.stages[name] = stage
+        self.source = stage
+        return stage
+
+    def add_stage(self, name, func, after, maxsize=2, policy=BLOCK, cpu_bound=False):
+        """
+        func(item) returns the item to pass on, or None to pass nothing.
+
+        Args:
+            after (str): Name of the upstream stage
+            maxsize (int): Input queue bound
+            policy (str): BLOCK or DROP_OLDEST when the input queue is full
+            cpu_bound (bool): Run func in the executor instead of the event loop
+        """
+        upstream = self.stages[after]
+        stage = Stage(name, func, cpu_bound=cpu_bound, inbox=StageQueue(maxsize, policy))
+        upstream.outputs.append(stage.inbox)
+        self.stages[name] = stage
+        return stage
+
+    def stop(self):
+        """Asks the source to stop; queued items drain through the stages"""
+        self._stopping = True
+
+    # --- RUNNING ---
+    async def _run_source(self, loop):
+        stage = self.source
+        while not self._stopping:
+            try:
+                item = await stage.call(loop, self.executor)
+            except Exception as e:
+                stage.errors += 1
+                logging.error(f"❌ Stage {stage.name} failed: {e}")
+                break
+            if item is None:
+                break
+            stage.processed += 1
+            await stage.emit(item)
+        await stage.emit(_STOP)
+
+    async def _run_stage(self, loop, stage):
+        while True:
+            item = await stage.inbox.get()
+            if item is _STOP:
+                await stage.emit(_STOP)
+                return
+            try:
+                result = await stage.call(loop, self.executor, item)
+            except Exception as e:
+                stage.errors += 1
+                logging.error(f"❌ Stage {stage.name} failed: {e}")
+                continue
+            stage.processed += 1
+            if result is not None:
+                await stage.emit(result)
+
+    async def _report(self):
+        last_info = time.monotonic()
+        while True:
+            await asyncio.sleep(self.report_every)
+            parts = []
+            for name, stage in self.stages.items():
+                count = stage.processed - self._last_counts.get(name, 0)
+                self._last_counts[name] = stage.processed
+                self.rates[name] = count / self.report_every
+                part = f"{name} {self.rates[name]:.1f}/s"
+                if stage.inbox is not None and stage.inbox.dropped:
+                    part += f" (dropped {stage.inbox.dropped})"
+                parts.append(part)
+            # An unattended node runs for months: the per-second summary is for debugging only
+            level = logging.DEBUG
+            if self.log_every and time.monotonic() - last_info >= self.log_every:
+                level, last_info = logging.INFO, time.monotonic()
+            logging.log(level, "📈 " + " | ".join(parts))
+
+    async def run(self):
+        if self.source is None:
+            raise RuntimeError("Pipeline has no source")
+        loop = asyncio.get_running_loop()
+        workers = [asyncio.create_task(self._run_stage(loop, s))
+                   for s in self.stages.values() if s is not self.source]
+        reporter = asyncio.create_task(self._report())
+        try:
+            await self._run_source(loop)
+            await asyncio.gather(*workers)
+        finally:
+            reporter.cancel()
+            for task in workers:
+                task.cancel()
+            self.executor.shutdown(wait=False)
+
+    def stats(self):
+        """Per-stage totals for dashboards / logs"""
+        return {
+            name: {
+                'processed': s.processed,
+                'errors': s.errors,
+                'rate': self.rates.get(name, 0.0),
+                'busy_s': s.busy_time,
+                'queued': s.inbox.qsize() if s.inbox else 0,
+                'dropped': s.inbox.dropped if s.inbox else 0,
+            }
+            for name, s in self.stages.items()
+        }
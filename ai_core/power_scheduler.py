@@ -0,0 +1,175 @@
+"""
+Duty-cycled power/throughput scheduler for unattended nodes.
+
+The node sits in one of three states:
+    IDLE    - cheap motion check at ~1 FPS, no YOLO at all
+    WATCH   - something moved (or it is night): nano model at a few FPS
+    ENGAGED - an animal is in view: full frame rate until it leaves
+
+Each state has its own target FPS, model and capture resolution. Moving
+up is immediate so an approaching animal is picked up within a frame or
+two; moving down needs the trigger to stay quiet for a hold period.
+
+Nodes without an ultrasonic sensor feed a distance estimated from the
+nearest box (estimate_distance): an animal filling the frame height is
+about FRAME_FILL_CM away, one half as tall twice that.
+"""
+
+import time
+import logging
+from datetime import datetime
+
+import cv2
+
+# --- CONFIGURATION ---
+IDLE = "IDLE"
+WATCH = "WATCH"
+ENGAGED = "ENGAGED"
+STATES = (IDLE, WATCH, ENGAGED)
+
+STATE_PROFILES = {
+    IDLE:    {'fps': 1,  'model': None,         'resolution': (320, 240)},
+    WATCH:   {'fps': 5,  'model': "yolov8n.pt", 'resolution': (640, 480)},
+    ENGAGED: {'fps': 15, 'model': "yolov8n.pt", 'resolution': (640, 480)},
+}
+
+MOTION_ON = 0.02        # Fraction of changed pixels that wakes the node
+MOTION_OFF = 0.005      # ...and the level it must fall below to count as quiet
+WAKE_DISTANCE_CM = 150  # Ultrasonic reading that wakes the node
+FRAME_FILL_CM = 100     # Rough distance at which an animal fills the frame height
+WATCH_HOLD = 30         # Seconds of quiet before WATCH -> IDLE
+ENGAGED_HOLD = 10       # Seconds without detections before ENGAGED -> WATCH
+NIGHT_HOURS = (18, 6)   # Crop raids happen at night: never go below WATCH
+METRICS_LOG_EVERY = 300 # Seconds between state-time summaries in the log
+
+
+def estimate_distance(detections, frame_shape, fill_cm=FRAME_FILL_CM):
+    """Distance (cm) of the nearest [(name, conf, box)] from its box height, or None"""
+    heights = [y2 - y1 for _, _, (x1, y1, x2, y2) in detections]
+    if not heights:
+        return None
+    return fill_cm * frame_shape[0] / max(max(heights), 1)
+
+
+class MotionDetector:
+    """Frame differencing against a running background on a tiny grey image"""
+    def __init__(self, size=(64, 48), alpha=0.05, pixel_delta=25):
+        self.size = size
+        self.alpha = alpha
+        self.pixel_delta = pixel_delta
+        self.background = None
+
+    def score(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        grey = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self.background is None:
+            self.background = grey.astype("float32")
+            return 0.0
+        diff = cv2.absdiff(grey, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(grey, self.background, self.alpha)
+        return float((diff > self.pixel_delta).mean())
+
+
+class PowerScheduler:
+    """IDLE / WATCH / ENGAGED state machine with per-state frame pacing"""
+    def __init__(self, profiles=None, night_hours=NIGHT_HOURS, clock=time.monotonic):
+        self.profiles = profiles or STATE_PROFILES
+        self.night_hours = night_hours
+        self.clock = clock
+        self.motion = MotionDetector()
+
+        now = clock()
+        self.state = IDLE
+        self.state_since = now
+        self.time_in_state = {s: 0.0 for s in STATES}
+        self.transitions = 0
+        self.last_activity = now      # Motion / near distance
+        self.last_detection = 0.0
+        self.next_frame_at = now
+        self.last_metrics_log = now
+
+    @property
+    def profile(self):
+        return self.profiles[self.state]
+
+    def is_night(self):
+        start, end = self.night_hours
+        hour = datetime.now().hour
+        return hour >= start or hour < end if start > end else start <= hour < end
+
+    # --- INPUTS ---
+    def observe(self, frame=None, distance_cm=None, detections=None):
+        """
+        Feeds in whatever is known about the latest frame.
+
+        Returns:
+            bool: True if the state changed (caller should apply the new profile)
+        """
+        now = self.clock()
+        woke = False
+
+        if frame is not None:
+            score = self.motion.score(frame)
+            if score >= MOTION_ON:
+                woke = True
+            if score >= MOTION_OFF:
+                self.last_activity = now
+        if distance_cm is not None and distance_cm < WAKE_DISTANCE_CM:
+            woke = True
+            self.last_activity = now
+        if detections:
+            self.last_detection = now
+            self.last_activity = now
+
+        # Escalate immediately, de-escalate only after a quiet hold period
+        if detections:
+            target = ENGAGED
+        elif self.state == ENGAGED:
+            target = ENGAGED if now - self.last_detection < ENGAGED_HOLD else WATCH
+        elif woke or self.is_night():
+            target = WATCH
+        elif self.state == WATCH:
+            target = WATCH if now - self.last_activity < WATCH_HOLD else IDLE
+        else:
+            target = IDLE
+
+        return self._set_state(target, now)
+
+    def _set_state(self, target, now):
+        if now - self.last_metrics_log > METRICS_LOG_EVERY:
+            self.last_metrics_log = now
+            logging.info("🔋 Duty cycle: " + ", ".join(
+                f"{s} {pct:.0f}%" for s, pct in self.metrics()['percent'].items()))
+
+        if target == self.state:
+            return False
+        self.time_in_state[self.state] += now - self.state_since
+        logging.info(f"🔋 Power state {self.state} -> {target}")
+        self.state = target
+        self.state_since = now
+        self.transitions += 1
+        self.next_frame_at = now   # React on the very next frame
+        return True
+
+    # --- PACING ---
+    def throttle(self):
+        """Sleeps until the current state's next frame slot"""
+        now = self.clock()
+        if self.next_frame_at > now:
+            time.sleep(self.next_frame_at - now)
+            now = self.next_frame_at
+        self.next_frame_at = max(self.next_frame_at, now) + 1.0 / self.profile['fps']
+
+    # --- METRICS ---
+    def metrics(self):
+        """Seconds and share of wall time spent in each state"""
+        now = self.clock()
+        seconds = dict(self.time_in_state)
+        seconds[self.state] += now - self.state_since
+        total = sum(seconds.values()) or 1.0
+        return {
+            'state': self.state,
+            'seconds': seconds,
+            'percent': {s: 100.0 * t / total for s, t in seconds.items()},
+            'transitions': self.transitions,
+        }
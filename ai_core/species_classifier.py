@@ -0,0 +1,156 @@
+"""
+Two-stage detection cascade: species classification on confirmed crops.
+
+NAME_MAP's proxy trick (cat -> TIGER, dog -> WILD BOAR) exists because one
+small COCO detector has to both find and identify animals. In cascade
+mode the nano detector only has to find "an animal", and a stronger
+image classifier names the species, but only for boxes that passed
+ThreatTracker confirmation, and only a few times per track:
+
+    frame ──> nano detector ──> ThreatTracker ──> confirmed box ──> crop ──> classifier
+              (every frame)                       (per track: first confirmation,
+                                                   then every RECLASSIFY_EVERY frames
+                                                   until VOTES results, then cached)
+
+The per-frame cost stays at nano level; the classifier runs a handful of
+times per animal. Its verdict is a vote over those runs, so one bad crop
+doesn't rename a tiger. A "none of our species" verdict (a village dog)
+drops the threat instead of alerting as WILD BOAR, but only once all
+VOTES are in, a clear majority agrees and it is confident beyond
+SUPPRESS_CONFIDENCE: a missed tiger costs more than a false alarm.
+Classes next to ours (leopard, water buffalo, ...) never vote to drop.
+
+The default classifier is ImageNet-trained (CLASS_MAP below). A classifier
+trained on the project's own crops, with class names equal to the species
+(TIGER, ELEPHANT, ...), works without a map.
+"""
+
+import logging
+import collections
+
+# --- CONFIGURATION ---
+CLASSIFIER_PATH = "yolov8s-cls.pt"
+CLASSIFIER_IMGSZ = 224
+CROP_MARGIN = 0.15        # Context around the box (fraction of its size)
+MIN_CONFIDENCE = 0.25     # Lower top-1 scores don't vote
+SUPPRESS_CONFIDENCE = 0.6 # Mean score a "not ours" majority needs to drop a threat
+VOTES = 3                 # Classifications per track before the label is frozen
+RECLASSIFY_EVERY = 10     # Frames between classifications of the same track
+SPECIES = ("TIGER", "ELEPHANT", "WILD BOAR", "DEER")
+
+# ImageNet class -> species (the rest is "not a threat")
+CLASS_MAP = {
+    "tiger": "TIGER",
+    "jaguar": "TIGER",         # Other big cats: same response at the fence
+    "leopard": "TIGER",
+    "snow leopard": "TIGER",
+    "lion": "TIGER",
+    "cheetah": "TIGER",
+    "cougar": "TIGER",
+    "African elephant": "ELEPHANT",
+    "Indian elephant": "ELEPHANT",
+    "tusker": "ELEPHANT",
+    "wild boar": "WILD BOAR",
+    "hog": "WILD BOAR",
+    "warthog": "WILD BOAR",
+    "impala": "DEER",
+    "gazelle": "DEER",
+    "hartebeest": "DEER",
+    "ibex": "DEER",
+}
+
+# ImageNet classes close to ours but not clearly one of them: the vote keeps
+# the detector's label instead of renaming or dropping the threat
+NEIGHBOURS = {"tiger cat", "lynx", "water buffalo", "ox", "bison", "ram", "sorrel", "hippopotamus"}
+KEEP = "KEEP"
+
+
+class SpeciesClassifier:
+    """Crop -> (species or None, confidence)"""
+    def __init__(self, model_path=CLASSIFIER_PATH, imgsz=CLASSIFIER_IMGSZ, class_map=CLASS_MAP):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+        self.class_map = class_map
+        self.calls = 0
+        logging.info(f"🧬 Species classifier loaded: {model_path}")
+
+    def species_of(self, class_name):
+        """Species, KEEP (a neighbouring class) or None (not a threat)"""
+        if class_name in self.class_map:
+            return self.class_map[class_name]
+        if class_name in NEIGHBOURS:
+            return KEEP
+        return class_name.upper() if class_name.upper() in SPECIES else None
+
+    def __call__(self, crop):
+        self.calls += 1
+        probs = self.model(crop, imgsz=self.imgsz, verbose=False)[0].probs
+        return self.species_of(self.model.names[int(probs.top1)]), float(probs.top1conf)
+
+
+def crop_box(frame, box, margin=CROP_MARGIN):
+    """The box plus some context, clipped to the frame"""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = box
+    mx, my = int((x2 - x1) * margin), int((y2 - y1) * margin)
+    return frame[max(0, y1 - my):min(h, y2 + my), max(0, x1 - mx):min(w, x2 + mx)]
+
+
+class SpeciesCache:
+    """Per-track classifier votes; the classifier is only called while a track is undecided"""
+    def __init__(self, classifier, votes=VOTES, every=RECLASSIFY_EVERY):
+        self.classifier = classifier
+        self.votes = votes
+        self.every = every
+        self.tracks = {}          # track id -> {'votes': [(species, conf)], 'wait': frames until next run}
+        self.hits = self.misses = 0
+
+    def label(self, track_id, frame, box):
+        """
+        Classifier verdict for a confirmed track.
+
+        Returns:
+            (species, conf), species None meaning "not one we alert on";
+            or None to keep the detector's label (undecided).
+        """
+        state = self.tracks.setdefault(track_id, {'votes': [], 'wait': 0})
+        if len(state['votes']) < self.votes and state['wait'] <= 0:
+            crop = crop_box(frame, box)
+            if crop.size:
+                species, conf = self.classifier(crop)
+                if conf >= MIN_CONFIDENCE:
+                    state['votes'].append((species, conf))
+            state['wait'] = self.every
+            self.misses += 1
+        else:
+            state['wait'] -= 1
+            self.hits += 1
+        return self._verdict(state['votes'], self.votes)
+
+    @staticmethod
+    def _verdict(votes, needed=VOTES):
+        # Dropping a threat needs every vote, a clear majority and a higher bar
+        rejections = [conf for species, conf in votes if species is None]
+        if (len(votes) >= needed and len(rejections) * 2 > len(votes)
+                and sum(rejections) / len(rejections) >= SUPPRESS_CONFIDENCE):
+            return None, sum(rejections) / len(rejections)
+
+        # Renaming: the most voted species; KEEP and "not ours" votes leave the detector's label
+        counts = collections.Counter(species for species, _ in votes if species not in (None, KEEP))
+        if not counts:
+            return None
+        species = counts.most_common(1)[0][0]
+        confs = [conf for s, conf in votes if s == species]
+        return species, sum(confs) / len(confs)
+
+    def forget(self, active_ids):
+        """Drops tracks ThreatTracker no longer knows"""
+        for track_id in list(self.tracks):
+            if track_id not in active_ids:
+                del self.tracks[track_id]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'classifications': self.misses, 'cached': self.hits,
+                'cache_ratio': self.hits / total if total else 0.0}
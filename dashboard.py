@@ -6,9 +6,10 @@ import threading
 import subprocess
 from datetime import datetime
 from ultralytics import YOLO
-import pygame  # NOW INSTALLED
 # Import the improved WhatsApp sender
 from ai_core.whatsapp_sender import send_alert_with_image
+from ai_core.audio_alerts import AudioEngine, SOUND_FILES
+from ai_core.evidence_store import EvidenceStore
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="DrishtiX Command Center", layout="wide", page_icon="🐘")
@@ -16,13 +17,14 @@ TARGET_PHONE = "+918100661171"  # Your verified number
 SIREN_FILE = "alarm.mp3"        # Must be in the same folder
 
 # --- INITIALIZE AUDIO ---
-try:
-    pygame.mixer.init()
-    # Check if file exists to prevent crash
-    if not os.path.exists(SIREN_FILE):
-        st.error(f"⚠️ MISSING SOUND FILE: {SIREN_FILE}. Please download it!")
-except Exception as e:
-    print(f"Audio Init Error: {e}")
+# Decoded once per server process (Streamlit reruns this script on every interaction)
+@st.cache_resource
+def get_audio_engine():
+    return AudioEngine(sound_files={species: SIREN_FILE for species in SOUND_FILES})
+
+audio = get_audio_engine()
+if not os.path.exists(SIREN_FILE):
+    st.error(f"⚠️ MISSING SOUND FILE: {SIREN_FILE}. Please download it!")
 
 # Custom CSS
 st.markdown("""
@@ -41,36 +43,20 @@ if 'last_alert_time' not in st.session_state:
     st.session_state['last_alert_time'] = 0
 
 # --- HELPER FUNCTIONS ---
+@st.cache_resource
+def get_evidence_store():
+    return EvidenceStore("breached")
+
+evidence = get_evidence_store()
+
 def get_next_image_path(animal_name):
-    """Creates breached folder and returns sequential image path"""
-    # Create breached folder if it doesn't exist
-    breached_folder = "breached"
-    os.makedirs(breached_folder, exist_ok=True)
-    
-    # Get current timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Count existing files to get sequence number
-    existing_files = [f for f in os.listdir(breached_folder) if f.endswith('.jpg')]
-    sequence = len(existing_files) + 1
-    
-    # Create filename: breached/0001_ELEPHANT_20260105_143022.jpg
-    filename = f"{sequence:04d}_{animal_name.replace(' ', '_')}_{timestamp}.jpg"
-    filepath = os.path.join(breached_folder, filename)
-    
-    return os.path.abspath(filepath)
-
-def play_siren():
-    """Plays the alarm sound safely"""
-    try:
-        if os.path.exists(SIREN_FILE):
-            # Stop previous sound if playing
-            if pygame.mixer.music.get_busy():
-                return
-            pygame.mixer.music.load(SIREN_FILE)
-            pygame.mixer.music.play()
-    except Exception as e:
-        print(f"Siren failed: {e}")
+    """Next sequential evidence path from the evidence index (no directory listing per alert)"""
+    # e.g. breached/0001_ELEPHANT_20260105_143022.jpg
+    return evidence.next_path(animal_name)
+
+def play_siren(animal_name=None):
+    """Queues the preloaded alarm for this species; never blocks the video loop"""
+    audio.play(animal_name)
 
 def send_whatsapp_thread(image_path, animal_name, phone_no):
     """Runs in background to avoid freezing the video feed"""
@@ -129,8 +115,10 @@ cap = cv2.VideoCapture(0)
 target_animals = ["Elephant", "elephant", "elephants", "Wild Boar", "wild boar"]
 ALERT_COOLDOWN = 60
 
+frame = frame_rgb = None   # Reused every frame: read and colour conversion write in place
+
 while cap.isOpened() and not stop_button:
-    ret, frame = cap.read()
+    ret, frame = cap.read(frame)
     if not ret:
         st.error("Camera not found!")
         break
@@ -166,7 +154,7 @@ while cap.isOpened() and not stop_button:
                         st.session_state['last_alert_time'] = current_time
 
                         # 1. PLAY SOUND
-                        play_siren()
+                        play_siren(detected_name)
 
                         # 2. SHOW VISUAL
                         st.toast(f"🚨 ALERT TRIGGERED: {detected_name}!", icon="🔊")
@@ -174,6 +162,7 @@ while cap.isOpened() and not stop_button:
                         # 3. SAVE EVIDENCE WITH SEQUENTIAL NAMING
                         evidence_path = get_next_image_path(detected_name)
                         cv2.imwrite(evidence_path, frame)
+                        evidence.add(evidence_path, detected_name, box=(x1, y1, x2, y2), conf=conf, ts=current_time)
                         print(f"📸 Evidence saved: {evidence_path}")
                         
                         # 4. SEND WHATSAPP
@@ -184,7 +173,7 @@ while cap.isOpened() and not stop_button:
                     cv2.putText(frame, f"{name} {conf:.2f}", (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
     # UI Refresh
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
     video_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
 
     if threat_detected:
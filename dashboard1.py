@@ -2,14 +2,18 @@ import streamlit as st
 import cv2
 import time
 import os
-import threading
 import subprocess
 import requests  # <--- NEW: Required for Telegram
 from datetime import datetime
 from ultralytics import YOLO
-import pygame
 # Import the improved WhatsApp sender
 from ai_core.whatsapp_sender import send_alert_with_image
+from ai_core.audio_alerts import AudioEngine, SOUND_FILES
+from ai_core.alert_media import pick_variant
+from ai_core.alert_outbox import AlertOutbox, PermanentError, check_response
+from ai_core.analytics import DetectionHistory, hourly_heatmap, dwell_times
+from ai_core.evidence_store import EvidenceStore
+from ai_core.detection_policy import DetectionPolicy, POLICY_FILE
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="DrishtiX Command Center", layout="wide", page_icon="🐘")
@@ -21,12 +25,14 @@ BOT_TOKEN = "8447742558:AAEW0Y3tMqFOb6KsxFGxa8gRESvSmV0-DqE"
 CHAT_ID = "8533798815"
 
 # --- INITIALIZE AUDIO ---
-try:
-    pygame.mixer.init()
-    if not os.path.exists(SIREN_FILE):
-        st.error(f"⚠️ MISSING SOUND FILE: {SIREN_FILE}. Please download it!")
-except Exception as e:
-    print(f"Audio Init Error: {e}")
+# Decoded once per server process (Streamlit reruns this script on every interaction)
+@st.cache_resource
+def get_audio_engine():
+    return AudioEngine(sound_files={species: SIREN_FILE for species in SOUND_FILES})
+
+audio = get_audio_engine()
+if not os.path.exists(SIREN_FILE):
+    st.error(f"⚠️ MISSING SOUND FILE: {SIREN_FILE}. Please download it!")
 
 # Custom CSS
 st.markdown("""
@@ -45,57 +51,91 @@ if 'last_alert_time' not in st.session_state:
     st.session_state['last_alert_time'] = 0
 
 # --- HELPER FUNCTIONS ---
-def get_next_image_path(animal_name):
-    """Creates breached folder and returns sequential image path"""
-    breached_folder = "breached"
-    os.makedirs(breached_folder, exist_ok=True)
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    existing_files = [f for f in os.listdir(breached_folder) if f.endswith('.jpg')]
-    sequence = len(existing_files) + 1
+@st.cache_resource
+def get_evidence_store():
+    return EvidenceStore("breached")
 
-    filename = f"{sequence:04d}_{animal_name.replace(' ', '_')}_{timestamp}.jpg"
-    filepath = os.path.join(breached_folder, filename)
+evidence = get_evidence_store()
 
-    return os.path.abspath(filepath)
+def get_next_image_path(animal_name):
+    """Next sequential evidence path from the evidence index (no directory listing per alert)"""
+    return evidence.next_path(animal_name)
 
-def play_siren():
-    """Plays the alarm sound safely"""
-    try:
-        if os.path.exists(SIREN_FILE):
-            if pygame.mixer.music.get_busy():
-                return
-            pygame.mixer.music.load(SIREN_FILE)
-            pygame.mixer.music.play()
-    except Exception as e:
-        print(f"Siren failed: {e}")
+def play_siren(animal_name=None):
+    """Queues the preloaded alarm for this species; never blocks the video loop"""
+    audio.play(animal_name)
 
 def trigger_remote_panic(animal_name):
-    """Sends a signal to your phone via Telegram to turn on Flashlight"""
+    """Sends a signal to your phone via Telegram to turn on Flashlight; True once delivered"""
     try:
         url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
         payload = {
             "chat_id": CHAT_ID,
             "text": f"PANIC: {animal_name} DETECTED!"
         }
-        requests.post(url, data=payload)
+        check_response(requests.post(url, data=payload, timeout=10))
         print(f"📡 PANIC Signal sent to phone for {animal_name}!")
+        return True
+    except PermanentError:
+        raise
     except Exception as e:
         print(f"❌ Failed to send Telegram signal: {e}")
+        return False
 
-def send_whatsapp_thread(image_path, animal_name, phone_no):
+def send_telegram_photo(animal_name, image_path, box=None):
+    """Follows the PANIC signal with the smallest photo that fits a slow link; True once delivered"""
+    if not os.path.exists(image_path):
+        raise PermanentError(f"evidence {image_path} is gone")
+    try:
+        photo = pick_variant(image_path, channel="telegram", box=box)
+        with open(photo, 'rb') as f:
+            check_response(requests.post(f"https://api.telegram.org/bot{BOT_TOKEN}/sendPhoto",
+                                         data={"chat_id": CHAT_ID, "caption": f"{animal_name} evidence"},
+                                         files={"photo": f}, timeout=30))
+        print(f"📡 Evidence photo sent ({os.path.getsize(photo) // 1024} KB)")
+        return True
+    except PermanentError:
+        raise
+    except Exception as e:
+        print(f"❌ Failed to send Telegram photo: {e}")
+        return False
+
+def send_whatsapp_thread(image_path, animal_name, phone_no, box=None):
     """Runs in background to avoid freezing the video feed"""
     try:
         print(f"🚀 Sending WhatsApp Alert for {animal_name}...")
+        image_path = pick_variant(image_path, channel="whatsapp", box=box)
         success = send_alert_with_image(phone_no, animal_name, image_path)
 
         if success:
             print("✅ Alert with image sent successfully!")
         else:
             print("❌ Failed to send alert with image")
+        return success
 
     except Exception as e:
         print(f"❌ Failed to send WhatsApp: {e}")
+        return False
+
+def deliver_whatsapp(p):
+    """Outbox handler for the "whatsapp" channel"""
+    if not os.path.exists(p['image']):
+        raise PermanentError(f"evidence {p['image']} is gone")
+    return send_whatsapp_thread(p['image'], p['animal'], p['phone'], p['box'])
+
+# --- ALERT OUTBOX ---
+# Alerts are written to disk first and retried until the uplink is back.
+# The PANIC text and the photo are separate alerts, so a failed photo
+# upload is retried on its own and never sends the PANIC text again.
+@st.cache_resource
+def get_outbox():
+    outbox = AlertOutbox("dashboard1")
+    outbox.register("whatsapp", deliver_whatsapp)
+    outbox.register("telegram", lambda p: trigger_remote_panic(p['animal']))
+    outbox.register("telegram_photo", lambda p: send_telegram_photo(p['animal'], p['image'], p['box']))
+    return outbox
+
+outbox = get_outbox()
 
 # --- SIDEBAR ---
 st.sidebar.image("https://img.icons8.com/color/96/000000/elephant.png", width=100)
@@ -104,6 +144,25 @@ conf_threshold = st.sidebar.slider("Confidence Threshold", 0.1, 1.0, 0.4, 0.05)
 enable_notifications = st.sidebar.checkbox("Enable Alerts (Siren + WA + Phone)", value=True)
 model_path = st.sidebar.text_input("Model Path", "ai_core/models/best.pt")
 
+# --- INTRUSION ANALYTICS ---
+@st.cache_data(ttl=300)
+def load_analytics():
+    # Same raw class -> threat name mapping as the live system
+    history = DetectionHistory.load(evidence_store=evidence, name_map=DetectionPolicy.load(POLICY_FILE).name_map)
+    return len(history), hourly_heatmap(history), dwell_times(history)
+
+with st.sidebar.expander("📈 Intrusion Analytics"):
+    try:
+        n_rows, heatmap, dwell = load_analytics()
+        st.caption(f"{n_rows} detections on record")
+        st.markdown("**Visits by hour of day**")
+        st.bar_chart({name: row for name, row in zip(heatmap['species'], heatmap['counts'].tolist())})
+        st.markdown("**Dwell time per species (s)**")
+        st.table({name: {"visits": d['visits'], "mean": round(d['mean_s']), "max": round(d['max_s'])}
+                  for name, d in dwell.items()})
+    except Exception as e:
+        st.caption(f"No analytics yet: {e}")
+
 # --- MAIN LAYOUT ---
 col1, col2 = st.columns([2, 1])
 
@@ -138,8 +197,10 @@ cap = cv2.VideoCapture(0)
 target_animals = ["Elephant", "elephant", "elephants", "Wild Boar", "wild boar"]
 ALERT_COOLDOWN = 60
 
+frame = frame_rgb = None   # Reused every frame: read and colour conversion write in place
+
 while cap.isOpened() and not stop_button:
-    ret, frame = cap.read()
+    ret, frame = cap.read(frame)
     if not ret:
         st.error("Camera not found!")
         break
@@ -175,7 +236,7 @@ while cap.isOpened() and not stop_button:
                         st.session_state['last_alert_time'] = current_time
 
                         # 1. PLAY SOUND (PC)
-                        play_siren()
+                        play_siren(detected_name)
 
                         # 2. SHOW VISUAL
                         st.toast(f"🚨 ALERT TRIGGERED: {detected_name}!", icon="🔊")
@@ -183,22 +244,23 @@ while cap.isOpened() and not stop_button:
                         # 3. SAVE EVIDENCE
                         evidence_path = get_next_image_path(detected_name)
                         cv2.imwrite(evidence_path, frame)
+                        evidence.add(evidence_path, detected_name, box=(x1, y1, x2, y2), conf=conf, ts=current_time)
                         print(f"📸 Evidence saved: {evidence_path}")
 
-                        # 4. SEND WHATSAPP (Threaded)
-                        t_wa = threading.Thread(target=send_whatsapp_thread, args=(evidence_path, detected_name, TARGET_PHONE))
-                        t_wa.start()
-
-                        # 5. TRIGGER PHONE FLASHLIGHT (Threaded) <--- NEW PART
-                        t_panic = threading.Thread(target=trigger_remote_panic, args=(detected_name,))
-                        t_panic.start()
+                        # 4. SEND WHATSAPP + 5. TRIGGER PHONE FLASHLIGHT (outbox, background)
+                        alert = {'animal': detected_name, 'image': evidence_path,
+                                 'box': [x1, y1, x2, y2], 'phone': TARGET_PHONE}
+                        alert_id = os.path.basename(evidence_path)
+                        outbox.enqueue("whatsapp", alert, alert_id=alert_id)
+                        outbox.enqueue("telegram", alert, alert_id=alert_id)
+                        outbox.enqueue("telegram_photo", alert, alert_id=alert_id)
 
                 else:
                     cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
                     cv2.putText(frame, f"{name} {conf:.2f}", (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
     # UI Refresh
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
     video_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
 
     if threat_detected:
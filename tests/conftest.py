@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules import their siblings flat (as when run from their folder)
+for folder in ("ai_core", "training_data"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
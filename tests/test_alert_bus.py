@@ -0,0 +1,108 @@
+import errno
+import queue
+import socket
+import time
+
+import pytest
+
+from alert_bus import ALERT, ACK, AlertPublisher, AlertReceiver, pack_alert, unpack
+
+LOOPBACK = "127.0.0.1"
+
+
+def test_alert_round_trip():
+    kind, sender, seq, alert = unpack(pack_alert(7, 3, "TIGER", 1, 42, 1000.0, 0.5))
+    assert (kind, sender, seq) == (ALERT, 7, 3)
+    assert (alert.species, alert.camera, alert.track, alert.conf) == ("TIGER", 1, 42, 0.5)
+
+
+def test_no_route_is_counted_not_raised():
+    bus = AlertPublisher()
+
+    class NoRoute:
+        """Socket whose sends fail as with the network cable pulled"""
+        def __init__(self, sock):
+            self.sock = sock
+
+        def sendto(self, *args):
+            raise OSError(errno.ENETUNREACH, "Network is unreachable")
+
+        def __getattr__(self, name):
+            return getattr(self.sock, name)
+
+    real, bus.sock = bus.sock, NoRoute(bus.sock)
+    try:
+        assert bus.publish("TIGER") == 1
+        time.sleep(0.1)                       # Beacons fail in the background too
+        assert bus.thread.is_alive()
+        stats = bus.stats()
+        assert stats['sent'] == 0 and stats['send_failures'] >= 1
+
+        bus.sock = real                       # Route is back
+        bus.publish("TIGER")
+        assert bus.stats()['sent'] == 1
+    finally:
+        bus.sock = real
+        bus.close(drain=0)
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+def loopback_bus(port, receiver):
+    """Publisher on the loopback interface, once it knows `receiver` is listening"""
+    bus = AlertPublisher(port=port, interface=LOOPBACK)
+    assert wait_for(lambda: bus.stats()['receivers'] == 1)     # First BEACON answered with HELLO
+    return bus
+
+
+def test_alert_is_delivered_and_acked_over_loopback(port):
+    rx = AlertReceiver(port=port, interface=LOOPBACK).start()
+    bus = loopback_bus(port, rx)
+    try:
+        seq = bus.publish("TIGER", camera=2, track=7, conf=0.8)
+        alert = rx.get(timeout=2)
+        assert (alert.species, alert.camera, alert.track, alert.seq) == ("TIGER", 2, 7, seq)
+        assert wait_for(lambda: bus.stats()['acked'] == 1)
+        assert bus.stats()['pending'] == 0 and bus.stats()['retransmits'] == 0
+    finally:
+        bus.close(drain=0)
+        rx.stop()
+
+
+def test_lost_ack_is_retransmitted_and_delivered_once(port):
+    rx = AlertReceiver(port=port, interface=LOOPBACK)
+    reply, dropped = rx._reply, []
+
+    def lossy_reply(frame, addr):
+        if unpack(frame)[0] == ACK and not dropped:
+            dropped.append(frame)                 # The first ACK never arrives
+            return
+        reply(frame, addr)
+
+    rx._reply = lossy_reply
+    rx.start()
+    bus = loopback_bus(port, rx)
+    try:
+        bus.publish("ELEPHANT")
+        assert wait_for(lambda: bus.stats()['acked'] == 1)
+        assert dropped and bus.stats()['retransmits'] >= 1
+        assert rx.get(timeout=1).species == "ELEPHANT"
+        with pytest.raises(queue.Empty):
+            rx.get(timeout=0.2)                   # The retransmission was recognised as a duplicate
+    finally:
+        bus.close(drain=0)
+        rx.stop()
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+import pytest
+
+from alert_media import pick_variant, prepare_alert_media, encode_to_budget
+
+BOX = (300, 200, 420, 320)
+
+
+@pytest.fixture
+def evidence(tmp_path):
+    """A detailed 1280x720 frame, saved at high quality (a few hundred KB)"""
+    rng = np.random.default_rng(0)
+    frame = cv2.resize(rng.integers(0, 255, (180, 320, 3), dtype=np.uint8), (1280, 720),
+                       interpolation=cv2.INTER_NEAREST)
+    path = str(tmp_path / "0001_TIGER_20260101_120000.jpg")
+    cv2.imwrite(path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+    return path
+
+
+def test_encoding_fits_the_budget(evidence):
+    data, quality, _ = encode_to_budget(cv2.imread(evidence), 20 * 1024)
+    assert len(data) <= 20 * 1024
+    assert quality is not None
+
+
+def test_original_is_sent_when_it_fits(evidence):
+    assert pick_variant(evidence, max_bytes=float('inf'), box=BOX) == evidence
+
+
+def test_preview_comes_before_the_crop(evidence):
+    media = prepare_alert_media(evidence, box=BOX)
+    assert media["original"]["bytes"] > media["preview"]["bytes"]
+    path = pick_variant(evidence, max_bytes=media["preview"]["bytes"], box=BOX)
+    assert path == media["preview"]["path"]
+
+
+def test_crop_only_when_nothing_else_fits(evidence):
+    media = prepare_alert_media(evidence, box=BOX)
+    assert media["crop"]["bytes"] < media["preview"]["bytes"]
+    assert pick_variant(evidence, max_bytes=media["preview"]["bytes"] - 1, box=BOX) == media["crop"]["path"]
+    assert pick_variant(evidence, max_bytes=1, box=BOX) == media["crop"]["path"]     # Smallest as a last resort
+
+
+def test_missing_evidence_falls_back_to_the_path(tmp_path):
+    path = str(tmp_path / "gone.jpg")
+    assert pick_variant(path, channel="whatsapp") == path
@@ -0,0 +1,157 @@
+import json
+import time
+import threading
+
+import alert_outbox
+from alert_outbox import AlertOutbox, PermanentError
+
+
+def records(outbox):
+    with open(outbox.path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_undelivered_alerts_are_replayed_once(tmp_path):
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.enqueue("whatsapp", {'animal': "TIGER"}, alert_id="a1")
+    outbox.enqueue("whatsapp", {'animal': "BOAR"}, alert_id="a2")
+    outbox.close()
+
+    sent = []
+    outbox = AlertOutbox("t", folder=tmp_path)
+    assert outbox.enqueue("whatsapp", {}, alert_id="a1") is None        # Already queued
+    outbox.register("whatsapp", lambda p: sent.append(p['animal']) or True)
+    assert outbox.wait_idle(5)
+    outbox.close()
+    assert sent == ["TIGER", "BOAR"]
+
+    outbox = AlertOutbox("t", folder=tmp_path)
+    assert outbox.stats()['pending'] == 0
+    assert outbox.enqueue("whatsapp", {}, alert_id="a1") is None        # Delivered before the restart
+    outbox.close()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.enqueue("whatsapp", {'animal': "TIGER"}, alert_id="a1")
+    outbox.close()
+    with open(outbox.path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "id"')
+    outbox = AlertOutbox("t", folder=tmp_path)
+    assert outbox.stats()['pending'] == 1
+    outbox.close()
+
+
+def test_compaction_keeps_pending_and_delivered_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_outbox, "COMPACT_AFTER", 10)
+    monkeypatch.setattr(alert_outbox, "FSYNC_INTERVAL", 0.01)
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.register("whatsapp", lambda p: True)
+    for i in range(10):
+        outbox.enqueue("whatsapp", {}, alert_id=f"d{i}")
+    assert outbox.wait_idle(5)
+    outbox.register("blynk", lambda p: False)
+    outbox.enqueue("blynk", {'active': True}, alert_id="p1")
+    outbox.close()
+
+    ops = [(r['op'], r['id']) for r in records(outbox)]
+    assert ops == [("done", f"d{i}") for i in range(10)] + [("add", "p1")]
+    outbox = AlertOutbox("t", folder=tmp_path)
+    assert outbox.stats()['pending'] == 1
+    assert outbox.enqueue("whatsapp", {}, alert_id="d3") is None
+    outbox.close()
+
+
+def test_full_outbox_drops_the_oldest(tmp_path):
+    outbox = AlertOutbox("t", folder=tmp_path, max_pending=2)
+    for i in range(3):
+        outbox.enqueue("whatsapp", {}, alert_id=f"a{i}")
+    assert outbox.stats()['dropped'] == 1
+    outbox.close()
+    outbox = AlertOutbox("t", folder=tmp_path)
+    assert [r['id'] for r in outbox.pending.values()] == ["a1", "a2"]
+    outbox.close()
+
+
+def test_rejected_alert_does_not_block_its_channel(tmp_path):
+    sent = []
+
+    def handler(payload):
+        if payload['bad']:
+            raise PermanentError("rejected")
+        sent.append(payload)
+        return True
+
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.register("telegram", handler)
+    outbox.enqueue("telegram", {'bad': True})
+    outbox.enqueue("telegram", {'bad': False})
+    assert outbox.wait_idle(5)
+    outbox.close()
+    assert sent == [{'bad': False}]
+    assert outbox.stats()['dropped'] == 1
+    assert any(r['op'] == 'drop' and r.get('reason') == "rejected" for r in records(outbox))
+
+
+def test_alert_is_dropped_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_outbox, "BASE_BACKOFF", 0.01)
+    outbox = AlertOutbox("t", folder=tmp_path, max_attempts=3)
+    calls = []
+    outbox.register("whatsapp", lambda p: calls.append(p) and False)
+    outbox.enqueue("whatsapp", {'n': 1})
+    assert outbox.wait_idle(5)
+    outbox.close()
+    assert len(calls) == 3
+    assert [r.get('reason') for r in records(outbox) if r['op'] == 'drop'] == ["attempts"]
+
+
+def test_stale_alert_expires_without_a_try(tmp_path):
+    outbox = AlertOutbox("t", folder=tmp_path, max_age=60)
+    outbox.enqueue("whatsapp", {}, alert_id="old")
+    outbox.pending["whatsapp:old"]['ts'] = time.time() - 120     # Raised before a long outage
+    calls = []
+    outbox.register("whatsapp", lambda p: calls.append(p) or True)
+    assert outbox.wait_idle(5)
+    outbox.close()
+    assert calls == []
+    assert outbox.stats()['expired'] == 1
+    assert [r.get('reason') for r in records(outbox) if r['op'] == 'drop'] == ["expired"]
+
+
+def test_slow_channel_does_not_delay_the_others(tmp_path):
+    release, sent = threading.Event(), []
+
+    def whatsapp(payload):
+        release.wait(5)            # The pywhatkit GUI send takes tens of seconds
+        sent.append("whatsapp")
+        return True
+
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.register("whatsapp", whatsapp)
+    outbox.register("telegram", lambda p: sent.append("telegram") or True)
+    outbox.enqueue("whatsapp", {})
+    outbox.enqueue("telegram", {})
+    deadline = time.monotonic() + 5
+    while "telegram" not in sent and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sent == ["telegram"]
+    release.set()
+    assert outbox.wait_idle(5)
+    outbox.close()
+
+
+def test_close_waits_for_a_delivery_in_progress(tmp_path):
+    started = threading.Event()
+
+    def slow(payload):
+        started.set()
+        time.sleep(0.3)
+        return True
+
+    outbox = AlertOutbox("t", folder=tmp_path)
+    outbox.register("whatsapp", slow)
+    outbox.enqueue("whatsapp", {}, alert_id="a1")
+    assert started.wait(5)
+    outbox.close()
+    assert not any(t.is_alive() for t in outbox.senders.values())
+    assert [r['op'] for r in records(outbox)] == ["add", "done"]
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+from analytics import DetectionHistory, hourly_heatmap, dwell_times, night_counts, daily_counts
+from detection_log import DetectionLog
+from evidence_store import EvidenceStore
+
+SPECIES = ["ELEPHANT", "TIGER"]
+
+
+def local_ts(hour, minute=0, day=10):
+    """Unix time of a local wall-clock hour (in January, so no DST edge)"""
+    return time.mktime((2026, 1, day, hour, minute, 0, 0, 0, -1))
+
+
+def history(rows):
+    """rows: [(ts, species, camera, track)]"""
+    ts, species, camera, track = zip(*rows)
+    return DetectionHistory(ts, [SPECIES.index(s) for s in species], SPECIES, camera, track)
+
+
+def test_fresh_install_has_an_empty_history(tmp_path):
+    h = DetectionHistory.load(tmp_path / "detections", evidence_store=None)
+    assert len(h) == 0
+    assert hourly_heatmap(h)['counts'].shape == (0, 24)
+    assert dwell_times(h) == {}
+    assert daily_counts(h)['days'] == []
+
+
+def test_visits_split_on_camera_track_and_gap():
+    t = local_ts(22)
+    h = history([(t, "TIGER", 0, 1), (t + 60, "TIGER", 0, 1),       # One visit, 60 s
+                 (t + 1000, "TIGER", 0, 1),                          # Same track after a long gap
+                 (t + 10, "TIGER", 1, 1),                            # Same track id, other camera
+                 (t + 20, "ELEPHANT", 0, 2)])
+    v = h.visits(gap=300)
+    assert len(v['start']) == 4
+    dwell = dwell_times(h, gap=300)
+    assert dwell['TIGER'] == {'visits': 3, 'mean_s': 20.0, 'max_s': 60.0}
+    assert dwell['ELEPHANT']['visits'] == 1
+
+
+def test_heatmap_counts_visits_by_local_start_hour():
+    h = history([(local_ts(22), "TIGER", 0, 1), (local_ts(22, 30), "TIGER", 0, 2),
+                 (local_ts(3), "ELEPHANT", 0, 3)])
+    counts = hourly_heatmap(h)['counts']
+    assert counts[SPECIES.index("TIGER"), 22] == 2
+    assert counts[SPECIES.index("ELEPHANT"), 3] == 1
+    assert counts.sum() == 3
+
+
+def test_night_counts_rank_cameras():
+    h = history([(local_ts(22), "TIGER", 1, 1), (local_ts(23), "TIGER", 1, 2),
+                 (local_ts(2), "TIGER", 0, 3), (local_ts(12), "TIGER", 0, 4)])   # Midday doesn't count
+    assert night_counts(h, "TIGER") == [(1, 2), (0, 1)]
+    assert night_counts(h, "DEER") == []
+
+
+def test_daily_counts_per_species():
+    h = history([(local_ts(10, day=10), "TIGER", 0, 1), (local_ts(11, day=10), "ELEPHANT", 0, 2),
+                 (local_ts(10, day=11), "TIGER", 0, 3)])
+    daily = daily_counts(h)
+    assert daily['days'] == ["2026-01-10", "2026-01-11"]
+    assert daily['counts'].tolist() == [[1, 1], [0, 1]]
+
+
+def test_detection_log_maps_raw_classes_and_keeps_confirmed_rows(tmp_path):
+    log = DetectionLog(str(tmp_path))
+    t = local_ts(21)
+    log.log_frame(t, 1, 0, [("cat", 0.9, (0, 0, 10, 10), 1, True), ("dog", 0.3, (0, 0, 5, 5), -1, False)], 10.0)
+    log.log_frame(t + 5, 2, 0, [("cat", 0.9, (0, 0, 10, 10), 1, True)], 10.0)
+    log.close()
+    h = DetectionHistory.load(str(tmp_path), name_map={"cat": "TIGER"})
+    assert h.species_names == ["DOG", "TIGER"]
+    assert len(h) == 2
+    assert dwell_times(h)['TIGER'] == {'visits': 1, 'mean_s': 5.0, 'max_s': 5.0}
+
+
+def test_evidence_index_is_the_fallback(tmp_path):
+    store = EvidenceStore(str(tmp_path / "breached"))
+    store.add(store.next_path("TIGER"), "TIGER", ts=local_ts(20))
+    store.add(store.next_path("TIGER"), "TIGER", ts=local_ts(20, 1))
+    h = DetectionHistory.load(str(tmp_path / "detections"), evidence_store=store)
+    assert dwell_times(h) == {'TIGER': {'visits': 2, 'mean_s': 0.0, 'max_s': 0.0}}
+    assert np.array_equal(h.camera, [0, 0])
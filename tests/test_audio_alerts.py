@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import types
+
+import pytest
+
+from audio_alerts import AudioEngine, NULL_DRIVER
+
+
+class FakeChannel:
+    """Mixer channel that stays busy until the test says the sound ended"""
+    def __init__(self):
+        self.busy = False
+        self.stops = 0
+
+    def get_busy(self):
+        return self.busy
+
+    def play(self, sound):
+        self.busy = True
+
+    def stop(self):
+        self.busy = False
+        self.stops += 1
+
+
+@pytest.fixture
+def channel(monkeypatch):
+    channel = FakeChannel()
+    mixer = types.SimpleNamespace(
+        pre_init=lambda *args: None, init=lambda: None, set_reserved=lambda n: None,
+        get_init=lambda: (44100, -16, 2), Channel=lambda i: channel,
+        Sound=lambda path=None, buffer=None: object())
+    monkeypatch.setitem(sys.modules, "pygame", types.SimpleNamespace(mixer=mixer))
+    monkeypatch.setenv("SDL_AUDIODRIVER", "unset")
+    monkeypatch.delenv("SDL_AUDIODRIVER")
+    return channel
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def played(engine, *species):
+    """Plays each request in order and returns what actually started"""
+    for name in species:
+        engine.play(name)
+    engine.close()
+    return [name for _, name in engine.played]
+
+
+def test_higher_priority_preempts_a_running_alarm(channel):
+    engine = AudioEngine(sound_files={}, driver=NULL_DRIVER)
+    assert played(engine, "DEER", "TIGER") == ["DEER", "TIGER"]
+    assert channel.stops >= 1
+
+
+def test_lower_or_equal_priority_never_cuts_off_an_alarm(channel):
+    engine = AudioEngine(sound_files={}, driver=NULL_DRIVER)
+    assert played(engine, "TIGER", "DEER", "ELEPHANT") == ["TIGER"]
+
+
+def test_replaying_an_alert_that_is_already_playing_is_ignored(channel):
+    engine = AudioEngine(sound_files={}, driver=NULL_DRIVER)
+    assert played(engine, "TIGER", "TIGER") == ["TIGER"]
+    assert channel.stops == 1                         # Only close() silenced it
+
+
+def test_alert_replays_once_the_previous_one_finished(channel):
+    engine = AudioEngine(sound_files={}, driver=NULL_DRIVER)
+    engine.play("TIGER")
+    assert wait_for(lambda: len(engine.played) == 1)
+    channel.busy = False                              # The siren ran out
+    assert played(engine, "TIGER") == ["TIGER", "TIGER"]
+
+
+def test_null_driver_only_applies_when_no_driver_is_set(channel, monkeypatch):
+    AudioEngine(sound_files={}).close()
+    assert "SDL_AUDIODRIVER" not in os.environ
+    AudioEngine(sound_files={}, driver=NULL_DRIVER).close()
+    assert os.environ["SDL_AUDIODRIVER"] == NULL_DRIVER
+
+    monkeypatch.setenv("SDL_AUDIODRIVER", "pulse")
+    AudioEngine(sound_files={}, driver=NULL_DRIVER).close()
+    assert os.environ["SDL_AUDIODRIVER"] == "pulse"
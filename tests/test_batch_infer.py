@@ -0,0 +1,26 @@
+import numpy as np
+import cv2
+
+from batch_infer import IndexSink
+from evidence_store import EvidenceStore
+
+
+def detection(species, conf):
+    return {'class': species or "person", 'species': species, 'conf': conf, 'box': [0, 0, 10, 10]}
+
+
+def image(folder, name):
+    path = folder / name
+    cv2.imwrite(str(path), np.zeros((8, 8, 3), np.uint8))
+    return str(path)
+
+
+def test_index_keeps_the_best_threat_and_skips_images_without_one(tmp_path):
+    sink = IndexSink(str(tmp_path))
+    sink.write({'source': image(tmp_path, "a.jpg"), 'frame': None,
+                'detections': [detection(None, 0.9), detection("TIGER", 0.6)]})
+    sink.write({'source': image(tmp_path, "b.jpg"), 'frame': None,
+                'detections': [detection(None, 0.9)]})
+    sink.close()
+    records = list(EvidenceStore(str(tmp_path)).records())
+    assert [(r['file'], r['species'], r['conf']) for r in records] == [("a.jpg", "TIGER", 0.6)]
@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+
+import camera_watchdog
+from camera_watchdog import SupervisedCamera
+from frame_pool import FramePool
+
+
+class FakeCamera:
+    """Noise frames at `fps`; grab()/retrieve() like cv2.VideoCapture, optionally failing after `frames`"""
+    def __init__(self, fps=200, frames=None):
+        self.fps = fps
+        self.left = frames
+        self.grabs = self.decodes = 0
+        self.rng = np.random.default_rng()
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        time.sleep(1 / self.fps)
+        if self.left is not None:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+        self.grabs += 1
+        return True
+
+    def retrieve(self):
+        self.decodes += 1
+        return True, self.rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        pass
+
+
+class ReadOnlyCamera(FakeCamera):
+    """A source without grab()/retrieve() (e.g. VirtualCamera)"""
+    def __getattribute__(self, name):
+        if name in ("grab", "retrieve"):
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+    def read(self):
+        FakeCamera.grab(self)
+        return FakeCamera.retrieve(self)
+
+
+def test_frames_are_decoded_only_when_asked_for():
+    cap = FakeCamera()
+    cam = SupervisedCamera(lambda: cap, name="test")
+    try:
+        for _ in range(3):
+            assert cam.read()[0]
+            time.sleep(0.1)
+        assert cap.grabs > 20            # The stream is kept current...
+        assert cap.decodes <= 4          # ...but only read() pays for decoding
+    finally:
+        cam.release()
+
+
+def test_sources_without_grab_are_read_on_demand():
+    cap = ReadOnlyCamera()
+    cam = SupervisedCamera(lambda: cap, name="test")
+    try:
+        for _ in range(3):
+            assert cam.read()[0]
+            time.sleep(0.1)
+        assert cap.decodes <= 4
+    finally:
+        cam.release()
+
+
+def test_dropped_stream_reconnects(monkeypatch):
+    monkeypatch.setattr(camera_watchdog, "BASE_BACKOFF", 0.01)
+    cams = []
+
+    def open_camera():
+        cams.append(FakeCamera(frames=5))
+        return cams[-1]
+
+    cam = SupervisedCamera(open_camera, name="test")
+    try:
+        frames = 0
+        deadline = time.monotonic() + 5
+        while frames < 12 and time.monotonic() < deadline:
+            frames += cam.read(timeout=0.5)[0]
+        assert frames == 12
+        assert cam.stats()['reconnects'] >= 2
+    finally:
+        cam.release()
+
+
+def test_frozen_stream_is_reopened():
+    class Frozen(FakeCamera):
+        def retrieve(self):
+            self.decodes += 1
+            return True, np.zeros((48, 64, 3), np.uint8)
+
+    cam = SupervisedCamera(Frozen, name="test", frozen_seconds=0.2)
+    try:
+        deadline = time.monotonic() + 2
+        while cam.stats()['outages'] == 0 and time.monotonic() < deadline:
+            cam.read(timeout=0.1)
+        assert cam.outages[0][2] == "frozen"
+    finally:
+        cam.release()
+
+
+class FakePool(FramePool):
+    """Serves every frame from a pooled buffer, as a cv2.VideoCapture source would"""
+    def read(self, cap, retrieve=False):
+        ret, frame = cap.retrieve() if retrieve else cap.read()
+        if not ret:
+            return None
+        buf = self.acquire(frame.shape)
+        buf.array[:] = frame
+        return buf
+
+
+def test_read_returns_pooled_buffers_to_the_pool():
+    pool = FakePool()
+    cam = SupervisedCamera(lambda: FakeCamera(), name="test", pool=pool)
+    try:
+        frames = [cam.read()[1] for _ in range(20)]
+        assert all(frame is not None for frame in frames)
+        assert len({id(frame) for frame in frames}) == 20    # Copies, not the recycled buffers
+        assert pool.stats()['allocations'] <= 3              # One leaked buffer per read otherwise
+    finally:
+        cam.release()
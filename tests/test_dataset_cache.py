@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import pytest
+import yaml
+
+from dataset_cache import prepare_dataset, ShardDataSource
+
+IMGSZ = 64
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Four 48x80 images with one box each, in a Roboflow-style layout"""
+    images, labels = tmp_path / "train" / "images", tmp_path / "train" / "labels"
+    images.mkdir(parents=True)
+    labels.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(4):
+        cv2.imwrite(str(images / f"im{i}.jpg"), rng.integers(0, 255, (48, 80, 3), dtype=np.uint8))
+        (labels / f"im{i}.txt").write_text("0 0.5 0.5 0.25 0.5\n")
+    data_yaml = tmp_path / "data.yaml"
+    data_yaml.write_text(yaml.safe_dump({'train': "train/images", 'nc': 1, 'names': ["TIGER"]}))
+    return data_yaml, tmp_path / ".shards"
+
+
+def test_prepared_images_are_letterboxed_with_remapped_labels(dataset):
+    data_yaml, cache_dir = dataset
+    prepare_dataset(str(data_yaml), str(cache_dir), imgsz=IMGSZ, workers=1)
+    source = ShardDataSource(str(cache_dir))
+    assert len(source) == 4
+    assert source.image(0).shape == (IMGSZ, IMGSZ, 3)
+    cls, x, y, w, h = source.labels(0)[0]
+    assert cls == 0
+    assert (x, y, w) == pytest.approx((0.5, 0.5, 0.25), abs=0.01)
+    assert h == pytest.approx(0.5 * 48 / 80, abs=0.01)      # Padded top and bottom
+
+
+def test_augmented_dataset_feeds_the_mosaic_buffer(dataset):
+    pytest.importorskip("ultralytics")
+    from ultralytics.cfg import get_cfg
+    from dataset_cache import make_cached_dataset
+
+    data_yaml, cache_dir = dataset
+    prepare_dataset(str(data_yaml), str(cache_dir), imgsz=IMGSZ, workers=1)
+    dataset_class = make_cached_dataset(str(cache_dir))
+    ds = dataset_class(img_path=str(data_yaml.parent / "train" / "images"), imgsz=IMGSZ, batch_size=2,
+                       augment=True, hyp=get_cfg(), data={'names': {0: "TIGER"}, 'nc': 1, 'channels': 3})
+    for i in range(len(ds)):
+        ds[i]                                        # Mosaic samples partners from ds.buffer
+    assert ds.buffer
+    assert all(ds.ims[j] is not None for j in ds.buffer)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from detection_policy import DetectionPolicy
+
+
+def policy():
+    return DetectionPolicy({"cat": "TIGER"}, {"cat": 0.5, "elephant": 0.3}, 5, 10, 60)
+
+
+def test_map_name_applies_threshold_and_name_map():
+    p = policy()
+    assert p.map_name("cat", 0.6) == "TIGER"
+    assert p.map_name("cat", 0.4) is None
+    assert p.map_name("elephant", 0.4) == "ELEPHANT"
+    assert p.map_name("person", 0.99) is None
+
+
+def test_threshold_array_matches_map_name():
+    p = policy()
+    names = {0: "person", 1: "cat", 2: "elephant"}
+    thresholds = p.threshold_array(names)
+    assert thresholds[0] == np.inf and thresholds[1] == pytest.approx(0.5) and thresholds[2] == pytest.approx(0.3)
+    cls_ids, confs = np.array([0, 1, 1, 2]), np.array([0.9, 0.6, 0.4, 0.35], np.float32)
+    keep = confs >= thresholds[cls_ids]
+    assert keep.tolist() == [p.map_name(names[c], float(s)) is not None for c, s in zip(cls_ids, confs)]
+    assert p.threshold_array(names) is thresholds          # Cached per model
+
+
+def test_bad_policy_is_rejected():
+    with pytest.raises(ValueError):
+        DetectionPolicy.from_dict({'confidence_thresholds': {"cat": 1.5}})
+
+
+
+VALID = {'confidence_thresholds': {"cat": 0.5}, 'confirmation_frames': 1, 'patience_frames': 2, 'alert_cooldown': 60}
+
+
+@pytest.mark.parametrize("field", ["confirmation_frames", "patience_frames", "alert_cooldown", "confidence_thresholds"])
+def test_yaml_booleans_are_not_numbers(field):
+    DetectionPolicy.from_dict(VALID)
+    data = dict(VALID, **{field: {"cat": True} if field == "confidence_thresholds" else True})   # `field: yes`
+    with pytest.raises(ValueError):
+        DetectionPolicy.from_dict(data)
@@ -0,0 +1,45 @@
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from drishtix_main import DrishtiXSystem, ThreatTracker
+from power_scheduler import PowerScheduler, IDLE, WATCH, ENGAGED
+
+
+class RecordingLog:
+    def __init__(self):
+        self.frames = []
+
+    def log_frame(self, ts, frame, camera, rows, infer_ms):
+        self.frames.append((frame, rows, infer_ms))
+
+
+def test_only_model_output_reaches_the_detection_log():
+    system = types.SimpleNamespace(frame_index=0, camera_id=0, detection_log=RecordingLog(),
+                                   tracker=ThreatTracker(), map_name=lambda name, conf: name)
+    detections = [("cat", 0.8, (0, 0, 10, 10))]
+    DrishtiXSystem.log_detections(system, detections, [], 12.0)
+    DrishtiXSystem.log_detections(system, detections, [], 0.0, model_hit=False)    # Propagated by optical flow
+    DrishtiXSystem.log_detections(system, detections, [], 11.0)
+    assert [(frame, ms) for frame, _, ms in system.detection_log.frames] == [(1, 12.0), (3, 11.0)]
+
+
+def test_model_output_drives_the_power_state():
+    system = DrishtiXSystem.__new__(DrishtiXSystem)        # No camera, model or alert channels
+    system.power = PowerScheduler(night_hours=(0, 0))
+    applied = []
+    system.apply_power_profile = lambda capture=True: applied.append(system.power.state)
+    frame = np.zeros((480, 640, 3), np.uint8)
+
+    far = [("cow", 0.2, (300, 200, 330, 230))]
+    system.report_detections(frame, far, [])
+    assert system.power.state == IDLE
+    near = [("cow", 0.2, (100, 50, 500, 470))]             # Below the thresholds, but filling the frame
+    system.report_detections(frame, near, [])
+    assert system.power.state == WATCH
+    threat = [("TIGER", 0.9, (300, 200, 330, 230))]
+    system.report_detections(frame, threat, threat)
+    assert applied == [WATCH, ENGAGED]
@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+from event_dedup import EventDeduplicator, box_signature, dhash
+
+BOX = (100, 100, 200, 200)
+
+
+def scene(seed):
+    """Smooth random shapes, like a real scene at hash resolution"""
+    coarse = np.random.default_rng(seed).integers(20, 200, (6, 8, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (320, 240), interpolation=cv2.INTER_CUBIC)
+
+
+def test_dhash_is_stable_under_small_changes():
+    frame = scene(0)
+    brighter = frame + 10
+    assert bin(dhash(frame) ^ dhash(brighter)).count("1") <= 4
+    assert bin(dhash(frame) ^ dhash(scene(1))).count("1") > 10
+
+
+def test_box_signature_buckets_position_and_size():
+    assert box_signature((0, 0, 40, 30), (240, 320)) == box_signature((2, 2, 42, 32), (240, 320))
+    assert box_signature((0, 0, 40, 30), (240, 320))[:2] != box_signature((280, 200, 320, 240), (240, 320))[:2]
+
+
+def test_repeat_is_suppressed_and_new_arrival_alerts():
+    dedup = EventDeduplicator(max_hamming=10, window=600, realert_after=1800)
+    frame = scene(0)
+    assert not dedup.is_repeat("TIGER", frame, BOX, now=0)
+    assert dedup.is_repeat("TIGER", frame, BOX, now=10)
+    assert not dedup.is_repeat("ELEPHANT", frame, BOX, now=20)          # Other species
+    assert not dedup.is_repeat("TIGER", scene(1), BOX, now=30)          # Other scene
+    assert not dedup.is_repeat("TIGER", frame, (0, 0, 20, 20), now=40)  # Elsewhere in the frame
+
+
+def test_lingering_animal_realerts_and_events_expire():
+    dedup = EventDeduplicator(window=60, realert_after=100)
+    frame = scene(0)
+    assert not dedup.is_repeat("TIGER", frame, BOX, now=0)
+    for t in range(30, 100, 30):
+        assert dedup.is_repeat("TIGER", frame, BOX, now=t)
+    assert not dedup.is_repeat("TIGER", frame, BOX, now=120)            # Still there: alert again
+    assert not dedup.is_repeat("TIGER", frame, BOX, now=500)            # Gone for longer than the window
+    assert len(dedup.events) == 1
+
+
+def test_slow_drift_stays_matched(monkeypatch):
+    """Each frame is close to the previous one, though far from the first"""
+    import event_dedup
+    hashes = iter([0, 0b111111, 0b111111111111, (1 << 18) - 1])
+    monkeypatch.setattr(event_dedup, "dhash", lambda frame: next(hashes))
+    dedup = EventDeduplicator(max_hamming=6)
+    frame = scene(0)
+    assert not dedup.is_repeat("TIGER", frame, BOX, now=0)
+    assert dedup.is_repeat("TIGER", frame, BOX, now=1)
+    assert dedup.is_repeat("TIGER", frame, BOX, now=2)
+    assert dedup.is_repeat("TIGER", frame, BOX, now=3)
+    # The index holds the latest hash only
+    assert dedup.find("TIGER", (1 << 18) - 1, box_signature(BOX, frame.shape)) is not None
+    assert dedup.find("TIGER", 0, box_signature(BOX, frame.shape)) is None
@@ -0,0 +1,82 @@
+import os
+import multiprocessing
+
+import cv2
+import numpy as np
+
+from evidence_store import EvidenceStore, RetentionManager
+
+
+def save(store, name, ts, size=(720, 1280)):
+    path = store.next_path(name)
+    noise = np.random.default_rng(len(path)).integers(0, 255, (*size, 3), dtype=np.uint8)
+    cv2.imwrite(path, noise)
+    store.add(path, name, ts=ts)
+    return path
+
+
+def test_paths_are_sequential_across_restarts(tmp_path):
+    store = EvidenceStore(tmp_path)
+    first = save(store, "WILD BOAR", ts=0)
+    assert os.path.basename(first).startswith("0001_WILD_BOAR_")
+    assert os.path.basename(EvidenceStore(tmp_path).next_path("TIGER")).startswith("0002_TIGER_")
+
+
+def test_quota_thumbnails_young_frames_before_deleting(tmp_path):
+    store = EvidenceStore(tmp_path)
+    paths = [save(store, "TIGER", ts=1000 + i) for i in range(4)]
+    full = os.path.getsize(paths[0])
+    # Room for two full frames: thumbnails alone are enough
+    retention = RetentionManager(store, quota_mb=2.5 * full / 2 ** 20)
+    retention.compact(now=1100)
+    assert all(os.path.exists(p) for p in paths)
+    assert cv2.imread(paths[0]).shape[1] == 320
+    assert cv2.imread(paths[-1]).shape[1] == 1280            # Newest kept at full quality
+    assert retention._folder_size() <= retention.quota
+
+
+def test_quota_deletes_the_oldest_as_a_last_resort(tmp_path):
+    store = EvidenceStore(tmp_path)
+    paths = [save(store, "TIGER", ts=1000 + i, size=(200, 300)) for i in range(4)]   # Already thumbnail size
+    retention = RetentionManager(store, quota_mb=2.5 * os.path.getsize(paths[0]) / 2 ** 20)
+    retention.compact(now=1100)
+    assert [os.path.exists(p) for p in paths] == [False, False, True, True]
+    assert retention._folder_size() <= retention.quota
+
+
+def test_update_rewrites_only_the_named_records(tmp_path):
+    store = EvidenceStore(tmp_path)
+    first, second = save(store, "TIGER", ts=1), save(store, "DEER", ts=2)
+    store.update({os.path.basename(second): {'species': "ELEPHANT", 'conf': 0.7}})
+    records = list(store.records())
+    assert [r['species'] for r in records] == ["TIGER", "ELEPHANT"]
+    assert records[1]['conf'] == 0.7 and records[1]['ts'] == 2
+
+
+def test_stores_sharing_a_folder_never_reuse_a_number(tmp_path):
+    live, batch = EvidenceStore(tmp_path), EvidenceStore(tmp_path)     # e.g. drishtix + batch_infer
+    names = [s.next_path("TIGER") for s in (live, batch, live, batch)]
+    assert [os.path.basename(n)[:4] for n in names] == ["0001", "0002", "0003", "0004"]
+
+
+def _reserve(folder, n):
+    store = EvidenceStore(folder)
+    paths = [store.next_path("TIGER") for _ in range(n)]
+    for path in paths:
+        store.add(path, "TIGER")
+    return [int(os.path.basename(p)[:4]) for p in paths]
+
+
+def test_concurrent_processes_get_distinct_numbers(tmp_path):
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        numbers = sum(pool.starmap(_reserve, [(str(tmp_path), 25)] * 4), [])
+    assert sorted(numbers) == list(range(1, 101))
+    assert sorted(r['seq'] for r in EvidenceStore(tmp_path).records()) == list(range(1, 101))
+
+
+def test_line_being_appended_is_skipped(tmp_path):
+    store = EvidenceStore(tmp_path)
+    save(store, "TIGER", ts=0)
+    with open(store.index_path, 'a') as f:
+        f.write('{"seq": 2, "file": "0002_TIG')                     # Another process mid-write
+    assert [r['seq'] for r in store.records()] == [1]
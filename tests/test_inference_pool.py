@@ -0,0 +1,78 @@
+import os
+import time
+import signal
+
+import pytest
+
+from inference_pool import InferencePool, ReorderBuffer
+
+
+def test_results_are_released_in_sequence_order():
+    buf = ReorderBuffer()
+    buf.push(0, 1, "b")
+    buf.push(0, 2, "c")
+    assert buf.pop_ready() == []              # Frame 0 is still on a worker
+    buf.push(0, 0, "a")
+    assert buf.pop_ready() == [(0, 0, "a"), (0, 1, "b"), (0, 2, "c")]
+    assert buf.pop_ready() == []
+
+
+def test_cameras_are_ordered_independently():
+    buf = ReorderBuffer()
+    buf.push(1, 0, "x")
+    buf.push(0, 1, "b")
+    assert buf.pop_ready() == [(1, 0, "x")]   # Camera 0 waiting doesn't hold back camera 1
+    buf.push(0, 0, "a")
+    buf.push(1, 2, "z")
+    assert buf.pop_ready() == [(0, 0, "a"), (0, 1, "b")]
+    buf.push(1, 1, "y")
+    assert buf.pop_ready() == [(1, 1, "y"), (1, 2, "z")]
+
+
+def stub_loader(model_path, threads, imgsz):
+    """Stands in for YOLO in the workers: frame n -> one detection of confidence n"""
+    def predict(frame):
+        if frame == "die":
+            os._exit(1)
+        time.sleep(0.01)
+        return [("cat", float(frame), (0, 0, 10, 10))]
+    return predict
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool("stub.pt", workers=2, threads_per_worker=1, loader=stub_loader)
+    yield pool
+    pool.close()
+
+
+def test_pool_returns_every_frame_in_order(pool):
+    for i in range(8):
+        pool.submit(i, camera=i % 2)
+    results = pool.drain(timeout=10)
+    assert [(c, s) for c, s, _, _ in results if c == 0] == [(0, s) for s in range(4)]
+    assert sorted(d[0][1] for _, _, d, _ in results) == list(range(8))
+    assert pool.inflight == 0
+
+
+def test_workers_survive_sigint_until_closed(pool):
+    for p in pool.procs:
+        os.kill(p.pid, signal.SIGINT)      # Ctrl-C reaches the whole process group
+    time.sleep(0.2)
+    assert all(p.is_alive() for p in pool.procs)
+    pool.submit(1)
+    assert len(pool.drain(timeout=10)) == 1
+    pool.close()
+    assert not any(p.is_alive() for p in pool.procs)
+
+
+def test_frames_of_a_dead_worker_are_skipped(pool):
+    for frame in (0, "die", 2, 3, 4):
+        pool.submit(frame)
+    results = pool.drain(timeout=10)
+    assert [s for _, s, _, _ in results] == list(range(5))       # The camera's sequence moves on
+    lost = [s for _, s, d, _ in results if d is None]
+    assert 1 in lost and pool.lost == len(lost)
+    assert len(pool.alive) == 1
+    pool.submit(5)
+    assert [d for _, _, d, _ in pool.drain(timeout=10)] == [[("cat", 5.0, (0, 0, 10, 10))]]
@@ -0,0 +1,56 @@
+import numpy as np
+
+from keyframe_tracker import KeyframeTracker
+
+BOX = (120, 80, 220, 180)
+
+
+def scene(shift=0):
+    """A textured square on a flat background, moved right by `shift` pixels"""
+    rng = np.random.default_rng(0)
+    frame = np.full((240, 320, 3), 60, np.uint8)
+    x1, y1, x2, y2 = BOX
+    frame[y1:y2, x1 + shift:x2 + shift] = rng.integers(0, 255, (y2 - y1, x2 - x1, 3), dtype=np.uint8)
+    return frame
+
+
+def test_first_frame_is_a_keyframe():
+    assert KeyframeTracker().propagate(scene()) is None
+
+
+def test_boxes_follow_the_animal_between_keyframes():
+    tracker = KeyframeTracker(interval=5, track_width=320)
+    tracker.keyframe(scene(), [("cat", 0.8, BOX)])
+    (name, conf, box), = tracker.propagate(scene(shift=2))
+    assert (name, conf) == ("cat", 0.8)
+    assert abs(box[0] - (BOX[0] + 2)) <= 1
+
+
+def test_interval_forces_a_keyframe():
+    tracker = KeyframeTracker(interval=3, track_width=320)
+    tracker.keyframe(scene(), [("cat", 0.8, BOX)])
+    assert tracker.propagate(scene()) is not None
+    assert tracker.propagate(scene()) is not None
+    assert tracker.propagate(scene()) is None
+
+
+def test_uncertain_keyframe_forces_the_next():
+    tracker = KeyframeTracker(interval=5, track_width=320)
+    tracker.keyframe(scene(), [("cat", 0.8, BOX)], uncertain=True)
+    assert tracker.propagate(scene()) is None
+
+
+def test_untrackable_box_forces_the_next():
+    tracker = KeyframeTracker(interval=5, track_width=320)
+    flat = np.full((240, 320, 3), 60, np.uint8)
+    tracker.keyframe(flat, [("cat", 0.8, BOX)])
+    assert tracker.propagate(flat) is None
+
+
+def test_reset_and_new_size_force_a_keyframe():
+    tracker = KeyframeTracker(interval=5, track_width=320)
+    tracker.keyframe(scene(), [("cat", 0.8, BOX)])
+    tracker.reset()
+    assert tracker.propagate(scene()) is None
+    tracker.keyframe(scene(), [("cat", 0.8, BOX)])
+    assert tracker.propagate(np.zeros((120, 160, 3), np.uint8)) is None
@@ -0,0 +1,64 @@
+import pytest
+
+from perimeter import Perimeter
+
+SHAPE = (100, 200, 3)
+FENCE = {'name': "fence", 'a': [0.0, 0.5], 'b': [1.0, 0.5]}     # Horizontal, across the whole frame
+
+
+def box_at(y):
+    """A box whose footprint (bottom centre) is at (100, y)"""
+    return (80, y - 20, 120, y)
+
+
+def step(perimeter, y, confirmed, track_ids={"TIGER": 1}):
+    detection = ("TIGER", 0.9, box_at(y))
+    threats = [detection] if confirmed else []
+    return perimeter.check(threats, track_ids, SHAPE, [detection])
+
+
+def test_zone_contains_footprints():
+    farm = {'name': "farm", 'points': [[0.0, 0.5], [1.0, 0.5], [1.0, 1.0], [0.0, 1.0]]}
+    perimeter = Perimeter(zones=[farm])
+    perimeter.prepare(SHAPE)
+    assert list(perimeter.zones_of([box_at(30), box_at(80)]) != 0) == [False, True]
+
+
+def test_crossing_in_the_alert_direction_breaches_once():
+    perimeter = Perimeter(tripwires=[dict(FENCE, direction="left")])   # a->b points right: left is up
+    assert step(perimeter, 80, True) == []
+    assert step(perimeter, 30, True) == [("TIGER", 0.9, box_at(30))]
+    assert step(perimeter, 20, True) == []                            # Already reported
+
+
+def test_crossing_the_other_way_is_ignored():
+    perimeter = Perimeter(tripwires=[dict(FENCE, direction="left")])
+    step(perimeter, 30, True)
+    assert step(perimeter, 80, True) == []
+
+
+def test_crossing_before_confirmation_breaches_at_confirmation():
+    perimeter = Perimeter(tripwires=[dict(FENCE, direction="both")])
+    assert step(perimeter, 80, False) == []
+    assert step(perimeter, 30, False) == []                           # Crossed while unconfirmed
+    assert step(perimeter, 25, True) == [("TIGER", 0.9, box_at(25))]
+
+
+def test_lost_track_starts_fresh():
+    perimeter = Perimeter(tripwires=[dict(FENCE, direction="both")])
+    step(perimeter, 80, False)
+    perimeter.check([], {}, SHAPE, [])                                # Track dropped by the tracker
+    assert step(perimeter, 30, True) == []
+
+
+def test_crop_covers_zones_and_wires():
+    perimeter = Perimeter(tripwires=[{'name': "w", 'a': [0.25, 0.5], 'b': [0.75, 0.5]}], crop=True)
+    x1, y1, x2, y2 = perimeter.roi(SHAPE)
+    assert x1 < 50 and x2 > 150 and y1 < 50 < y2
+
+
+def test_bad_config_is_rejected():
+    with pytest.raises(ValueError):
+        Perimeter(tripwires=[dict(FENCE, direction="up")])
+    with pytest.raises(ValueError):
+        Perimeter(zones=[{'name': "z", 'points': [[0, 0], [1, 1]]}])
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from pipeline import Pipeline, StageQueue, BLOCK, DROP_OLDEST, _STOP
+
+
+def counter(n):
+    items = iter(range(n))
+    return lambda: next(items, None)
+
+
+def test_drop_oldest_keeps_the_newest_and_counts_the_rest():
+    async def scenario():
+        queue = StageQueue(2, DROP_OLDEST)
+        for i in range(5):
+            await queue.put(i)
+        return [await queue.get() for _ in range(queue.qsize())], queue.dropped
+
+    assert asyncio.run(scenario()) == ([3, 4], 3)
+
+
+def test_end_of_stream_marker_is_never_dropped():
+    async def scenario():
+        queue = StageQueue(1, DROP_OLDEST)
+        await queue.put(_STOP)
+        await queue.put(1)                    # Late frame: it goes, the marker stays
+        return [await queue.get() for _ in range(queue.qsize())], queue.dropped
+
+    assert asyncio.run(scenario()) == ([_STOP], 0)
+
+
+def test_block_waits_for_room():
+    async def scenario():
+        queue = StageQueue(1, BLOCK)
+        await queue.put(1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.put(2), 0.05)
+        assert await queue.get() == 1
+        await asyncio.wait_for(queue.put(3), 0.05)
+        return queue.dropped
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_slow_stage_drops_frames_and_blocking_stage_loses_none():
+    seen, alerts = [], []
+    pipe = Pipeline()
+    pipe.add_source("capture", counter(50), cpu_bound=False)
+    pipe.add_stage("infer", lambda i: time.sleep(0.005) or seen.append(i) or i,
+                   after="capture", maxsize=1, policy=DROP_OLDEST, cpu_bound=True)
+    pipe.add_stage("alert", alerts.append, after="capture", maxsize=100, policy=BLOCK)
+    asyncio.run(pipe.run())
+
+    stats = pipe.stats()
+    assert stats['infer']['dropped'] > 0
+    assert stats['infer']['processed'] + stats['infer']['dropped'] == 50
+    assert seen[-1] == 49                     # The newest frame is never the one dropped
+    assert alerts == list(range(50))
+    assert stats['alert']['dropped'] == 0
+
+
+def test_stop_drains_queued_items_and_ends_every_stage():
+    pipe = Pipeline()
+    produced, done = [], []
+
+    def source():
+        produced.append(len(produced))
+        if len(produced) == 10:
+            pipe.stop()
+        return produced[-1]
+
+    pipe.add_source("capture", source, cpu_bound=False)
+    pipe.add_stage("alert", done.append, after="capture", maxsize=100, policy=BLOCK, cpu_bound=True)
+    asyncio.run(asyncio.wait_for(pipe.run(), 5))
+    assert done == produced == list(range(10))
+    assert pipe.executor._shutdown
+
+
+def test_failing_stage_is_counted_and_skipped():
+    pipe = Pipeline()
+    pipe.add_source("capture", counter(4), cpu_bound=False)
+    pipe.add_stage("track", lambda i: 1 / (i - 2), after="capture", maxsize=10)
+    asyncio.run(pipe.run())
+    stats = pipe.stats()['track']
+    assert (stats['processed'], stats['errors']) == (3, 1)
+
+
+def test_rate_summary_is_not_logged_at_info_every_update(caplog):
+    pipe = Pipeline(report_every=0.01, log_every=60)
+    pipe.add_source("capture", lambda: time.sleep(0.1), cpu_bound=True)
+    with caplog.at_level(logging.DEBUG):
+        asyncio.run(pipe.run())
+    summaries = [r for r in caplog.records if r.getMessage().startswith("📈")]
+    assert summaries and all(r.levelno == logging.DEBUG for r in summaries)
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+import power_scheduler
+from power_scheduler import (PowerScheduler, estimate_distance, IDLE, WATCH, ENGAGED,
+                             ENGAGED_HOLD, WATCH_HOLD, FRAME_FILL_CM)
+
+NEVER = (0, 0)        # Night hours that never apply
+ALWAYS = (0, 24)      # ...and ones that always do
+DARK = np.zeros((48, 64, 3), np.uint8)
+LIGHT = np.full((48, 64, 3), 255, np.uint8)
+TIGER = [("TIGER", 0.9, (0, 0, 10, 10))]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(power_scheduler.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_motion_wakes_an_idle_node(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    assert not scheduler.observe(frame=DARK)          # First frame only sets the background
+    assert scheduler.state == IDLE
+    assert scheduler.observe(frame=LIGHT)
+    assert scheduler.state == WATCH
+
+
+def test_near_distance_wakes_an_idle_node(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    assert not scheduler.observe(distance_cm=400)
+    assert scheduler.observe(distance_cm=100)
+    assert scheduler.state == WATCH
+
+
+def test_detections_engage_immediately(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    assert scheduler.observe(detections=TIGER)
+    assert scheduler.state == ENGAGED
+    assert scheduler.profile['fps'] == 15
+
+
+def test_engaged_holds_then_steps_down_one_state_at_a_time(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    scheduler.observe(detections=TIGER)
+    clock.now += ENGAGED_HOLD - 1
+    assert not scheduler.observe()
+    clock.now += 2
+    assert scheduler.observe()
+    assert scheduler.state == WATCH                   # Not straight to IDLE
+
+    clock.now += WATCH_HOLD - ENGAGED_HOLD - 5        # Quiet is counted from the last detection
+    assert not scheduler.observe()
+    clock.now += 5
+    assert scheduler.observe()
+    assert scheduler.state == IDLE
+
+
+def test_activity_extends_the_watch_hold(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    scheduler.observe(distance_cm=100)
+    clock.now += WATCH_HOLD - 1
+    scheduler.observe(distance_cm=100)
+    clock.now += WATCH_HOLD - 1
+    assert not scheduler.observe()
+    assert scheduler.state == WATCH
+
+
+def test_night_never_goes_below_watch(clock):
+    scheduler = PowerScheduler(night_hours=ALWAYS, clock=clock)
+    assert scheduler.observe()
+    assert scheduler.state == WATCH
+    clock.now += WATCH_HOLD * 10
+    assert not scheduler.observe()
+    assert scheduler.state == WATCH
+
+
+def test_throttle_paces_frames_at_the_state_fps(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    start = clock.now
+    for _ in range(3):
+        scheduler.throttle()
+    assert clock.now == pytest.approx(start + 2.0)    # IDLE: 1 FPS, the first frame is immediate
+
+    scheduler.observe(detections=TIGER)               # A state change frees the next slot at once
+    start = clock.now
+    for _ in range(4):
+        scheduler.throttle()
+    assert clock.now == pytest.approx(start + 3 / 15)
+
+
+def test_metrics_split_time_between_states(clock):
+    scheduler = PowerScheduler(night_hours=NEVER, clock=clock)
+    clock.now += 30
+    scheduler.observe(detections=TIGER)
+    clock.now += 10
+    metrics = scheduler.metrics()
+    assert metrics['state'] == ENGAGED
+    assert metrics['transitions'] == 1
+    assert metrics['seconds'] == {IDLE: 30.0, WATCH: 0.0, ENGAGED: 10.0}
+    assert metrics['percent'][IDLE] == pytest.approx(75.0)
+
+
+def test_distance_is_estimated_from_the_tallest_box():
+    shape = (480, 640, 3)
+    assert estimate_distance([], shape) is None
+    boxes = [("cow", 0.3, (0, 0, 50, 120)), ("cow", 0.3, (0, 0, 50, 240))]
+    assert estimate_distance(boxes, shape) == pytest.approx(2 * FRAME_FILL_CM)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from species_classifier import KEEP, SpeciesCache
+
+FRAME = np.zeros((100, 100, 3), np.uint8)
+BOX = (10, 10, 60, 60)
+
+
+class Scripted:
+    """Classifier returning a fixed sequence of (species, conf)"""
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, crop):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def run(cache, frames, track_id=1):
+    return [cache.label(track_id, FRAME, BOX) for _ in range(frames)]
+
+
+def test_votes_are_spread_out_then_cached():
+    classifier = Scripted(("TIGER", 0.9), ("TIGER", 0.8), ("TIGER", 0.7))
+    cache = SpeciesCache(classifier, votes=3, every=2)
+    verdicts = run(cache, 20)
+    assert classifier.calls == 3
+    assert verdicts[-1] == ("TIGER", (0.9 + 0.8 + 0.7) / 3)
+    assert cache.stats()['cached'] == 17
+
+
+def test_one_rejection_keeps_the_detector_label():
+    cache = SpeciesCache(Scripted((None, 0.95), ("TIGER", 0.5), ("TIGER", 0.5)), votes=3, every=0)
+    assert cache.label(1, FRAME, BOX) is None        # Undecided: not dropped
+    assert cache.label(1, FRAME, BOX) == ("TIGER", 0.5)
+    assert cache.label(1, FRAME, BOX) == ("TIGER", 0.5)
+
+
+def test_confident_rejection_majority_drops_the_threat():
+    cache = SpeciesCache(Scripted((None, 0.9), (None, 0.8), ("WILD BOAR", 0.4)), votes=3, every=0)
+    run(cache, 2)
+    assert cache.label(1, FRAME, BOX) == (None, (0.9 + 0.8) / 2)
+
+
+def test_unsure_rejection_majority_does_not_drop():
+    cache = SpeciesCache(Scripted((None, 0.4), (None, 0.4), (None, 0.4)), votes=3, every=0)
+    assert run(cache, 3)[-1] is None
+
+
+def test_neighbouring_classes_never_drop():
+    cache = SpeciesCache(Scripted((KEEP, 0.9), (KEEP, 0.9), (None, 0.9)), votes=3, every=0)
+    assert run(cache, 3)[-1] is None
+
+
+def test_weak_scores_do_not_vote():
+    cache = SpeciesCache(Scripted((None, 0.1), ("DEER", 0.6)), votes=3, every=0)
+    assert run(cache, 2) == [None, ("DEER", 0.6)]
+
+
+def test_tracks_vote_separately_and_are_forgotten():
+    cache = SpeciesCache(Scripted(("TIGER", 0.9), ("ELEPHANT", 0.8)), votes=1, every=0)
+    assert cache.label(1, FRAME, BOX) == ("TIGER", 0.9)
+    assert cache.label(2, FRAME, BOX) == ("ELEPHANT", 0.8)
+    cache.forget({2})
+    assert set(cache.tracks) == {2}
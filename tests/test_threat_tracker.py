@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from drishtix_main import ThreatTracker
+
+BOX = (10, 10, 50, 50)
+
+
+def test_one_spurious_detection_does_not_confirm():
+    tracker = ThreatTracker(confirmation_frames=5, patience_frames=10)
+    assert tracker.update([("TIGER", 0.9, BOX)]) == []
+    # Optical flow carries the box until the next keyframe
+    for _ in range(4):
+        assert tracker.update([("TIGER", 0.9, BOX)], model_hit=False) == []
+    assert tracker.update([]) == []
+
+
+def test_model_hits_confirm():
+    tracker = ThreatTracker(confirmation_frames=3, patience_frames=10)
+    assert tracker.update([("TIGER", 0.9, BOX)]) == []
+    assert tracker.update([("TIGER", 0.9, BOX)]) == []
+    assert tracker.update([("TIGER", 0.9, BOX)]) == [("TIGER", 0.9, BOX)]
+    # Once confirmed, propagated boxes keep reporting it
+    assert tracker.update([("TIGER", 0.8, BOX)], model_hit=False) == [("TIGER", 0.8, BOX)]
+
+
+def test_propagated_boxes_keep_a_track_alive():
+    tracker = ThreatTracker(confirmation_frames=3, patience_frames=10)
+    tracker.update([("TIGER", 0.9, BOX)])
+    tracker.update([("TIGER", 0.9, BOX)], model_hit=False)
+    assert tracker.active_threats["TIGER"] == 1
+    assert tracker.track_ids["TIGER"] == 1
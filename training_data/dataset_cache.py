@@ -0,0 +1,367 @@
+"""
+Pre-decoded training dataset cache.
+
+Decodes the Roboflow JPEGs once, letterboxes them to the training `imgsz`
+and stores the pixels in fixed-size memory-mapped shards next to the
+dataset. Labels are remapped to the letterboxed frame and kept in a small
+JSON manifest. Re-running the preparation only touches images (or label
+files) that changed since the last run.
+
+Usage:
+    python dataset_cache.py dataset/data.yaml --imgsz 640
+"""
+
+import os
+import json
+import glob
+import logging
+import argparse
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+import yaml
+
+# --- CONFIGURATION ---
+SHARD_SIZE = 256                    # Images per shard file
+PAD_COLOR = 114                     # Same grey Ultralytics pads with
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+MANIFEST_NAME = "manifest.json"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+
+# --- PATH HELPERS ---
+def resolve_split_dirs(data_yaml):
+    """Returns {split: image_dir} for the splits listed in data.yaml"""
+    with open(data_yaml) as f:
+        data = yaml.safe_load(f)
+
+    root = os.path.dirname(os.path.abspath(data_yaml))
+    dirs = {}
+    for split in ('train', 'val', 'test'):
+        rel = data.get(split)
+        if not rel:
+            continue
+        # Roboflow exports use "../train/images" relative to the yaml,
+        # but the folders usually sit right next to it.
+        for candidate in (os.path.join(root, rel), os.path.join(root, rel.replace('../', '', 1))):
+            if os.path.isdir(candidate):
+                dirs[split] = os.path.normpath(candidate)
+                break
+    return dirs
+
+
+def label_path_for(image_path):
+    """YOLO convention: .../images/x.jpg -> .../labels/x.txt"""
+    head, name = os.path.split(image_path)
+    label_dir = os.path.join(os.path.dirname(head), 'labels')
+    return os.path.join(label_dir, os.path.splitext(name)[0] + '.txt')
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        return None
+
+
+# --- LETTERBOX ---
+def letterbox_params(h0, w0, imgsz):
+    """Scale and padding used to fit (h0, w0) into an imgsz x imgsz square"""
+    r = imgsz / max(h0, w0)
+    new_w, new_h = int(round(w0 * r)), int(round(h0 * r))
+    left = (imgsz - new_w) // 2
+    top = (imgsz - new_h) // 2
+    return r, new_w, new_h, left, top
+
+
+def letterbox_into(img, out):
+    """Resizes img into the square uint8 array `out` (in place)"""
+    imgsz = out.shape[0]
+    h0, w0 = img.shape[:2]
+    _, new_w, new_h, left, top = letterbox_params(h0, w0, imgsz)
+    out[:] = PAD_COLOR
+    interp = cv2.INTER_AREA if new_w < w0 else cv2.INTER_LINEAR
+    out[top:top + new_h, left:left + new_w] = cv2.resize(img, (new_w, new_h), interpolation=interp)
+
+
+def remap_labels(rows, h0, w0, imgsz):
+    """Moves normalized xywh boxes from the original frame into the letterbox"""
+    r, _, _, left, top = letterbox_params(h0, w0, imgsz)
+    out = []
+    for cls, x, y, w, h in rows:
+        out.append([
+            cls,
+            (x * w0 * r + left) / imgsz,
+            (y * h0 * r + top) / imgsz,
+            w * w0 * r / imgsz,
+            h * h0 * r / imgsz,
+        ])
+    return out
+
+
+def read_label_file(path):
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                rows.append([int(parts[0])] + [float(v) for v in parts[1:5]])
+    return rows
+
+
+# --- SHARD STORAGE ---
+def shard_path(cache_dir, shard):
+    return os.path.join(cache_dir, f"shard_{shard:04d}.u8")
+
+
+def open_shard(cache_dir, shard, imgsz, mode='r'):
+    """Memory-maps one shard as (SHARD_SIZE, imgsz, imgsz, 3) uint8"""
+    return np.memmap(shard_path(cache_dir, shard), dtype=np.uint8, mode=mode,
+                     shape=(SHARD_SIZE, imgsz, imgsz, 3))
+
+
+def _prepare_one(job):
+    """Worker: decode, letterbox and write one image into its shard slot"""
+    image_path, label_path, cache_dir, shard, slot, imgsz = job
+    img = cv2.imread(image_path)
+    if img is None:
+        return image_path, None
+    mm = open_shard(cache_dir, shard, imgsz, mode='r+')
+    letterbox_into(img, mm[slot])
+    mm.flush()
+    del mm
+
+    h0, w0 = img.shape[:2]
+    labels = remap_labels(read_label_file(label_path), h0, w0, imgsz)
+    return image_path, {'orig_shape': [h0, w0], 'labels': labels}
+
+
+def load_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def prepare_dataset(data_yaml, cache_dir, imgsz=640, workers=None):
+    """
+    Builds or refreshes the shard cache for every split in data.yaml.
+
+    Only images whose file (or label file) changed since the last run are
+    decoded again; removed images free their slot for new ones.
+
+    Returns:
+        dict: The manifest that was written
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+    if manifest is None or manifest.get('imgsz') != imgsz:
+        if manifest is not None:
+            logging.info(f"♻️ imgsz changed ({manifest.get('imgsz')} -> {imgsz}), rebuilding cache")
+            for old in glob.glob(os.path.join(cache_dir, "shard_*.u8")):
+                os.remove(old)
+        manifest = {'imgsz': imgsz, 'shards': 0, 'entries': {}}
+
+    entries = manifest['entries']
+
+    # 1. Scan the dataset
+    current = {}
+    for split, image_dir in resolve_split_dirs(data_yaml).items():
+        for name in sorted(os.listdir(image_dir)):
+            if name.lower().endswith(IMAGE_EXTS):
+                image_path = os.path.join(image_dir, name)
+                label_path = label_path_for(image_path)
+                current[image_path] = (split, label_path, _file_stamp(image_path), _file_stamp(label_path))
+
+    # 2. Drop entries that no longer exist and collect their slots
+    free_slots = []
+    for image_path in list(entries):
+        if image_path not in current:
+            e = entries.pop(image_path)
+            free_slots.append((e['shard'], e['slot']))
+
+    # 3. Decide what needs (re)decoding
+    jobs = []
+    used = {(e['shard'], e['slot']) for e in entries.values()}
+    next_slot = 0
+    for image_path, (split, label_path, img_stamp, lbl_stamp) in current.items():
+        e = entries.get(image_path)
+        if e and e['image_stamp'] == img_stamp and e['label_stamp'] == lbl_stamp:
+            continue
+        if e:
+            shard, slot = e['shard'], e['slot']
+        elif free_slots:
+            shard, slot = free_slots.pop()
+        else:
+            while divmod(next_slot, SHARD_SIZE) in used:
+                next_slot += 1
+            shard, slot = divmod(next_slot, SHARD_SIZE)
+            next_slot += 1
+        used.add((shard, slot))
+        entries[image_path] = {'split': split, 'shard': shard, 'slot': slot,
+                               'image_stamp': img_stamp, 'label_stamp': lbl_stamp}
+        jobs.append((image_path, label_path, cache_dir, shard, slot, imgsz))
+
+    # 4. Make sure every shard file exists at full size before workers write
+    n_shards = max([e['shard'] + 1 for e in entries.values()] + [manifest['shards']])
+    for shard in range(manifest['shards'], n_shards):
+        open_shard(cache_dir, shard, imgsz, mode='w+').flush()
+    manifest['shards'] = n_shards
+
+    if not jobs:
+        _save_manifest(cache_dir, manifest)
+        logging.info(f"✅ Cache up to date: {len(entries)} images in {n_shards} shards")
+        return manifest
+
+    logging.info(f"🧱 Decoding {len(jobs)} of {len(current)} images into {cache_dir}...")
+    with Pool(workers or os.cpu_count()) as pool:
+        for image_path, meta in pool.imap_unordered(_prepare_one, jobs, chunksize=8):
+            if meta is None:
+                logging.warning(f"⚠️ Could not decode {image_path}, skipping")
+                entries.pop(image_path, None)
+                continue
+            entries[image_path].update(meta)
+
+    _save_manifest(cache_dir, manifest)
+    logging.info(f"✅ Cache ready: {len(entries)} images in {n_shards} shards")
+    return manifest
+
+
+# --- DATA SOURCE ---
+class ShardDataSource:
+    """Random access to the prepared shards (no JPEG decode, no resize)"""
+    def __init__(self, cache_dir, split=None):
+        self.cache_dir = cache_dir
+        self.manifest = load_manifest(cache_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No shard cache in {cache_dir}, run prepare_dataset first")
+        self.imgsz = self.manifest['imgsz']
+        self.files = sorted(p for p, e in self.manifest['entries'].items()
+                            if split is None or e['split'] == split)
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def entry(self, key):
+        """Manifest entry by index or by original image path"""
+        path = self.files[key] if isinstance(key, int) else key
+        return self.manifest['entries'].get(path)
+
+    def image(self, key):
+        """Letterboxed BGR image (a view into the memory map)"""
+        e = self.entry(key)
+        shard = e['shard']
+        if shard not in self._shards:
+            self._shards[shard] = open_shard(self.cache_dir, shard, self.imgsz)
+        return self._shards[shard][e['slot']]
+
+    def labels(self, key):
+        """Rows of [cls, x, y, w, h], normalized to the letterboxed image"""
+        return self.entry(key)['labels']
+
+
+# --- ULTRALYTICS INTEGRATION ---
+def make_cached_dataset(cache_dir):
+    """
+    Returns a YOLODataset subclass that reads images and labels from the shards.
+
+    Images missing from the cache fall back to the normal JPEG path.
+    """
+    from ultralytics.data.dataset import YOLODataset
+
+    source = ShardDataSource(cache_dir)
+    imgsz = source.imgsz
+
+    class CachedYOLODataset(YOLODataset):
+        def get_labels(self):
+            labels = super().get_labels()
+            for lb in labels:
+                e = source.entry(os.path.abspath(lb['im_file']))
+                if e is None:
+                    continue
+                rows = np.array(e['labels'], dtype=np.float32).reshape(-1, 5)
+                lb['shape'] = (imgsz, imgsz)
+                lb['cls'] = rows[:, :1]
+                lb['bboxes'] = rows[:, 1:]
+            return labels
+
+        def load_image(self, i, rect_mode=True):
+            path = os.path.abspath(self.im_files[i])
+            if self.ims[i] is not None or source.entry(path) is None or self.imgsz != imgsz:
+                return super().load_image(i, rect_mode)      # Already buffered, or not cached
+            # Copy: augmentations may write into the array
+            im = np.array(source.image(path))
+            hw = (imgsz, imgsz)
+            if self.augment:
+                # Same bookkeeping as BaseDataset.load_image: Mosaic picks its partners from the buffer
+                self.ims[i], self.im_hw0[i], self.im_hw[i] = im, hw, hw
+                self.buffer.append(i)
+                if 1 < len(self.buffer) >= self.max_buffer_length:
+                    j = self.buffer.pop(0)
+                    if self.cache != "ram":
+                        self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+            return im, hw, hw
+
+    return CachedYOLODataset
+
+
+def make_cached_trainer(cache_dir):
+    """
+    Returns a DetectionTrainer subclass whose datasets read from the shards.
+
+    Pass it as `model.train(..., trainer=make_cached_trainer(cache_dir))`.
+    Images missing from the cache fall back to the normal JPEG path.
+    """
+    from ultralytics.models.yolo.detect import DetectionTrainer
+    from ultralytics.utils import colorstr
+
+    CachedYOLODataset = make_cached_dataset(cache_dir)
+
+    class CachedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode="train", batch=None):
+            gs = max(int(self.model.stride.max() if self.model else 0), 32)
+            cfg = self.args
+            return CachedYOLODataset(
+                img_path=img_path,
+                imgsz=cfg.imgsz,
+                batch_size=batch,
+                augment=mode == "train",
+                hyp=cfg,
+                rect=cfg.rect or mode == "val",
+                cache=cfg.cache or None,
+                single_cls=cfg.single_cls or False,
+                stride=gs,
+                pad=0.0 if mode == "train" else 0.5,
+                prefix=colorstr(f"{mode}: "),
+                task=cfg.task,
+                classes=cfg.classes,
+                data=self.data,
+                fraction=cfg.fraction if mode == "train" else 1.0,
+            )
+
+    return CachedDetectionTrainer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-decode the dataset into memory-mapped shards")
+    parser.add_argument('data', nargs='?', default='dataset/data.yaml')
+    parser.add_argument('--cache-dir', default='dataset/.shards')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    prepare_dataset(args.data, args.cache_dir, imgsz=args.imgsz, workers=args.workers)
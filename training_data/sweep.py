@@ -0,0 +1,202 @@
+"""
+Model-size / input-size sweep with a Pareto report.
+
+Trains (or fine-tunes) every combination of base weights and imgsz in
+parallel on the CPU, then benchmarks each result on the validation split
+for per-class recall and single-image CPU latency, and writes a report
+marking the configurations on the latency / recall Pareto frontier.
+
+Usage:
+    python sweep.py --models yolov8n.pt yolov8s.pt --imgsz 320 480 640 --jobs 3
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dataset_cache import prepare_dataset, resolve_split_dirs, IMAGE_EXTS
+
+# --- CONFIGURATION ---
+DATA_YAML = 'dataset/data.yaml'
+CACHE_DIR = 'dataset/.shards'
+PROJECT_DIR = 'runs/sweep'
+DEFAULT_MODELS = ['yolov8n.pt', 'yolov8s.pt']
+DEFAULT_IMGSZ = [320, 480, 640]
+LATENCY_IMAGES = 50       # Validation images timed per config
+WARMUP_RUNS = 5
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+
+def config_name(weights, imgsz):
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return f"{stem}_{imgsz}"
+
+
+def _init_worker(threads):
+    # Must happen before torch spins up its thread pool in this process
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _train_one(weights, imgsz, epochs, batch, use_cache):
+    """Worker: trains one configuration and returns the best.pt path"""
+    from ultralytics import YOLO
+
+    name = config_name(weights, imgsz)
+    kwargs = {}
+    if use_cache:
+        from dataset_cache import make_cached_trainer
+        kwargs['trainer'] = make_cached_trainer(f"{CACHE_DIR}_{imgsz}")
+
+    model = YOLO(weights)
+    model.train(
+        data=DATA_YAML,
+        epochs=epochs,
+        imgsz=imgsz,
+        batch=batch,
+        device='cpu',
+        workers=0,            # The sweep already fills the cores
+        project=PROJECT_DIR,
+        name=name,
+        exist_ok=True,
+        plots=False,
+        verbose=False,
+        **kwargs
+    )
+    return name, os.path.join(PROJECT_DIR, name, 'weights', 'best.pt')
+
+
+def benchmark(weights_path, imgsz):
+    """Per-class recall on the val split plus median/p90 CPU latency"""
+    import cv2
+    import numpy as np
+    from ultralytics import YOLO
+
+    model = YOLO(weights_path)
+    metrics = model.val(data=DATA_YAML, imgsz=imgsz, split='val', device='cpu',
+                        plots=False, verbose=False)
+    recall = {}
+    for i, cls_idx in enumerate(metrics.box.ap_class_index):
+        recall[model.names[int(cls_idx)]] = float(metrics.box.r[i])
+
+    val_dir = resolve_split_dirs(DATA_YAML).get('val')
+    paths = sorted(p for p in glob.glob(os.path.join(val_dir, '*')) if p.lower().endswith(IMAGE_EXTS))
+    images = [cv2.imread(p) for p in paths[:LATENCY_IMAGES]]
+    for img in images[:WARMUP_RUNS]:
+        model.predict(img, imgsz=imgsz, device='cpu', verbose=False)
+
+    times = []
+    for img in images:
+        t0 = time.perf_counter()
+        model.predict(img, imgsz=imgsz, device='cpu', verbose=False)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        'recall': recall,
+        'min_recall': min(recall.values()) if recall else 0.0,
+        'mean_recall': float(np.mean(list(recall.values()))) if recall else 0.0,
+        'map50': float(metrics.box.map50),
+        'latency_ms': float(np.median(times)),
+        'latency_p90_ms': float(np.percentile(times, 90)),
+    }
+
+
+def pareto_front(results):
+    """Names of configs no other config beats on both latency and worst-class recall"""
+    front = []
+    for a in results:
+        dominated = any(
+            b['latency_ms'] <= a['latency_ms'] and b['min_recall'] >= a['min_recall']
+            and (b['latency_ms'] < a['latency_ms'] or b['min_recall'] > a['min_recall'])
+            for b in results
+        )
+        if not dominated:
+            front.append(a['name'])
+    return front
+
+
+def write_report(results, out_dir):
+    front = set(pareto_front(results))
+    for r in results:
+        r['pareto'] = r['name'] in front
+
+    with open(os.path.join(out_dir, 'sweep_report.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+
+    classes = sorted({c for r in results for c in r['recall']})
+    lines = [
+        "# Model Sweep Report",
+        "",
+        "Configs marked ⭐ are on the Pareto frontier (lower latency, higher worst-class recall).",
+        "",
+        "| Config | Latency ms (p50 / p90) | mAP50 | Min recall | " + " | ".join(f"R({c})" for c in classes) + " |",
+        "|---|---|---|---|" + "---|" * len(classes),
+    ]
+    for r in sorted(results, key=lambda r: r['latency_ms']):
+        per_class = " | ".join(f"{r['recall'].get(c, 0.0):.2f}" for c in classes)
+        star = "⭐ " if r['pareto'] else ""
+        lines.append(f"| {star}{r['name']} | {r['latency_ms']:.1f} / {r['latency_p90_ms']:.1f} | "
+                     f"{r['map50']:.3f} | {r['min_recall']:.2f} | {per_class} |")
+
+    path = os.path.join(out_dir, 'sweep_report.md')
+    with open(path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def run_sweep(models, sizes, epochs, batch, jobs, use_cache=True):
+    os.makedirs(PROJECT_DIR, exist_ok=True)
+    configs = list(itertools.product(models, sizes))
+    jobs = max(1, min(jobs, len(configs)))
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+
+    # 1. One shard cache per input size, shared by every model at that size
+    if use_cache:
+        for imgsz in sizes:
+            prepare_dataset(DATA_YAML, f"{CACHE_DIR}_{imgsz}", imgsz=imgsz)
+
+    # 2. Train in parallel, at most `jobs` at a time
+    logging.info(f"🏋️ Training {len(configs)} configs, {jobs} at a time, {threads} threads each")
+    trained = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(_train_one, w, s, epochs, batch, use_cache): (w, s) for w, s in configs}
+        for fut in as_completed(futures):
+            weights, imgsz = futures[fut]
+            try:
+                name, best = fut.result()
+                trained[name] = (best, imgsz)
+                logging.info(f"✅ Trained {name}")
+            except Exception as e:
+                logging.error(f"❌ {config_name(weights, imgsz)} failed: {e}")
+
+    # 3. Benchmark one at a time so latencies are comparable
+    results = []
+    for name, (best, imgsz) in sorted(trained.items()):
+        logging.info(f"⏱️ Benchmarking {name}...")
+        stats = benchmark(best, imgsz)
+        stats.update({'name': name, 'weights': best, 'imgsz': imgsz})
+        results.append(stats)
+
+    path = write_report(results, PROJECT_DIR)
+    logging.info(f"📊 Report written to {path}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train and compare model/imgsz configurations")
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS,
+                        help="Base weights; pass a trained best.pt to fine-tune it")
+    parser.add_argument('--imgsz', nargs='+', type=int, default=DEFAULT_IMGSZ)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=16)
+    parser.add_argument('--jobs', type=int, default=2, help="Configs trained concurrently")
+    parser.add_argument('--no-cache', action='store_true', help="Read JPEGs instead of the shard cache")
+    args = parser.parse_args()
+    run_sweep(args.models, args.imgsz, args.epochs, args.batch, args.jobs, use_cache=not args.no_cache)
@@ -1,23 +1,36 @@
 from ultralytics import YOLO
+from dataset_cache import prepare_dataset, make_cached_trainer
+
+# --- CONFIGURATION ---
+DATA_YAML = 'dataset/data.yaml'
+CACHE_DIR = 'dataset/.shards'   # Pre-decoded, letterboxed images
+IMGSZ = 640
 
 def train_model():
     # 1. Load the "Nano" model (v8n)
     # This is the smallest, fastest model available, perfect for low latency.
     model = YOLO('yolov8n.pt') 
 
-    # 2. Train the model
+    # 2. Decode the dataset once into memory-mapped shards
+    # Only new or changed images are decoded again on later runs,
+    # so weekly retraining skips the JPEG decode/resize work.
+    prepare_dataset(DATA_YAML, CACHE_DIR, imgsz=IMGSZ)
+
+    # 3. Train the model
     # data: Path to your data.yaml file
     # epochs: 50 is a good balance for speed vs accuracy
     # imgsz: 640 is standard, but 320 is faster (less accurate)
+    #        (must match the imgsz the cache was prepared with)
     results = model.train(
-        data='dataset/data.yaml', 
+        data=DATA_YAML, 
         epochs=50, 
-        imgsz=640, 
+        imgsz=IMGSZ, 
         batch=16,
-        name='agrishield_model' 
+        name='agrishield_model',
+        trainer=make_cached_trainer(CACHE_DIR)
     )
 
-    # 3. Export for optimization
+    # 4. Export for optimization
     # Exporting to TFLite or ONNX creates a lighter file for edge devices
     model.export(format='tflite') 
 